@@ -6,6 +6,7 @@ This script tests the basic functionality of the PhD Agent multi-agent research
 without requiring external services like Milvus or OpenAI API.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -43,6 +44,16 @@ def test_imports():
         print(f"❌ models import failed: {e}")
         return False
 
+    return True
+
+
+def test_agent_imports():
+    """Test that all agent modules can be imported."""
+    print("Testing agent imports...")
+
+    # The agents are imported one after another on purpose: importing them from
+    # several threads deadlocks on the circular imports of langchain_core.
+
     try:
         from phd_agent.agents.supervisor_agent import SupervisorAgent  # noqa: F401
 
@@ -260,7 +271,7 @@ def test_file_structure():
     return True
 
 
-def main():
+def main(full_test: bool = False):
     """Run all tests."""
     print("=" * 60)
     print("PhD Agent - System Test")
@@ -271,8 +282,15 @@ def main():
         ("Imports", test_imports),
         ("Configuration", test_config),
         ("Data Models", test_models),
-        ("Agent Initialization", test_agent_initialization),
     ]
+    if full_test:
+        # the agents load the LLM, vector store and PDF dependencies
+        tests += [
+            ("Agent Imports", test_agent_imports),
+            ("Agent Initialization", test_agent_initialization),
+        ]
+    else:
+        print("ℹ️  Skipping agent tests, run with --full-test to include them")
 
     passed = 0
     total = len(tests)
@@ -305,5 +323,12 @@ def main():
 
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="PhD Agent system test")
+    parser.add_argument(
+        "--full-test",
+        action="store_true",
+        help="Also import and initialize the agents (loads all heavy dependencies)",
+    )
+    args = parser.parse_args()
+    success = main(full_test=args.full_test)
     sys.exit(0 if success else 1)
@@ -5,8 +5,12 @@ Setup script for PhD Agent Multi-Agent Research System
 This script helps set up the environment and dependencies for the research system.
 """
 
+import os
+import re
+import shutil
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
@@ -22,12 +26,62 @@ def check_python_version():
     return True
 
 
+# The directory of the pre-built wheels of the project and its dependencies
+WHEELHOUSE = ".wheelhouse"
+# The hash-pinned dependencies compiled from pyproject.toml for this platform
+LOCKFILE = "requirements.lock"
+
+
 def install_dependencies():
-    """Install required dependencies."""
+    """Install required dependencies from the hash-pinned lockfile or pre-built wheels."""
     print("\n📦 Installing dependencies...")
+    pip = [sys.executable, "-m", "pip"]
+    env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1", PIP_NO_INPUT="1")
+    cache_options = []
+    if os.environ.get("CI"):
+        # keep the wheel cache in a directory persisted between the CI runs
+        cache_dir = os.environ.get("PIP_CACHE_DIR", str(Path(".pip-cache").absolute()))
+        cache_options = ["--cache-dir", cache_dir]
+
     try:
+        # the wheel package lets pip cache the wheels it builds from sdists
+        subprocess.check_call(
+            pip + ["install", "-U", "pip", "wheel", "pip-tools"] + cache_options,
+            env=env,
+        )
+
+        if compile_lockfile(env):
+            # the lockfile is flat and pinned, so pip skips the dependency resolution.
+            # The wheels pip builds from sdists do not match the locked hashes, so
+            # the lockfile is installed from the index, reusing the pip wheel cache
+            subprocess.check_call(
+                pip
+                + ["install", "--prefer-binary", "--require-hashes", "--no-deps"]
+                + ["-r", LOCKFILE]
+                + cache_options,
+                env=env,
+            )
+        else:
+            requirements = get_project_dependencies()
+            # download or build the wheels of the dependencies once, preferring the
+            # pre-built binary wheels
+            subprocess.check_call(
+                pip
+                + ["wheel", "--prefer-binary", "-w", WHEELHOUSE]
+                + cache_options
+                + requirements,
+                env=env,
+            )
+            # install from the local wheels only, without compiling or hitting the index
+            subprocess.check_call(
+                pip
+                + ["install", "--no-index", "--find-links", WHEELHOUSE]
+                + requirements,
+                env=env,
+            )
+        # install the project itself, its dependencies are already installed
         subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"]
+            pip + ["install", "--no-deps", "-e", "."] + cache_options, env=env
         )
         print("✅ Dependencies installed successfully")
         return True
@@ -36,6 +90,50 @@ def install_dependencies():
         return False
 
 
+def compile_lockfile(env):
+    """Compile the hash-pinned lockfile if it is missing or older than pyproject.toml."""
+    lockfile = Path(LOCKFILE)
+    if (
+        lockfile.exists()
+        and lockfile.stat().st_mtime >= Path("pyproject.toml").stat().st_mtime
+    ):
+        print(f"✅ {LOCKFILE} is up to date")
+        return True
+
+    print(f"\n🔒 Compiling {LOCKFILE}...")
+    try:
+        subprocess.check_call(
+            [
+                sys.executable,
+                "-m",
+                "piptools",
+                "compile",
+                "--generate-hashes",
+                "--strip-extras",
+                "--quiet",
+                "-o",
+                LOCKFILE,
+                "pyproject.toml",
+            ],
+            env=env,
+        )
+        print(f"✅ Compiled {LOCKFILE}")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(
+            f"⚠️  Failed to compile {LOCKFILE}, installing unpinned dependencies: {e}"
+        )
+        return False
+
+
+def get_project_dependencies():
+    """Get the dependencies declared in pyproject.toml."""
+    import tomllib
+
+    with open("pyproject.toml", "rb") as f:
+        return tomllib.load(f)["project"]["dependencies"]
+
+
 def create_env_file():
     """Create .env file from template."""
     env_file = Path(".env")
@@ -76,15 +174,28 @@ TEMPERATURE=0.7
 
 def check_docker():
     """Check if Docker is available."""
-    try:
-        subprocess.run(["docker", "--version"], check=True, capture_output=True)
-        print("✅ Docker is available")
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    # a PATH lookup is enough to tell, without starting the docker CLI
+    docker = shutil.which("docker")
+    if docker is None:
         print(
             "⚠️  Docker not found. You'll need to install Docker to run Milvus locally"
         )
         return False
+    print(f"✅ Docker is available at {docker}")
+    return True
+
+
+def get_compose_command():
+    """Get the Docker Compose command, preferring the standalone docker-compose binary."""
+    if shutil.which("docker-compose"):
+        return ["docker-compose"]
+    # the Compose v2 plugin is run through the docker CLI
+    return ["docker", "compose"]
+
+
+MILVUS_VERSION = "v2.5.14"
+MILVUS_COMPOSE_URL = f"https://github.com/milvus-io/milvus/releases/download/{MILVUS_VERSION}/milvus-standalone-docker-compose.yml"
+MILVUS_IMAGE = f"milvusdb/milvus:{MILVUS_VERSION}"
 
 
 def setup_milvus():
@@ -92,26 +203,34 @@ def setup_milvus():
     if not check_docker():
         print("⚠️  Skipping Milvus setup (Docker not available)")
         return False
+    compose = get_compose_command()
 
     print("\n🐳 Setting up Milvus...")
 
-    # Download Milvus docker-compose file
+    # Download Milvus docker-compose file before the pulls, so that a failed
+    # download does not wait for the image pulls to finish
     compose_file = "milvus-standalone-docker-compose.yml"
     if not Path(compose_file).exists():
         try:
-            import urllib.request
-
-            url = "https://github.com/milvus-io/milvus/releases/download/v2.5.14/milvus-standalone-docker-compose.yml"
-            urllib.request.urlretrieve(url, compose_file)
+            download_file(MILVUS_COMPOSE_URL, compose_file)
             print("✅ Downloaded Milvus docker-compose file")
         except Exception as e:
             print(f"❌ Failed to download Milvus compose file: {e}")
             return False
 
+    # Pull the images of the compose file in parallel
+    images = dict.fromkeys([MILVUS_IMAGE] + get_compose_images(compose_file))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for image in images:
+            executor.submit(pull_docker_image, image)
+
     # Start Milvus
     try:
         print("🚀 Starting Milvus...")
-        subprocess.run(["docker-compose", "-f", compose_file, "up", "-d"], check=True)
+        subprocess.run(
+            compose + ["-f", compose_file, "up", "-d", "--no-build"],
+            check=True,
+        )
         print("✅ Milvus started successfully")
         print("📊 Milvus will be available at http://localhost:9091")
         return True
@@ -120,14 +239,50 @@ def setup_milvus():
         return False
 
 
+def download_file(url, file_path):
+    """Stream the URL into the file, replacing it only when the download completes."""
+    import urllib.request
+
+    part_path = f"{file_path}.part"
+    with urllib.request.urlopen(url, timeout=60) as response, open(
+        part_path, "wb"
+    ) as f:
+        shutil.copyfileobj(response, f, length=1 << 20)
+    # a partial download must not be mistaken for the file on the next run
+    os.replace(part_path, file_path)
+
+
+def get_compose_images(compose_file):
+    """Get the images of the services in the docker-compose file."""
+    try:
+        content = Path(compose_file).read_text()
+    except OSError:
+        return []
+    return re.findall(r"^\s*image:\s*[\"']?([^\s\"']+)", content, re.MULTILINE)
+
+
+def pull_docker_image(image):
+    """Pull the Docker image, failures are left to docker-compose to report."""
+    result = subprocess.run(["docker", "pull", image], capture_output=True)
+    if result.returncode == 0:
+        print(f"✅ Pulled {image}")
+        return True
+    print(f"⚠️  Failed to pull {image}, docker-compose will retry")
+    return False
+
+
 def create_directories():
     """Create necessary directories."""
     print("\n📁 Creating directories...")
     directories = ["data", "logs", "output", "examples"]
 
+    # a single directory listing instead of a mkdir call per directory
+    with os.scandir(".") as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
     for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
-        print(f"✅ Created {directory}/ directory")
+        if directory not in existing:
+            os.makedirs(directory, exist_ok=True)
+    print(f"✅ Directories ready: {', '.join(d + '/' for d in directories)}")
 
 
 def main():
@@ -160,7 +315,9 @@ def main():
     print("\nNext steps:")
     print("1. Edit .env file and add your OpenAI API key")
     print("2. Start Milvus if not already running:")
-    print("   docker-compose -f milvus-standalone-docker-compose.yml up -d")
+    print(
+        f"   {' '.join(get_compose_command())} -f milvus-standalone-docker-compose.yml up -d"
+    )
     print("3. Run a test:")
     print("   python examples/basic_research.py")
     print("4. Or use the command line interface:")
@@ -11,7 +11,9 @@ import logging
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root / "src"))
+src_path = str(project_root / "src")
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
 
 
 logger = logging.getLogger(__name__)
@@ -25,9 +27,14 @@ output_files = [
 ]
 
 
+_OUTPUT_PATHS = tuple(
+    str(project_root / "output" / output_file) for output_file in output_files
+)
+
+
 def get_output_files():
     """Get the full paths to the output files."""
-    return [str(project_root / "output" / output_file) for output_file in output_files]
+    return list(_OUTPUT_PATHS)
 
 
 def main():
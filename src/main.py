@@ -8,11 +8,7 @@ It provides a command-line interface for running research workflows.
 
 import argparse
 import logging
-from pathlib import Path
-
-from phd_agent.config import config
-from phd_agent.models import ResearchParameters
-from phd_agent.research_manager import run_research
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +34,13 @@ Examples:
         """,
     )
 
-    parser.add_argument("--topic", required=True, help="Research topic to investigate")
+    parser.add_argument(
+        "--topic", help="Research topic to investigate (required unless --status-only)"
+    )
 
     parser.add_argument(
         "--requirements",
-        required=True,
-        help="Research requirements and specific questions to address",
+        help="Research requirements and specific questions to address (required unless --status-only)",
     )
 
     parser.add_argument(
@@ -84,6 +81,19 @@ Examples:
 
     args = parser.parse_args()
 
+    # import dependencies after the arguments are parsed, so that --help stays fast
+    from phd_agent.config import config
+    from phd_agent.research_manager import log_system_status, run_research
+    from phd_agent.models import ResearchParameters
+
+    if args.status_only:
+        # Just show system status without the research parameters
+        log_system_status()
+        return
+
+    if not args.topic or not args.requirements:
+        parser.error("the following arguments are required: --topic, --requirements")
+
     # Apply command line overrides to configuration
     if args.no_web_search:
         config.ENABLE_WEB_SEARCH = False
@@ -92,12 +102,16 @@ Examples:
     # Validate PDF paths if provided
     pdf_paths = []
     if args.pdfs:
+        cwd = os.getcwd()
         for path in args.pdfs:
-            path_obj = Path(path)
-            if not path_obj.exists():
-                logger.warning(f"Path does not exist: {path}")
+            if not os.path.exists(path):
+                logger.warning("Path does not exist: %s", path)
                 continue
-            pdf_paths.append(str(path_obj.absolute()))
+            pdf_paths.append(
+                path
+                if os.path.isabs(path)
+                else os.path.normpath(os.path.join(cwd, path))
+            )
 
     parameters = ResearchParameters(
         topic=args.topic,
@@ -105,10 +119,10 @@ Examples:
         max_relevant_sources=args.max_sources,
         essay_length=args.essay_length,
         pdf_paths=pdf_paths,
-        output_files=[args.output],
+        output_files=[args.output or "essay_output.txt"],
         verbose=args.verbose,
     )
-    run_research(parameters, status_only=args.status_only)
+    run_research(parameters)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,29 @@
-import json
+import asyncio
+import hashlib
+import heapq
 import logging
-from typing import List, Dict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Coroutine, List, Dict, Optional, Tuple
 
-from langchain.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from pydantic import SecretStr
+import numpy as np
+from langchain_core.messages import BaseMessage
 
+from ..assessment_cache import get_assessment_cache
 from ..config import config
-from ..llm_utils import parse_llm_response
+from ..llm_cache import CachedLLM
+from ..llm_factory import get_chat, get_embeddings
+from ..llm_utils import create_prompt_template, limit_llm_call, truncate_tokens
+from ..semantic_cache import SemanticCachedLLM
 from ..models import (
     DocumentSource,
     DocumentRelevanceAssessment,
     DocumentQualityAssessment,
+    DocumentRelevanceOutput,
+    DocumentQualityOutput,
+    DocumentAssessmentOutput,
+    DocumentAssessmentBatchOutput,
     AgentState,
     AnalysisResults,
     CollectedDataSummary,
@@ -25,49 +37,92 @@ class AnalystAgent:
     """Agent responsible for analyzing and assessing the relevance of acquired data."""
 
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=config.OPENAI_MODEL,
-            temperature=config.TEMPERATURE,
-            api_key=SecretStr(config.OPENAI_API_KEY),
-        )
+        self.llm = _create_llm(config.OPENAI_MODEL)
 
-        self.relevance_prompt = ChatPromptTemplate.from_template(
-            """
-        You are an expert research analyst. Analyze the following document for its relevance to the research topic.
+        # The static instructions and the research task lead the prompts, so that the
+        # prefix shared by the per-document calls is cached by the provider
+        self.relevance_prompt = create_prompt_template(
+            system_prompt="""
+        You are an expert research analyst. Analyze the document provided by the user for its relevance to the research topic.
 
+        ***Please assess this document and provide:***
+        1. Relevance Score (0.0 to 1.0, where 1.0 is highly relevant)
+        2. Detailed reasoning for the score
+        3. Key points or insights from the document
+        4. Confidence level in your assessment (0.0 to 1.0)
+        """,
+            context_prompt="""
         Research Topic: {topic}
         Research Requirements: {requirements}
-
+        """,
+            user_prompt="""
         Document Title: {title}
         Document Content: {content}
         Document Source: {source_type}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
+        )
+
+        # The relevance and the quality of a document are assessed together, so that
+        # each document is sent to the LLM only once
+        self.assessment_prompt = create_prompt_template(
+            system_prompt="""
+        You are an expert research analyst. Analyze the document provided by the user for its relevance to the research topic, and evaluate its quality and reliability.
 
         ***Please assess this document and provide:***
         1. Relevance Score (0.0 to 1.0, where 1.0 is highly relevant)
-        2. Detailed reasoning for the score
+        2. Detailed reasoning for the relevance score
         3. Key points or insights from the document
-        4. Confidence level in your assessment (0.0 to 1.0)
-
-        ***Respond with JSON:***
-        {{
-            "relevance_score": 0.85,
-            "reasoning": "This document directly addresses the research topic by...",
-            "key_points": ["Point 1", "Point 2", "Point 3"],
-            "confidence": 0.9
-        }}
-        
-        You should only return the JSON response and nothing else. Do not include any additional text or formatting.
-        """
-        )
-
-        self.quality_prompt = ChatPromptTemplate.from_template(
-            """
-        You are an expert research analyst. Evaluate the quality and reliability of the following document.
-
+        4. Confidence level in your relevance assessment (0.0 to 1.0)
+        5. Credibility Score (0.0 to 1.0)
+        6. Information Quality Score (0.0 to 1.0)
+        7. Currency/Recency Score (0.0 to 1.0)
+        8. Overall Quality Assessment
+        9. Potential biases or limitations
+        """,
+            context_prompt="""
+        Research Topic: {topic}
+        Research Requirements: {requirements}
+        """,
+            user_prompt="""
         Document Title: {title}
         Document Content: {content}
         Document Source: {source_type}
         Document URL: {url}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
+        )
+
+        self.batch_assessment_prompt = create_prompt_template(
+            system_prompt="""
+        You are an expert research analyst. Analyze each of the numbered documents provided by the user for its relevance to the research topic, and evaluate its quality and reliability.
+
+        ***Please assess each document and provide:***
+        1. Document number as given by the user
+        2. Relevance Score (0.0 to 1.0, where 1.0 is highly relevant)
+        3. Detailed reasoning for the relevance score
+        4. Key points or insights from the document
+        5. Confidence level in your relevance assessment (0.0 to 1.0)
+        6. Credibility Score (0.0 to 1.0)
+        7. Information Quality Score (0.0 to 1.0)
+        8. Currency/Recency Score (0.0 to 1.0)
+        9. Overall Quality Assessment
+        10. Potential biases or limitations
+        """,
+            context_prompt="""
+        Research Topic: {topic}
+        Research Requirements: {requirements}
+        """,
+            user_prompt="{documents}",
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
+        )
+
+        self.quality_prompt = create_prompt_template(
+            system_prompt="""
+        You are an expert research analyst. Evaluate the quality and reliability of the document provided by the user.
 
         ***Please assess the document quality and provide:***
         1. Credibility Score (0.0 to 1.0)
@@ -75,21 +130,46 @@ class AnalystAgent:
         3. Currency/Recency Score (0.0 to 1.0)
         4. Overall Quality Assessment
         5. Potential biases or limitations
-
-       ***Respond with JSON:***
-        {{
-            "credibility_score": 0.8,
-            "information_quality": 0.7,
-            "currency_score": 0.9,
-            "overall_quality": "high",
-            "biases_limitations": ["List any biases or limitations"],
-            "recommendation": "include" or "exclude"
-        }}
-        
-        You should only return the JSON response and nothing else. Do not include any additional text or formatting.
-        """
+        """,
+            user_prompt="""
+        Document Title: {title}
+        Document Content: {content}
+        Document Source: {source_type}
+        Document URL: {url}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
         )
 
+    @cached_property
+    def relevance_llm(self) -> Any:
+        """Chat model returning the relevance assessment as structured output."""
+        return self.llm.with_structured_output(DocumentRelevanceOutput)
+
+    @cached_property
+    def quality_llm(self) -> Any:
+        """Chat model returning the quality assessment as structured output, the quality
+        of a single document is assessed by the cheaper model if configured."""
+        llm = self.llm
+        if config.ANALYST_QUALITY_MODEL:
+            llm = _create_llm(config.ANALYST_QUALITY_MODEL)
+        return llm.with_structured_output(DocumentQualityOutput)
+
+    @cached_property
+    def assessment_llm(self) -> Any:
+        """Chat model returning the relevance and quality assessment as structured output."""
+        return self.llm.with_structured_output(DocumentAssessmentOutput)
+
+    @cached_property
+    def batch_assessment_llm(self) -> Any:
+        """Chat model returning the assessments of the batch as structured output."""
+        llm = self.llm
+        if config.ENABLE_SEMANTIC_LLM_CACHE:
+            # the batch prompts differing in a few documents are similar as a whole,
+            # while their answers are keyed by the document numbers
+            llm = _create_llm(config.OPENAI_MODEL, semantic_cache=False)
+        return llm.with_structured_output(DocumentAssessmentBatchOutput)
+
     def assess_document_relevance(
         self, document: DocumentSource, topic: str, requirements: str
     ) -> DocumentRelevanceAssessment:
@@ -100,42 +180,13 @@ class AnalystAgent:
                 topic=topic,
                 requirements=requirements,
                 title=document.title,
-                content=document.content[:2000],  # Limit content length
+                content=_truncate_content(document),
                 source_type=document.source_type.value,
             )
 
             # Get assessment from LLM
-            response = self.llm.invoke(messages)
-            # Handle both string and list response formats
-            content = (
-                response.content
-                if isinstance(response.content, str)
-                else str(response.content)
-            )
-
-            # Parse JSON response
-            try:
-                assessment_data = parse_llm_response(content)
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing JSON response: '{content}'", exc_info=True)
-                # Fallback if JSON parsing fails
-                assessment_data = {
-                    "relevance_score": 0.5,
-                    "reasoning": "Unable to parse assessment",
-                    "key_points": [],
-                    "confidence": 0.5,
-                }
-
-            # Create an assessment object
-            assessment = DocumentRelevanceAssessment(
-                document_id=document.id,
-                relevance_score=assessment_data.get("relevance_score", 0.5),
-                reasoning=assessment_data.get("reasoning", "No reasoning provided"),
-                key_points=assessment_data.get("key_points", []),
-                confidence=assessment_data.get("confidence", 0.5),
-            )
-
-            return assessment
+            output = self.relevance_llm.invoke(messages)
+            return _create_relevance_assessment(document, output.model_dump())
 
         except Exception as e:
             logger.error(
@@ -150,6 +201,254 @@ class AnalystAgent:
                 confidence=0.0,
             )
 
+    def assess_document(
+        self, document: DocumentSource, topic: str, requirements: str
+    ) -> Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]:
+        """Assess the relevance and the quality of a single document with one LLM call."""
+        try:
+            messages = self._format_assessment_messages(document, topic, requirements)
+
+            # Get assessment from LLM
+            output = self.assessment_llm.invoke(messages)
+            return _create_assessment(document, output.model_dump())
+
+        except Exception as e:
+            logger.error(
+                f"Error assessing document {document.title}: {e}", exc_info=True
+            )
+            return _default_document_assessment(document, e)
+
+    async def aassess_document(
+        self, document: DocumentSource, topic: str, requirements: str
+    ) -> Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]:
+        """Asynchronously assess the relevance and the quality of a single document with one LLM call."""
+        try:
+            messages = self._format_assessment_messages(document, topic, requirements)
+
+            # Get assessment from LLM
+            async with _limit_llm_call(messages):
+                output = await self.assessment_llm.ainvoke(messages)
+            return _create_assessment(document, output.model_dump())
+
+        except Exception as e:
+            logger.error(
+                f"Error assessing document {document.title}: {e}", exc_info=True
+            )
+            return _default_document_assessment(document, e)
+
+    def _format_assessment_messages(
+        self, document: DocumentSource, topic: str, requirements: str
+    ) -> List[BaseMessage]:
+        """Format the messages of the single document assessment."""
+        return self.assessment_prompt.format_messages(
+            topic=topic,
+            requirements=requirements,
+            title=document.title,
+            content=_truncate_content(document),
+            source_type=document.source_type.value,
+            url=document.url or "N/A",
+        )
+
+    def assess_documents(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Assess the relevance and the quality of the documents in batches, one LLM call per batch."""
+        # The duplicated documents are assessed once
+        all_documents = documents
+        documents, aliases = _deduplicate_documents(all_documents)
+
+        # Reuse the assessments of the near-identical documents assessed before
+        assessments, embeddings = _lookup_cached_assessments(
+            documents, topic, requirements
+        )
+        missing = [i for i, assessment in enumerate(assessments) if assessment is None]
+        missing = _prefilter_documents(
+            documents, missing, assessments, topic, requirements
+        )
+        if missing:
+            missing_assessments = self._assess_uncached_documents(
+                [documents[i] for i in missing], topic, requirements
+            )
+            _cache_assessments(embeddings, missing, missing_assessments)
+            for i, assessment in zip(missing, missing_assessments):
+                assessments[i] = assessment
+        return _expand_assessments(all_documents, assessments, aliases)  # type: ignore
+
+    async def aassess_documents(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Asynchronously assess the relevance and the quality of the documents, the batches are assessed concurrently."""
+        # The duplicated documents are assessed once
+        all_documents = documents
+        documents, aliases = _deduplicate_documents(all_documents)
+
+        # Reuse the assessments of the near-identical documents assessed before
+        assessments, embeddings = await asyncio.to_thread(
+            _lookup_cached_assessments, documents, topic, requirements
+        )
+        missing = [i for i, assessment in enumerate(assessments) if assessment is None]
+        missing = await asyncio.to_thread(
+            _prefilter_documents, documents, missing, assessments, topic, requirements
+        )
+        if missing:
+            missing_assessments = await self._aassess_uncached_documents(
+                [documents[i] for i in missing], topic, requirements
+            )
+            await asyncio.to_thread(
+                _cache_assessments, embeddings, missing, missing_assessments
+            )
+            for i, assessment in zip(missing, missing_assessments):
+                assessments[i] = assessment
+        return _expand_assessments(all_documents, assessments, aliases)  # type: ignore
+
+    def _assess_uncached_documents(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Assess the relevance and the quality of the documents with the LLM in batches."""
+        # The LLM calls are I/O bound, so they are made concurrently from the threads,
+        # the results are kept in the order of documents
+        batch_size = config.RELEVANCE_BATCH_SIZE
+        with ThreadPoolExecutor(
+            max_workers=config.MAX_CONCURRENT_LLM_CALLS
+        ) as executor:
+            if batch_size <= 1:
+                return list(
+                    executor.map(
+                        lambda document: self.assess_document(
+                            document, topic, requirements
+                        ),
+                        documents,
+                    )
+                )
+
+            batches = executor.map(
+                lambda start: self._assess_batch(
+                    documents[start : start + batch_size], topic, requirements
+                ),
+                range(0, len(documents), batch_size),
+            )
+            return [assessment for batch in batches for assessment in batch]
+
+    async def _aassess_uncached_documents(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Asynchronously assess the relevance and the quality of the documents with the LLM, the batches are assessed concurrently."""
+        batch_size = config.RELEVANCE_BATCH_SIZE
+        if batch_size <= 1:
+            return await _gather_with_progress(
+                [
+                    self.aassess_document(document, topic, requirements)
+                    for document in documents
+                ],
+                "documents",
+            )
+
+        batches = await _gather_with_progress(
+            [
+                self._aassess_batch(
+                    documents[start : start + batch_size], topic, requirements
+                )
+                for start in range(0, len(documents), batch_size)
+            ],
+            "batches of documents",
+        )
+        return [assessment for batch in batches for assessment in batch]
+
+    def assess_documents_relevance(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[DocumentRelevanceAssessment]:
+        """Assess the relevance of the documents in batches, one LLM call per batch."""
+        return [
+            relevance
+            for relevance, _ in self.assess_documents(documents, topic, requirements)
+        ]
+
+    def _assess_batch(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Assess the relevance and the quality of a batch of documents with a single LLM call."""
+        assessments_data: Dict[int, Dict] = {}
+        try:
+            messages = self._format_batch_messages(documents, topic, requirements)
+
+            # Get assessments from LLM
+            output = self.batch_assessment_llm.invoke(messages)
+            assessments_data = _index_batch_output(output)
+
+        except Exception as e:
+            logger.error(
+                f"Error assessing batch of {len(documents)} documents: {e}",
+                exc_info=True,
+            )
+
+        assessments = []
+        for number, document in enumerate(documents, 1):
+            assessment_data = assessments_data.get(number)
+            if assessment_data is not None:
+                assessments.append(_create_assessment(document, assessment_data))
+            else:
+                # Assess the documents missing from the batch response one by one
+                assessments.append(self.assess_document(document, topic, requirements))
+        return assessments
+
+    async def _aassess_batch(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+        """Asynchronously assess the relevance and the quality of a batch of documents with a single LLM call."""
+        assessments_data: Dict[int, Dict] = {}
+        try:
+            messages = self._format_batch_messages(documents, topic, requirements)
+
+            # Get assessments from LLM
+            async with _limit_llm_call(messages):
+                output = await self.batch_assessment_llm.ainvoke(messages)
+            assessments_data = _index_batch_output(output)
+
+        except Exception as e:
+            logger.error(
+                f"Error assessing batch of {len(documents)} documents: {e}",
+                exc_info=True,
+            )
+
+        # Assess the documents missing from the batch response concurrently
+        missing = [
+            number
+            for number in range(1, len(documents) + 1)
+            if number not in assessments_data
+        ]
+        missing_assessments = dict(
+            zip(
+                missing,
+                await asyncio.gather(
+                    *(
+                        self.aassess_document(
+                            documents[number - 1], topic, requirements
+                        )
+                        for number in missing
+                    )
+                ),
+            )
+        )
+
+        return [
+            (
+                missing_assessments[number]
+                if number in missing_assessments
+                else _create_assessment(document, assessments_data[number])
+            )
+            for number, document in enumerate(documents, 1)
+        ]
+
+    def _format_batch_messages(
+        self, documents: List[DocumentSource], topic: str, requirements: str
+    ) -> List[BaseMessage]:
+        """Format the messages of the batch assessment."""
+        return self.batch_assessment_prompt.format_messages(
+            topic=topic,
+            requirements=requirements,
+            documents=_format_documents(documents),
+        )
+
     def assess_document_quality(
         self, document: DocumentSource
     ) -> DocumentQualityAssessment:
@@ -158,45 +457,14 @@ class AnalystAgent:
             # Prepare the prompt
             messages = self.quality_prompt.format_messages(
                 title=document.title,
-                content=document.content[:2000],  # Limit content length
+                content=_truncate_content(document),
                 source_type=document.source_type.value,
                 url=document.url or "N/A",
             )
 
             # Get assessment from LLM
-            response = self.llm.invoke(messages)
-            # Handle both string and list response formats
-            content = (
-                response.content
-                if isinstance(response.content, str)
-                else str(response.content)
-            )
-            # Parse JSON response
-            try:
-                quality_data = parse_llm_response(content)
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing JSON response: '{content}'", exc_info=True)
-                # Fallback if JSON parsing fails
-                quality_data = {
-                    "credibility_score": 0.5,
-                    "information_quality": 0.5,
-                    "currency_score": 0.5,
-                    "overall_quality": "medium",
-                    "biases_limitations": ["Unable to assess"],
-                    "recommendation": "include",
-                }
-
-            return DocumentQualityAssessment(
-                document_id=document.id or "",
-                credibility_score=quality_data.get("credibility_score", 0.5),
-                information_quality=quality_data.get("information_quality", 0.5),
-                currency_score=quality_data.get("currency_score", 0.5),
-                overall_quality=quality_data.get("overall_quality", "medium"),
-                biases_limitations=quality_data.get(
-                    "biases_limitations", ["Unable to assess"]
-                ),
-                recommendation=quality_data.get("recommendation", "include"),
-            )
+            output = self.quality_llm.invoke(messages)
+            return _create_quality_assessment(document, output.model_dump())
 
         except Exception as e:
             logger.error(
@@ -221,33 +489,26 @@ class AnalystAgent:
         threshold: float,
     ) -> tuple[List[DocumentSource], List[DocumentRelevanceAssessment]]:
         """Filter documents based on a relevance threshold."""
-        relevant_documents = []
-        assessments = []
-
-        for i, document in enumerate(documents):
-            assessment = self.assess_document_relevance(document, topic, requirements)
-            assessments.append(assessment)
-
-            if assessment.relevance_score >= threshold:
-                relevant_documents.append(document)
-                logger.info(
-                    f"Document #{i + 1}: '{document.title}' -> Relevance: {assessment.relevance_score:.2f}"
-                )
-            else:
-                logger.info(
-                    f"Document #{i + 1}: '{document.title}' -> Relevance: {assessment.relevance_score:.2f} (below threshold)"
-                )
-
-        return relevant_documents, assessments
+        assessments = self.assess_documents_relevance(documents, topic, requirements)
+        relevant = _select_relevant(documents, assessments, threshold)
+        return [documents[i] for i in relevant], assessments
 
     def rank_documents_by_quality(
-        self, documents: List[DocumentSource]
+        self,
+        documents: List[DocumentSource],
+        qualities: Optional[List[DocumentQualityAssessment]] = None,
+        limit: Optional[int] = None,
     ) -> List[DocumentSource]:
-        """Rank documents by quality assessment."""
+        """Rank documents by quality assessment, assessing the quality unless it is given.
+        Only the top limit documents are returned if the limit is given."""
         document_qualities = []
 
         for i, document in enumerate(documents):
-            quality = self.assess_document_quality(document)
+            quality = (
+                qualities[i]
+                if qualities is not None
+                else self.assess_document_quality(document)
+            )
             document_qualities.append((document, quality))
 
             logger.info(f"Document #{i + 1}: '{document.title}' - Quality: {quality}")
@@ -260,9 +521,15 @@ class AnalystAgent:
                 + quality_assessment.currency_score
             ) / 3
 
-        sorted_documents = sorted(
-            document_qualities, key=lambda x: quality_score(x[1]), reverse=True
-        )
+        if limit is not None and limit < len(document_qualities):
+            # select the top documents without sorting all of them, in the same order
+            sorted_documents = heapq.nlargest(
+                limit, document_qualities, key=lambda x: quality_score(x[1])
+            )
+        else:
+            sorted_documents = sorted(
+                document_qualities, key=lambda x: quality_score(x[1]), reverse=True
+            )
 
         return [doc for doc, _ in sorted_documents]
 
@@ -280,40 +547,38 @@ class AnalystAgent:
             logger.info(
                 f"Analyst Agent: Assessing relevance of {len(state.documents)} documents..."
             )
-            relevant_docs, assessments = self.filter_documents_by_relevance(
-                state.documents,
-                state.task.topic,
-                state.task.requirements,
-                threshold=config.RELEVANCE_THRESHOLD,
+            # The quality is assessed in the same LLM calls as the relevance
+            document_assessments = self.assess_documents(
+                state.documents, state.task.topic, state.task.requirements
             )
+            self._complete_analysis(state, document_assessments)
 
-            # Rank documents by quality
-            logger.info(
-                f"Analyst Agent: Ranking {len(relevant_docs)} relevant documents by quality..."
-            )
-            ranked_docs = self.rank_documents_by_quality(relevant_docs)
-
-            # Update state with filtered and ranked documents
-            state.documents = ranked_docs[
-                : state.task.max_relevant_sources
-            ]  # Limit to max sources
-
-            # Generate data summary
-            summary = _generate_data_summary(state.documents, state.task.topic)
-            state.analysis_results = AnalysisResults(
-                data_summary=summary,
-                relevance_assessments=assessments,
-                filtered_documents=[doc.id for doc in state.documents],
-                quality_metrics={
-                    "total_assessed": len(assessments),
-                    "relevant_found": len(state.documents),
-                },
-            )
+        except Exception as e:
+            error_msg = f"Analyst Agent error: {str(e)}"
+            state.errors.append(error_msg)
+            logger.error(error_msg)
+
+        return state
+
+    async def arun(self, state: AgentState) -> AgentState:
+        """Asynchronous execution method for the analyst agent."""
+        try:
+            state.current_step = ResearchStep.ANALYZING_DATA
 
-            state.current_step = ResearchStep.ANALYSIS_COMPLETED
+            if not state.documents:
+                logger.info("Analyst Agent: No documents to analyze")
+                state.current_step = ResearchStep.ANALYSIS_COMPLETED
+                return state
+
+            # Assess relevance of all documents
             logger.info(
-                f"Analyst Agent: Analysis completed. {len(state.documents)} high-quality documents selected."
+                f"Analyst Agent: Assessing relevance of {len(state.documents)} documents..."
+            )
+            # The quality is assessed in the same LLM calls as the relevance
+            document_assessments = await self.aassess_documents(
+                state.documents, state.task.topic, state.task.requirements
             )
+            self._complete_analysis(state, document_assessments)
 
         except Exception as e:
             error_msg = f"Analyst Agent error: {str(e)}"
@@ -322,6 +587,345 @@ class AnalystAgent:
 
         return state
 
+    def _complete_analysis(
+        self,
+        state: AgentState,
+        document_assessments: List[
+            Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]
+        ],
+    ):
+        """Filter and rank the documents of the state by their assessments and summarize the analysis."""
+        assessments = [relevance for relevance, _ in document_assessments]
+        relevant = _select_relevant(
+            state.documents, assessments, threshold=config.RELEVANCE_THRESHOLD
+        )
+
+        # Rank documents by quality
+        logger.info(
+            f"Analyst Agent: Ranking {len(relevant)} relevant documents by quality..."
+        )
+        ranked_docs = self.rank_documents_by_quality(
+            [state.documents[i] for i in relevant],
+            [document_assessments[i][1] for i in relevant],
+            limit=state.task.max_relevant_sources,  # Limit to max sources
+        )
+
+        # Update state with filtered and ranked documents
+        state.documents = ranked_docs
+
+        # Generate data summary
+        summary = _generate_data_summary(state.documents, state.task.topic)
+        state.analysis_results = AnalysisResults(
+            data_summary=summary,
+            relevance_assessments=assessments,
+            filtered_documents=[doc.id for doc in state.documents],
+            quality_metrics={
+                "total_assessed": len(assessments),
+                "relevant_found": len(state.documents),
+            },
+        )
+
+        state.current_step = ResearchStep.ANALYSIS_COMPLETED
+        logger.info(
+            f"Analyst Agent: Analysis completed. {len(state.documents)} high-quality documents selected."
+        )
+
+
+def _create_llm(model: str, semantic_cache: bool = True) -> Any:
+    """
+    Create the chat model of the analyst, wrapped with the enabled LLM caches. The
+    semantic cache is only suitable for the prompts assessing a single document.
+    """
+    llm = get_chat(model, config.TEMPERATURE)
+    if semantic_cache and config.ENABLE_SEMANTIC_LLM_CACHE:
+        # reruns over the same documents repeat the assessments of the near-identical prompts
+        llm = SemanticCachedLLM(
+            llm,
+            embedding_model=get_embeddings("text-embedding-3-small", dimensions=512),
+            cache_path=config.LLM_CACHE_PATH,
+            threshold=config.SEMANTIC_LLM_CACHE_THRESHOLD,
+            ttl_secs=config.LLM_CACHE_TTL_SECS,
+        )
+    if config.ENABLE_LLM_CACHE:
+        # the identical prompts of the reruns are answered before the semantic lookup
+        llm = CachedLLM(
+            llm,
+            cache_path=config.LLM_CACHE_PATH,
+            ttl_secs=config.LLM_CACHE_TTL_SECS,
+        )
+    return llm
+
+
+def _select_relevant(
+    documents: List[DocumentSource],
+    assessments: List[DocumentRelevanceAssessment],
+    threshold: float,
+) -> List[int]:
+    """Set the relevance scores of the documents and select the indices of the relevant ones."""
+    relevant = []
+    for i, (document, assessment) in enumerate(zip(documents, assessments)):
+        document.relevance_score = assessment.relevance_score
+
+        if assessment.relevance_score >= threshold:
+            relevant.append(i)
+            logger.info(
+                f"Document #{i + 1}: '{document.title}' -> Relevance: {assessment.relevance_score:.2f}"
+            )
+        else:
+            logger.info(
+                f"Document #{i + 1}: '{document.title}' -> Relevance: {assessment.relevance_score:.2f} (below threshold)"
+            )
+
+    return relevant
+
+
+def _format_documents(documents: List[DocumentSource]) -> str:
+    """Format the numbered documents of the batch for the assessment prompt."""
+    return "\n\n".join(
+        f"Document {number}:\n"
+        f"Document Title: {document.title}\n"
+        f"Document Content: {_truncate_content(document)}\n"
+        f"Document Source: {document.source_type.value}\n"
+        f"Document URL: {document.url or 'N/A'}"
+        for number, document in enumerate(documents, 1)
+    )
+
+
+def _truncate_content(document: DocumentSource) -> str:
+    """Truncate the document content to the token budget of the assessment prompts."""
+    return truncate_tokens(
+        document.content, config.MAX_ASSESSMENT_TOKENS, config.OPENAI_MODEL
+    )
+
+
+def _deduplicate_documents(
+    documents: List[DocumentSource],
+) -> Tuple[List[DocumentSource], List[int]]:
+    """
+    Keep the first of the documents with the same content, ignoring the case and the
+    whitespace. Returns the unique documents and the index of the unique document of
+    each document.
+    """
+    # the chunks of a web page share its URL, so the documents are told apart by content
+    unique_indices: Dict[bytes, int] = {}
+    unique_documents: List[DocumentSource] = []
+    aliases = []
+    for document in documents:
+        key = hashlib.blake2b(
+            " ".join(document.content.lower().split()).encode("utf-8")
+        ).digest()
+        index = unique_indices.setdefault(key, len(unique_documents))
+        if index == len(unique_documents):
+            unique_documents.append(document)
+        aliases.append(index)
+
+    if len(unique_documents) < len(documents):
+        logger.info(
+            f"Assessing {len(unique_documents)} unique of {len(documents)} documents"
+        )
+    return unique_documents, aliases
+
+
+def _expand_assessments(
+    documents: List[DocumentSource],
+    assessments: List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]],
+    aliases: List[int],
+) -> List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]:
+    """Copy the assessments of the unique documents to their duplicates."""
+    expanded = []
+    for document, index in zip(documents, aliases):
+        relevance, quality = assessments[index]
+        if relevance.document_id != document.id:
+            relevance = relevance.model_copy(update={"document_id": document.id})
+            quality = quality.model_copy(update={"document_id": document.id or ""})
+        expanded.append((relevance, quality))
+    return expanded
+
+
+def _prefilter_documents(
+    documents: List[DocumentSource],
+    indices: List[int],
+    assessments: List[
+        Optional[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]
+    ],
+    topic: str,
+    requirements: str,
+) -> List[int]:
+    """
+    Reject the documents at the indices whose embedding is dissimilar to the research
+    task without calling the LLM, their relevance score is the cosine similarity.
+    Returns the indices of the documents left for the LLM assessment.
+    """
+    if not config.ENABLE_EMBEDDING_PREFILTER or not indices:
+        return indices
+
+    try:
+        # the research task and the documents are embedded with a single request
+        embedding_model = get_embeddings("text-embedding-3-small", dimensions=512)
+        embeddings = np.asarray(
+            embedding_model.embed_documents(
+                [f"{topic}\n{requirements}"]
+                + [_truncate_content(documents[i]) for i in indices]
+            ),
+            dtype=np.float32,
+        )
+    except Exception as e:
+        logger.warning(f"Embedding pre-filter failed: {e}")
+        return indices
+
+    norms = np.linalg.norm(embeddings, axis=1)
+    norms[norms == 0] = 1.0
+    embeddings /= norms[:, np.newaxis]
+    similarities = embeddings[1:] @ embeddings[0]
+
+    remaining = []
+    for i, similarity in zip(indices, similarities.tolist()):
+        if similarity >= config.EMBEDDING_PREFILTER_THRESHOLD:
+            remaining.append(i)
+            continue
+        assessments[i] = (
+            DocumentRelevanceAssessment(
+                document_id=documents[i].id,
+                relevance_score=max(similarity, 0.0),
+                reasoning="Rejected by the embedding similarity to the research topic",
+                key_points=[],
+                confidence=0.5,
+            ),
+            _create_quality_assessment(documents[i], {}),
+        )
+
+    if len(remaining) < len(indices):
+        logger.info(
+            f"Embedding pre-filter rejected {len(indices) - len(remaining)} documents"
+        )
+    return remaining
+
+
+def _lookup_cached_assessments(
+    documents: List[DocumentSource], topic: str, requirements: str
+) -> Tuple[
+    List[Optional[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]]],
+    Any,
+]:
+    """Look up the cached assessments of the documents, returning them with the document embeddings."""
+    if not config.ENABLE_SEMANTIC_ASSESSMENT_CACHE or not documents:
+        return [None] * len(documents), None
+
+    try:
+        cache = get_assessment_cache()
+        embeddings = cache.embed(documents, topic, requirements)
+        assessments_data = cache.lookup(embeddings)
+    except Exception as e:
+        logger.warning(f"Assessment cache lookup failed: {e}")
+        return [None] * len(documents), None
+
+    hits = sum(assessment_data is not None for assessment_data in assessments_data)
+    if hits:
+        logger.info(f"Reusing the cached assessments of {hits} documents")
+    return [
+        None
+        if assessment_data is None
+        else _create_assessment(document, assessment_data)
+        for document, assessment_data in zip(documents, assessments_data)
+    ], embeddings
+
+
+def _cache_assessments(
+    embeddings: Any,
+    indices: List[int],
+    assessments: List[Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]],
+):
+    """Store the assessments of the documents at the indices for reuse by the similar documents."""
+    if embeddings is None:
+        return
+
+    # the fallback assessments of the failed LLM calls are not worth reusing
+    assessed = [
+        (i, relevance, quality)
+        for i, (relevance, quality) in zip(indices, assessments)
+        if not relevance.reasoning.startswith("Error during assessment")
+    ]
+    if not assessed:
+        return
+
+    try:
+        get_assessment_cache().store(
+            embeddings[[i for i, _, _ in assessed]],
+            [
+                {
+                    **relevance.model_dump(exclude={"document_id"}),
+                    **quality.model_dump(exclude={"document_id"}),
+                }
+                for _, relevance, quality in assessed
+            ],
+        )
+    except Exception as e:
+        logger.warning(f"Failed to store assessments in cache: {e}")
+
+
+def _default_document_assessment(
+    document: DocumentSource, error: Exception
+) -> Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]:
+    """Create the default assessments of the document that failed to be assessed."""
+    return (
+        DocumentRelevanceAssessment(
+            document_id=document.id,
+            relevance_score=0.5,
+            reasoning=f"Error during assessment: {str(error)}",
+            key_points=[],
+            confidence=0.0,
+        ),
+        _create_quality_assessment(
+            document, {"biases_limitations": [f"Error during assessment: {str(error)}"]}
+        ),
+    )
+
+
+def _index_batch_output(output: DocumentAssessmentBatchOutput) -> Dict[int, Dict]:
+    """Index the assessments data of the batch output by the document number."""
+    return {
+        assessment.document_number: assessment.model_dump()
+        for assessment in output.assessments
+    }
+
+
+def _create_assessment(
+    document: DocumentSource, assessment_data: Dict
+) -> Tuple[DocumentRelevanceAssessment, DocumentQualityAssessment]:
+    """Create the relevance and the quality assessments of the document from the LLM response data."""
+    return (
+        _create_relevance_assessment(document, assessment_data),
+        _create_quality_assessment(document, assessment_data),
+    )
+
+
+def _create_relevance_assessment(
+    document: DocumentSource, assessment_data: Dict
+) -> DocumentRelevanceAssessment:
+    """Create the relevance assessment of the document from the LLM response data."""
+    return DocumentRelevanceAssessment(
+        document_id=document.id,
+        relevance_score=assessment_data.get("relevance_score", 0.5),
+        reasoning=assessment_data.get("reasoning", "No reasoning provided"),
+        key_points=assessment_data.get("key_points", []),
+        confidence=assessment_data.get("confidence", 0.5),
+    )
+
+
+def _create_quality_assessment(
+    document: DocumentSource, quality_data: Dict
+) -> DocumentQualityAssessment:
+    """Create the quality assessment of the document from the LLM response data."""
+    return DocumentQualityAssessment(
+        document_id=document.id or "",
+        credibility_score=quality_data.get("credibility_score", 0.5),
+        information_quality=quality_data.get("information_quality", 0.5),
+        currency_score=quality_data.get("currency_score", 0.5),
+        overall_quality=quality_data.get("overall_quality", "medium"),
+        biases_limitations=quality_data.get("biases_limitations", ["Unable to assess"]),
+        recommendation=quality_data.get("recommendation", "include"),
+    )
+
 
 def _generate_data_summary(
     documents: List[DocumentSource], topic: str
@@ -338,10 +942,7 @@ def _generate_data_summary(
         )
 
     # Count documents by source type
-    source_counts: Dict[str, int] = {}
-    for doc in documents:
-        source_type = doc.source_type.value
-        source_counts[source_type] = source_counts.get(source_type, 0) + 1
+    source_counts = dict(Counter(doc.source_type.value for doc in documents))
 
     # Calculate average content length
     total_length = sum(len(doc.content) for doc in documents)
@@ -363,3 +964,34 @@ def _generate_data_summary(
         research_topic=topic,
         data_coverage=coverage,
     )
+
+
+async def _gather_with_progress(
+    coroutines: List[Coroutine[Any, Any, Any]], label: str
+) -> List[Any]:
+    """Run the coroutines concurrently and log the progress as each one completes,
+    returning their results in the order of the coroutines."""
+
+    async def indexed(
+        index: int, coroutine: Coroutine[Any, Any, Any]
+    ) -> Tuple[int, Any]:
+        return index, await coroutine
+
+    results: List[Any] = [None] * len(coroutines)
+    for completed, future in enumerate(
+        asyncio.as_completed(
+            [indexed(index, coroutine) for index, coroutine in enumerate(coroutines)]
+        ),
+        1,
+    ):
+        index, result = await future
+        results[index] = result
+        logger.info(f"Analyst Agent: Assessed {completed}/{len(coroutines)} {label}")
+    return results
+
+
+def _limit_llm_call(messages: List[BaseMessage]):
+    """Limit the concurrency and the input tokens per minute of the LLM call."""
+    return limit_llm_call(
+        messages, config.MAX_CONCURRENT_LLM_CALLS, config.LLM_TOKENS_PER_MINUTE
+    )
@@ -1,12 +1,25 @@
-import json
+import asyncio
+import io
 import uuid
 import logging
-from typing import List
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from pydantic import SecretStr
-
-from ..llm_utils import parse_llm_response
+import re
+import string
+from contextlib import aclosing
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Optional
+import ahocorasick
+import orjson
+import tiktoken
+from langchain_core.messages import AIMessage, BaseMessage, convert_to_openai_messages
+from langchain_core.prompts import ChatPromptTemplate
+
+from ..llm_cache import CachedLLM
+from ..llm_utils import (
+    get_encoding,
+    parse_llm_response,
+    create_prompt_template,
+    limit_llm_call,
+)
 from ..models import (
     DocumentSource,
     EssayOutline,
@@ -16,57 +29,102 @@ from ..models import (
     ResearchStep,
 )
 from ..config import config
+from ..llm_factory import get_chat
+from ..gen_cache import GenCacheHit, get_gen_cache, get_template_id
+from ..outline_cache import get_outline_cache
+from ..vector_store import embed_task_query
 
 logger = logging.getLogger(__name__)
 
+# The pattern of a word used to count the words of an essay
+_WORD_RE = re.compile(r"\S+")
+# The end of a sentence, including the closing quotes and brackets
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*(?=\s|$)")
+
+# The endpoint of the essay generation requests sent with the Batch API
+_BATCH_ENDPOINT = "/v1/chat/completions"
+# The statuses of the batches which have not finished yet
+_BATCH_RUNNING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+
+# The system prompt and the research data message shared by the essay and the
+# combined prompts, so that both calls for the same research task send the same
+# prompt prefix and the research data is served from the provider's prompt cache.
+_WRITER_SYSTEM_PROMPT = """
+        You are an expert academic writer. You write academic essays based on the research data provided by the user.
+        """
+_RESEARCH_DATA_PROMPT = """
+        ***Available Research Data:***
+        {research_data}
+        """
+
 
 class EssayWriterAgent:
     """Agent responsible for writing essays using collected research data."""
 
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model=config.OPENAI_MODEL,
-            temperature=config.TEMPERATURE,
-            api_key=SecretStr(config.OPENAI_API_KEY),
-        )
-
-        self.outline_prompt = ChatPromptTemplate.from_template(
-            """
-        You are an expert academic writer. Create a detailed essay outline based on the research topic and collected data.
-        
-        Research Topic: {topic}
-        Research Requirements: {requirements}
-        Essay Length: {essay_length}
-        
-        Available Sources:
-        {sources_summary}
+    @cached_property
+    def llm(self) -> Any:
+        """Chat model, created on first use."""
+        llm = get_chat(config.OPENAI_MODEL, config.TEMPERATURE)
+        if config.ENABLE_LLM_CACHE:
+            return CachedLLM(
+                llm,
+                cache_path=config.LLM_CACHE_PATH,
+                ttl_secs=config.LLM_CACHE_TTL_SECS,
+            )
+        return llm
+
+    @cached_property
+    def batch_client(self) -> Any:
+        """OpenAI client of the Batch API, shared with the chat model."""
+        return get_chat(config.OPENAI_MODEL, config.TEMPERATURE).root_client
+
+    @cached_property
+    def outline_llm(self) -> Any:
+        """Chat model returning the essay outline as structured output."""
+        return self.llm.with_structured_output(EssayOutline)
+
+    @cached_property
+    def outline_prompt(self) -> ChatPromptTemplate:
+        """Prompt to create an essay outline."""
+        return create_prompt_template(
+            system_prompt="""
+        You are an expert academic writer. Create a detailed essay outline based on the research topic and collected data provided by the user.
         
         ***Create a comprehensive essay outline with:***
         1. A compelling title
         2. An engaging introduction that sets up the topic
         3. 3-5 main points that address the research requirements
         4. A strong conclusion that synthesizes the findings
+        5. The titles of the available sources the essay draws on
+        """,
+            user_prompt="""
+        Research Topic: {topic}
+        Research Requirements: {requirements}
+        Essay Length: {essay_length}
         
-        ***Respond with JSON:***
-        {{
-            "title": "Essay Title",
-            "introduction": "Introduction text...",
-            "main_points": [
-                "Main point 1: Description",
-                "Main point 2: Description",
-                "Main point 3: Description"
-            ],
-            "conclusion": "Conclusion text...",
-            "sources": ["Source 1", "Source 2", "Source 3"]
-        }}
-        
-        You should only return the JSON response and nothing else. Do not include any additional text or formatting.
-        """
+        Available Sources:
+        {sources_summary}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
         )
 
-        self.essay_prompt = ChatPromptTemplate.from_template(
-            """
-        You are an expert academic writer. Write a comprehensive essay based on the provided outline and research data.
+    @cached_property
+    def essay_prompt(self) -> ChatPromptTemplate:
+        """Prompt to write an essay following the outline."""
+        return create_prompt_template(
+            system_prompt=_WRITER_SYSTEM_PROMPT,
+            context_prompt=_RESEARCH_DATA_PROMPT,
+            user_prompt="""
+        Write a comprehensive essay based on the essay outline and the research data above.
+        
+        ***Instructions:***
+        1. Write a well-structured academic essay
+        2. Use the provided research data to support your arguments
+        3. Include proper citations and references
+        4. Ensure the essay meets the specified length requirements
+        5. Maintain academic tone and style
+        6. Synthesize information from multiple sources
         
         Essay Outline:
         Title: {title}
@@ -78,10 +136,28 @@ class EssayWriterAgent:
         Research Requirements: {requirements}
         Essay Length: {essay_length}
         
-        ***Available Research Data:***
-        {research_data}
+        ***Write the complete essay.***
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
+        )
+
+    @cached_property
+    def combined_prompt(self) -> ChatPromptTemplate:
+        """Prompt to create an outline and write an essay with one call."""
+        return create_prompt_template(
+            system_prompt=_WRITER_SYSTEM_PROMPT,
+            context_prompt=_RESEARCH_DATA_PROMPT,
+            user_prompt="""
+        Create a detailed essay outline and write the complete essay based on the research topic and the research data above.
         
-        ***Instructions:***
+        ***Create a comprehensive essay outline with:***
+        1. A compelling title
+        2. An engaging introduction that sets up the topic
+        3. 3-5 main points that address the research requirements
+        4. A strong conclusion that synthesizes the findings
+        
+        ***Write the essay following the outline:***
         1. Write a well-structured academic essay
         2. Use the provided research data to support your arguments
         3. Include proper citations and references
@@ -89,123 +165,152 @@ class EssayWriterAgent:
         5. Maintain academic tone and style
         6. Synthesize information from multiple sources
         
-        ***Write the complete essay:***
-        """
+        Research Topic: {topic}
+        Research Requirements: {requirements}
+        Essay Length: {essay_length}
+        
+        ***Respond with JSON:***
+        {{
+            "outline": {{
+                "title": "Essay Title",
+                "introduction": "Introduction text...",
+                "main_points": [
+                    "Main point 1: Description",
+                    "Main point 2: Description",
+                    "Main point 3: Description"
+                ],
+                "conclusion": "Conclusion text...",
+                "sources": ["Source 1", "Source 2", "Source 3"]
+            }},
+            "essay": "The complete essay text..."
+        }}
+        
+        You should only return the JSON response and nothing else. Do not include any additional text or formatting.
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
         )
 
+    @cached_property
+    def rewrite_prompt(self) -> ChatPromptTemplate:
+        """Prompt to rewrite the sections of a cached essay for a similar research task."""
+        return create_prompt_template(
+            system_prompt="""
+        You are an expert academic writer. Adapt the essay sections provided by the user, taken from an essay on a similar topic, to the new research task.
+        
+        ***Instructions:***
+        1. Rewrite every section so that it addresses the research topic and requirements
+        2. Keep the structure, length, tone and citations of each section
+        3. Return the sections in the same order
+        
+        ***Respond with JSON:***
+        {
+            "sections": ["Rewritten section 1", "Rewritten section 2"]
+        }
+        
+        You should only return the JSON response and nothing else. Do not include any additional text or formatting.
+        """,
+            user_prompt="""
+        Research Topic: {topic}
+        Research Requirements: {requirements}
+        
+        Essay Sections:
+        {sections}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
+        )
+
+    @cached_property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer encoding of the model used to budget the research data."""
+        return get_encoding(config.OPENAI_MODEL)
+
     def create_essay_outline(self, state: AgentState) -> EssayOutline:
         """Create an essay outline based on the research topic and collected data."""
+        # Reuse the outline of a similar research task if available
+        cached_outline = _lookup_cached_outline(state)
+        if cached_outline is not None:
+            return cached_outline
+
         try:
-            # Prepare source summary
-            sources_summary = []
-            for i, doc in enumerate(
-                state.documents[: state.task.max_relevant_sources], 1
-            ):
-                source_info = f"{i}. {doc.title} ({doc.source_type.value})"
-                if doc.url:
-                    source_info += f" - {doc.url}"
-                sources_summary.append(source_info)
-
-            sources_text = "\n".join(sources_summary)
-
-            # Prepare the prompt
-            messages = self.outline_prompt.format_messages(
-                topic=state.task.topic,
-                requirements=state.task.requirements,
-                essay_length=state.task.essay_length,
-                sources_summary=sources_text,
-            )
+            # Get outline from LLM
+            outline = self.outline_llm.invoke(self._create_outline_messages(state))
+            _cache_outline(state, outline)
+
+            return outline
 
+        except Exception as e:
+            logger.error(f"Error creating essay outline: {e}", exc_info=True)
+            # Return basic outline
+            return _create_basic_outline(state)
+
+    async def acreate_essay_outline(self, state: AgentState) -> EssayOutline:
+        """Asynchronously create an essay outline based on the research topic and collected data."""
+        # Reuse the outline of a similar research task if available
+        cached_outline = await asyncio.to_thread(_lookup_cached_outline, state)
+        if cached_outline is not None:
+            return cached_outline
+
+        try:
             # Get outline from LLM
-            response = self.llm.invoke(messages)
-            # Handle both string and list response formats
-            content = (
-                response.content
-                if isinstance(response.content, str)
-                else str(response.content)
-            )
-            # Parse JSON response
-            try:
-                outline_data = parse_llm_response(content)
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing JSON response: '{content}'", exc_info=True)
-                # Fallback outline if JSON parsing fails
-                outline_data = {
-                    "title": f"Research on {state.task.topic}",
-                    "introduction": f"This essay explores {state.task.topic} based on comprehensive research.",
-                    "main_points": [
-                        f"Overview of {state.task.topic}",
-                        "Key findings and analysis",
-                        "Implications and conclusions",
-                    ],
-                    "conclusion": f"Summary of findings on {state.task.topic}",
-                    "sources": [doc.title for doc in state.documents[:5]],
-                }
-
-            # Create an outline object
-            outline = EssayOutline(
-                title=outline_data.get("title", f"Research on {state.task.topic}"),
-                introduction=outline_data.get("introduction", ""),
-                main_points=outline_data.get("main_points", []),
-                conclusion=outline_data.get("conclusion", ""),
-                sources=outline_data.get("sources", []),
-            )
+            messages = self._create_outline_messages(state)
+            async with _limit_llm_call(messages):
+                outline = await self.outline_llm.ainvoke(messages)
+            await asyncio.to_thread(_cache_outline, state, outline)
 
             return outline
 
         except Exception as e:
             logger.error(f"Error creating essay outline: {e}", exc_info=True)
             # Return basic outline
-            return EssayOutline(
-                title=f"Research on {state.task.topic}",
-                introduction=f"This essay explores {state.task.topic} based on comprehensive research.",
-                main_points=[
-                    f"Overview of {state.task.topic}",
-                    "Key findings and analysis",
-                    "Implications and conclusions",
-                ],
-                conclusion=f"Summary of findings on {state.task.topic}",
-                sources=[doc.title for doc in state.documents[:5]],
-            )
+            return _create_basic_outline(state)
 
     def write_essay(self, state: AgentState, outline: EssayOutline) -> Essay:
         """Write the complete essay based on the outline and research data."""
+        # Synthesize the essay from the essay of a similar research task if available
+        cached_content = self._synthesize_cached_essay(state)
+        if cached_content is not None:
+            return _create_essay(cached_content, state, outline)
+
         try:
-            # Prepare research data
-            research_data = _prepare_research_data(state.documents)
-
-            # Prepare the prompt
-            messages = self.essay_prompt.format_messages(
-                title=outline.title,
-                introduction=outline.introduction,
-                main_points="\n".join(outline.main_points),
-                conclusion=outline.conclusion,
-                topic=state.task.topic,
-                requirements=state.task.requirements,
-                essay_length=state.task.essay_length,
-                research_data=research_data,
-            )
+            # Stream essay from LLM, stopping once it is longer than needed
+            messages = self._create_essay_messages(state, outline)
+            essay_stream = _EssayStream(state.task.essay_length_upper_bound)
+            for chunk in self.llm.stream(messages):
+                if not essay_stream.add(_coerce_content(chunk)):
+                    break
 
-            # Get essay from LLM
-            response = self.llm.invoke(messages)
-            # Handle both string and list response formats
-            essay_content = (
-                response.content
-                if isinstance(response.content, str)
-                else str(response.content)
-            )
+            essay = _create_essay(essay_stream.content(), state, outline)
+            _cache_generated_essay(self.essay_prompt, state, essay.content)
+
+            return essay
+
+        except Exception as e:
+            logger.error(f"Error writing essay: {e}", exc_info=True)
+            # Return a basic essay
+            return _create_basic_essay(state, outline)
 
-            # Calculate word count
-            word_count = len(essay_content.split())
-
-            # Create an essay object
-            essay = Essay(
-                id=str(uuid.uuid4()),
-                title=outline.title,
-                content=essay_content,
-                outline=outline,
-                sources=state.documents,
-                word_count=word_count,
+    async def awrite_essay(self, state: AgentState, outline: EssayOutline) -> Essay:
+        """Asynchronously write the complete essay based on the outline and research data."""
+        # Synthesize the essay from the essay of a similar research task if available
+        cached_content = await self._asynthesize_cached_essay(state)
+        if cached_content is not None:
+            return _create_essay(cached_content, state, outline)
+
+        try:
+            # Stream essay from LLM, stopping once it is longer than needed
+            messages = self._create_essay_messages(state, outline)
+            essay_stream = _EssayStream(state.task.essay_length_upper_bound)
+            async with _limit_llm_call(messages):
+                async with aclosing(self.llm.astream(messages)) as stream:
+                    async for chunk in stream:
+                        if not essay_stream.add(_coerce_content(chunk)):
+                            break
+
+            essay = _create_essay(essay_stream.content(), state, outline)
+            await asyncio.to_thread(
+                _cache_generated_essay, self.essay_prompt, state, essay.content
             )
 
             return essay
@@ -213,24 +318,89 @@ class EssayWriterAgent:
         except Exception as e:
             logger.error(f"Error writing essay: {e}", exc_info=True)
             # Return a basic essay
-            basic_content = f"""
-            {outline.title}
-            
-            {outline.introduction}
-            
-            {" ".join(outline.main_points)}
-            
-            {outline.conclusion}
-            """
-
-            return Essay(
-                id=str(uuid.uuid4()),
-                title=outline.title,
-                content=basic_content,
-                outline=outline,
-                sources=state.documents,
-                word_count=len(basic_content.split()),
-            )
+            return _create_basic_essay(state, outline)
+
+    def _synthesize_cached_essay(self, state: AgentState) -> Optional[str]:
+        """Synthesize the essay content from the cached essay of a similar research task."""
+        hit = _lookup_generated_essay(self.essay_prompt, state)
+        if hit is None:
+            return None
+        if not hit.rewrite_indices:
+            return hit.content()
+
+        try:
+            # Rewrite only the sections mentioning the changed slots
+            response = self.llm.invoke(self._create_rewrite_messages(state, hit))
+            return hit.content(_parse_rewrite_response(response))
+
+        except Exception as e:
+            logger.warning(f"Failed to rewrite cached essay sections: {e}")
+            return None
+
+    async def _asynthesize_cached_essay(self, state: AgentState) -> Optional[str]:
+        """Asynchronously synthesize the essay content from the cached essay of a similar research task."""
+        hit = await asyncio.to_thread(_lookup_generated_essay, self.essay_prompt, state)
+        if hit is None:
+            return None
+        if not hit.rewrite_indices:
+            return hit.content()
+
+        try:
+            # Rewrite only the sections mentioning the changed slots
+            messages = self._create_rewrite_messages(state, hit)
+            async with _limit_llm_call(messages):
+                response = await self.llm.ainvoke(messages)
+            return hit.content(_parse_rewrite_response(response))
+
+        except Exception as e:
+            logger.warning(f"Failed to rewrite cached essay sections: {e}")
+            return None
+
+    def create_outline_and_essay(self, state: AgentState) -> tuple[EssayOutline, Essay]:
+        """Create the essay outline and write the essay with a single LLM call."""
+        # Reuse the outline of a similar research task if available
+        cached_outline = _lookup_cached_outline(state)
+        if cached_outline is not None:
+            return cached_outline, self.write_essay(state, cached_outline)
+
+        try:
+            # Get outline and essay from LLM
+            response = self.llm.invoke(self._create_combined_messages(state))
+            outline, essay = _parse_combined_response(response, state)
+
+        except Exception as e:
+            logger.error(f"Error creating outline and essay: {e}", exc_info=True)
+            # Fall back to separate outline and essay generation
+            outline = self.create_essay_outline(state)
+            return outline, self.write_essay(state, outline)
+
+        _cache_outline(state, outline)
+        return outline, essay
+
+    async def acreate_outline_and_essay(
+        self, state: AgentState
+    ) -> tuple[EssayOutline, Essay]:
+        """Asynchronously create the essay outline and write the essay with a single LLM call."""
+        # Reuse the outline of a similar research task if available
+        cached_outline = await asyncio.to_thread(_lookup_cached_outline, state)
+        if cached_outline is not None:
+            return cached_outline, await self.awrite_essay(state, cached_outline)
+
+        try:
+            # Get outline and essay from LLM
+            messages = self._create_combined_messages(state)
+            async with _limit_llm_call(messages):
+                response = await self.llm.ainvoke(messages)
+            outline, essay = _parse_combined_response(response, state)
+
+        except Exception as e:
+            logger.error(f"Error creating outline and essay: {e}", exc_info=True)
+            # Fall back to separate outline and essay generation
+            outline = await self.acreate_essay_outline(state)
+            return outline, await self.awrite_essay(state, outline)
+
+        await asyncio.to_thread(_cache_outline, state, outline)
+        return outline, essay
 
     def run(self, state: AgentState) -> AgentState:
         """Main execution method for the essay writer agent."""
@@ -244,33 +414,54 @@ class EssayWriterAgent:
                 state.current_step = ResearchStep.ESSAY_COMPLETED
                 return state
 
-            # Create essay outline
-            logger.info("Essay Writer Agent: Creating essay outline...")
-            outline = self.create_essay_outline(state)
-            state.essay_outline = outline
+            if config.FUSED_GENERATION:
+                # Create essay outline and write the essay in one go
+                logger.info("Essay Writer Agent: Creating outline and writing essay...")
+                outline, essay = self.create_outline_and_essay(state)
+            else:
+                # Create essay outline
+                logger.info("Essay Writer Agent: Creating essay outline...")
+                outline = self.create_essay_outline(state)
 
-            # Write the essay
-            logger.info("Essay Writer Agent: Writing essay...")
-            essay = self.write_essay(state, outline)
-            state.final_essay = essay
+                # Write the essay
+                logger.info("Essay Writer Agent: Writing essay...")
+                essay = self.write_essay(state, outline)
 
-            # Validate essay
-            validation = _validate_essay_requirements(essay, state.task.requirements)
+            _complete_essay_step(state, outline, essay)
 
-            state.current_step = ResearchStep.ESSAY_COMPLETED
-            state.essay_validation_result = validation
+        except Exception as e:
+            error_msg = f"Essay Writer Agent error: {str(e)}"
+            state.errors.append(error_msg)
+            logger.error(error_msg, exc_info=True)
 
-            logger.info(
-                f"Essay Writer Agent: Essay completed. Word count: {essay.word_count}"
-            )
-            logger.info(
-                f"Essay Writer Agent: Validation - Overall valid: {validation.overall_valid}, "
-                f"Length: {validation.meets_length}, Topic: {validation.covers_topic}, "
-                f"Sources: {validation.has_sources}, Issues: {len(validation.issues)}"
-            )
-            if validation.issues:
-                for issue in validation.issues:
-                    logger.warning(f"Essay Writer Agent: Validation issue - {issue}")
+        return state
+
+    async def arun(self, state: AgentState) -> AgentState:
+        """Asynchronous execution method for the essay writer agent."""
+        try:
+            state.current_step = ResearchStep.WRITING_ESSAY
+
+            if not state.documents:
+                logger.info(
+                    "Essay Writer Agent: No documents available for essay writing"
+                )
+                state.current_step = ResearchStep.ESSAY_COMPLETED
+                return state
+
+            if config.FUSED_GENERATION:
+                # Create essay outline and write the essay in one go
+                logger.info("Essay Writer Agent: Creating outline and writing essay...")
+                outline, essay = await self.acreate_outline_and_essay(state)
+            else:
+                # Create essay outline
+                logger.info("Essay Writer Agent: Creating essay outline...")
+                outline = await self.acreate_essay_outline(state)
+
+                # Write the essay
+                logger.info("Essay Writer Agent: Writing essay...")
+                essay = await self.awrite_essay(state, outline)
+
+            _complete_essay_step(state, outline, essay)
 
         except Exception as e:
             error_msg = f"Essay Writer Agent error: {str(e)}"
@@ -279,6 +470,339 @@ class EssayWriterAgent:
 
         return state
 
+    def run_batch(self, states: List[AgentState]) -> List[AgentState]:
+        """Write the essays of several research states concurrently."""
+        return asyncio.run(self.arun_batch(states))
+
+    async def arun_batch(self, states: List[AgentState]) -> List[AgentState]:
+        """Asynchronously write the essays of several research states concurrently."""
+        # The LLM calls of all the states are in flight at once, bounded by the shared
+        # LLM call limit, and the states are returned in the given order
+        return list(await asyncio.gather(*(self.arun(state) for state in states)))
+
+    def submit_batch(self, states: List[AgentState]) -> str:
+        """
+        Submit the outline and essay generation of the states to the OpenAI Batch API.
+
+        The batch is completed within 24 hours at half the cost of the interactive
+        requests, the essays are collected with collect_batch. Returns the batch ID.
+        """
+        requests = []
+        for state in states:
+            messages = self._create_combined_messages(state)
+            requests.append(
+                orjson.dumps(
+                    {
+                        "custom_id": state.task.id,
+                        "method": "POST",
+                        "url": _BATCH_ENDPOINT,
+                        "body": {
+                            "model": config.OPENAI_MODEL,
+                            "temperature": config.TEMPERATURE,
+                            "messages": convert_to_openai_messages(messages),
+                        },
+                    }
+                )
+            )
+
+        batch_file = self.batch_client.files.create(
+            file=("essays.jsonl", b"\n".join(requests)), purpose="batch"
+        )
+        batch = self.batch_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=_BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        logger.info(
+            f"Essay Writer Agent: Submitted batch {batch.id} of {len(states)} essays"
+        )
+        return batch.id
+
+    def collect_batch(
+        self, batch_id: str, states: List[AgentState]
+    ) -> Optional[List[AgentState]]:
+        """
+        Collect the essays of the batch into the states it was submitted with.
+
+        Returns None while the batch is still running. The states without a valid
+        response in the batch output get an error.
+        """
+        batch = self.batch_client.batches.retrieve(batch_id)
+        if batch.status in _BATCH_RUNNING_STATUSES:
+            logger.info(f"Essay Writer Agent: Batch {batch_id} is {batch.status}")
+            return None
+
+        # The expired and cancelled batches keep the output of the finished requests
+        contents = {}
+        if batch.output_file_id:
+            output = self.batch_client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                result = orjson.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") == 200:
+                    choice = response["body"]["choices"][0]
+                    contents[result["custom_id"]] = choice["message"]["content"]
+
+        for state in states:
+            try:
+                content = contents.get(state.task.id)
+                if content is None:
+                    raise ValueError(f"No essay in the output of batch {batch_id}")
+
+                outline, essay = _parse_combined_response(
+                    AIMessage(content=content), state
+                )
+                _complete_essay_step(state, outline, essay)
+
+            except Exception as e:
+                error_msg = f"Essay Writer Agent error: {str(e)}"
+                state.errors.append(error_msg)
+                logger.error(error_msg)
+
+        return states
+
+    def _create_outline_messages(self, state: AgentState) -> List[BaseMessage]:
+        """Prepare the prompt messages to create an essay outline."""
+        # Prepare source summary
+        documents = _select_research_documents(state.documents)
+        sources_summary = io.StringIO()
+        for i, doc in enumerate(documents[: state.task.max_relevant_sources], 1):
+            if i > 1:
+                sources_summary.write("\n")
+            sources_summary.write(f"{i}. {doc.title} ({doc.source_type.value})")
+            if doc.url:
+                sources_summary.write(f" - {doc.url}")
+
+        return self.outline_prompt.format_messages(
+            topic=state.task.topic,
+            requirements=state.task.requirements,
+            essay_length=state.task.essay_length,
+            sources_summary=sources_summary.getvalue(),
+        )
+
+    def _create_essay_messages(
+        self, state: AgentState, outline: EssayOutline
+    ) -> List[BaseMessage]:
+        """Prepare the prompt messages to write an essay following the outline."""
+        # Prepare research data
+        research_data = _prepare_research_data(
+            state.documents, self.encoding, config.MAX_RESEARCH_TOKENS
+        )
+
+        return self.essay_prompt.format_messages(
+            title=outline.title,
+            introduction=outline.introduction,
+            main_points="\n".join(outline.main_points),
+            conclusion=outline.conclusion,
+            topic=state.task.topic,
+            requirements=state.task.requirements,
+            essay_length=state.task.essay_length,
+            research_data=research_data,
+        )
+
+    def _create_combined_messages(self, state: AgentState) -> List[BaseMessage]:
+        """Prepare the prompt messages to create an outline and write an essay at once."""
+        # Prepare research data
+        research_data = _prepare_research_data(
+            state.documents, self.encoding, config.MAX_RESEARCH_TOKENS
+        )
+
+        return self.combined_prompt.format_messages(
+            topic=state.task.topic,
+            requirements=state.task.requirements,
+            essay_length=state.task.essay_length,
+            research_data=research_data,
+        )
+
+    def _create_rewrite_messages(
+        self, state: AgentState, hit: GenCacheHit
+    ) -> List[BaseMessage]:
+        """Prepare the prompt messages to rewrite the sections of a cached essay."""
+        sections = [hit.sections[i] for i in hit.rewrite_indices]
+        return self.rewrite_prompt.format_messages(
+            topic=state.task.topic,
+            requirements=state.task.requirements,
+            sections=orjson.dumps(sections, option=orjson.OPT_INDENT_2).decode(),
+        )
+
+
+class _EssayStream:
+    """The streamed essay content, limited to the maximal number of words."""
+
+    def __init__(self, max_words: int):
+        self.max_words = max_words
+        self.parts: List[str] = []
+        self.words = 0
+        self.truncated = False
+
+    def add(self, content: str) -> bool:
+        """Add the streamed chunk, returns False once the essay exceeds the word limit."""
+        if not content:
+            return True
+
+        words = len(_WORD_RE.findall(content))
+        # a word split between the chunks is counted once
+        if words and self.parts and not self.parts[-1][-1].isspace():
+            if not content[0].isspace():
+                words -= 1
+        self.parts.append(content)
+        self.words += words
+
+        if self.words > self.max_words:
+            logger.warning(f"Essay exceeds {self.max_words} words, stopping")
+            self.truncated = True
+        return not self.truncated
+
+    def content(self) -> str:
+        """Get the essay content, cut back to the last sentence if it was truncated."""
+        content = "".join(self.parts)
+        if not self.truncated:
+            return content
+
+        end = max(
+            (match.end() for match in _SENTENCE_END_RE.finditer(content)),
+            default=0,
+        )
+        end = max(end, content.rfind("\n\n"))
+        return content[:end].rstrip() if end > 0 else content
+
+
+def _coerce_content(response: BaseMessage) -> str:
+    """Get the text content of the LLM response."""
+    # Handle both string and list response formats
+    content = response.content
+    return content if isinstance(content, str) else str(content)
+
+
+def _parse_combined_response(
+    response: BaseMessage, state: AgentState
+) -> tuple[EssayOutline, Essay]:
+    """Create an essay outline and an essay from the combined LLM response."""
+    content = _coerce_content(response)
+    generated_data = parse_llm_response(content)
+    outline = _create_outline(generated_data["outline"], state)
+    return outline, _create_essay(generated_data["essay"], state, outline)
+
+
+def _parse_rewrite_response(response: BaseMessage) -> List[str]:
+    """Get the rewritten essay sections from the LLM response."""
+    return parse_llm_response(_coerce_content(response))["sections"]
+
+
+def _create_outline(outline_data: Dict[str, Any], state: AgentState) -> EssayOutline:
+    """Create an outline object from the parsed outline data."""
+    return EssayOutline(
+        title=outline_data.get("title", f"Research on {state.task.topic}"),
+        introduction=outline_data.get("introduction", ""),
+        main_points=outline_data.get("main_points", []),
+        conclusion=outline_data.get("conclusion", ""),
+        sources=outline_data.get("sources", []),
+    )
+
+
+def _create_essay(
+    essay_content: str, state: AgentState, outline: EssayOutline
+) -> Essay:
+    """Create an essay object from the generated content."""
+    return Essay(
+        id=str(uuid.uuid4()),
+        title=outline.title,
+        content=essay_content,
+        outline=outline,
+        sources=state.documents,
+        word_count=sum(1 for _ in _WORD_RE.finditer(essay_content)),
+    )
+
+
+def _create_basic_outline(state: AgentState) -> EssayOutline:
+    """Create a basic outline used when the LLM fails."""
+    # the cached outline is shared, every essay gets its own copy
+    return _fallback_outline(
+        state.task.topic, tuple(doc.title for doc in state.documents[:5])
+    ).model_copy(deep=True)
+
+
+@lru_cache(maxsize=64)
+def _fallback_outline(topic: str, first_titles: tuple[str, ...]) -> EssayOutline:
+    """Build the basic outline of the topic, shared by the calls with the same arguments."""
+    return EssayOutline(
+        title=f"Research on {topic}",
+        introduction=f"This essay explores {topic} based on comprehensive research.",
+        main_points=[
+            f"Overview of {topic}",
+            "Key findings and analysis",
+            "Implications and conclusions",
+        ],
+        conclusion=f"Summary of findings on {topic}",
+        sources=list(first_titles),
+    )
+
+
+def _create_basic_essay(state: AgentState, outline: EssayOutline) -> Essay:
+    """Create a basic essay from the outline used when the LLM fails."""
+    basic_content = _fallback_essay_content(
+        outline.title,
+        outline.introduction,
+        tuple(outline.main_points),
+        outline.conclusion,
+    )
+    return _create_essay(basic_content, state, outline)
+
+
+@lru_cache(maxsize=64)
+def _fallback_essay_content(
+    title: str, introduction: str, main_points: tuple[str, ...], conclusion: str
+) -> str:
+    """Build the content of the basic essay from the outline parts."""
+    return f"""
+    {title}
+    
+    {introduction}
+    
+    {" ".join(main_points)}
+    
+    {conclusion}
+    """
+
+
+def _complete_essay_step(state: AgentState, outline: EssayOutline, essay: Essay):
+    """Store the written essay in the state and validate it against the requirements."""
+    state.essay_outline = outline
+    state.final_essay = essay
+
+    # Validate essay
+    validation = _validate_essay_requirements(essay, state.task.requirements)
+
+    state.current_step = ResearchStep.ESSAY_COMPLETED
+    state.essay_validation_result = validation
+
+    logger.info(f"Essay Writer Agent: Essay completed. Word count: {essay.word_count}")
+    logger.info(
+        f"Essay Writer Agent: Validation - Overall valid: {validation.overall_valid}, "
+        f"Length: {validation.meets_length}, Topic: {validation.covers_topic}, "
+        f"Sources: {validation.has_sources}, Issues: {len(validation.issues)}"
+    )
+    if validation.issues:
+        for issue in validation.issues:
+            logger.warning(f"Essay Writer Agent: Validation issue - {issue}")
+
+
+@lru_cache(maxsize=128)
+def _topic_words(requirements: str) -> frozenset[str]:
+    """Get the significant words of the requirements to check the topic coverage."""
+    words = (word.strip(string.punctuation) for word in requirements.lower().split())
+    return frozenset(word for word in words if len(word) > 3)
+
+
+@lru_cache(maxsize=128)
+def _topic_automaton(topic_words: frozenset[str]) -> ahocorasick.Automaton:
+    """Build the Aho-Corasick automaton matching the topic words."""
+    automaton = ahocorasick.Automaton()
+    for word in topic_words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
 
 def _validate_essay_requirements(
     essay: Essay, requirements: str
@@ -308,9 +832,13 @@ def _validate_essay_requirements(
             )
 
     # Check topic coverage
-    topic_words = [word.lower() for word in requirements.split() if len(word) > 3]
-    content_lower = essay.content.lower()
-    topic_coverage = sum(1 for word in topic_words if word in content_lower)
+    topic_words = _topic_words(requirements)
+    topic_coverage = 0
+    if topic_words:
+        automaton = _topic_automaton(topic_words)
+        # single pass over the essay finding every topic word it mentions
+        found_words = {word for _, word in automaton.iter(essay.content.lower())}
+        topic_coverage = len(found_words)
     result.topic_coverage_score = (
         topic_coverage / len(topic_words) if topic_words else 0.0
     )
@@ -322,23 +850,149 @@ def _validate_essay_requirements(
     return result
 
 
-def _prepare_research_data(documents: List[DocumentSource]) -> str:
-    """Prepare research data for the essay writing prompt."""
-    research_data = []
+def _lookup_cached_outline(state: AgentState) -> Optional[EssayOutline]:
+    """Look up the outline generated for a similar research task."""
+    if not config.ENABLE_SEMANTIC_OUTLINE_CACHE:
+        return None
 
-    for i, doc in enumerate(documents[:15], 1):  # Limit to top 15 sources
-        # Truncate content for prompt
-        content_preview = (
-            doc.content[:800] + "..." if len(doc.content) > 800 else doc.content
+    try:
+        outline = get_outline_cache().lookup(
+            state.task.topic,
+            state.task.requirements,
+            state.task.essay_length,
+            embedding=embed_task_query(state),
         )
+    except Exception as e:
+        logger.warning(f"Outline cache lookup failed: {e}")
+        return None
+
+    if outline is None:
+        return None
+    # the cached outline cites the sources of the earlier task, keep the current ones
+    titles = {doc.title for doc in state.documents}
+    return outline.model_copy(
+        update={"sources": [title for title in outline.sources if title in titles]}
+    )
 
-        source_info = f"Source {i}: {doc.title}\n"
-        source_info += f"Type: {doc.source_type.value}\n"
-        if doc.url:
-            source_info += f"URL: {doc.url}\n"
-        source_info += f"Content: {content_preview}\n"
-        source_info += "-" * 50 + "\n"
 
-        research_data.append(source_info)
+def _cache_outline(state: AgentState, outline: EssayOutline):
+    """Store the generated outline for reuse by similar research tasks."""
+    if not config.ENABLE_SEMANTIC_OUTLINE_CACHE:
+        return
 
-    return "\n".join(research_data)
+    try:
+        get_outline_cache().store(
+            state.task.topic,
+            state.task.requirements,
+            state.task.essay_length,
+            outline,
+            embedding=embed_task_query(state),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to store outline in cache: {e}")
+
+
+def _lookup_generated_essay(
+    prompt: ChatPromptTemplate, state: AgentState
+) -> Optional[GenCacheHit]:
+    """Look up the essay generated with the prompt for a similar research task."""
+    if not config.ENABLE_GEN_CACHE:
+        return None
+
+    try:
+        return get_gen_cache().lookup(
+            _gen_cache_template_id(prompt, state),
+            _gen_cache_slot_values(state),
+            embedding=embed_task_query(state),
+        )
+    except Exception as e:
+        logger.warning(f"Essay generative cache lookup failed: {e}")
+        return None
+
+
+def _cache_generated_essay(prompt: ChatPromptTemplate, state: AgentState, content: str):
+    """Store the generated essay for synthesizing the essays of similar research tasks."""
+    if not config.ENABLE_GEN_CACHE:
+        return
+
+    try:
+        get_gen_cache().store(
+            _gen_cache_template_id(prompt, state),
+            _gen_cache_slot_values(state),
+            content,
+            embedding=embed_task_query(state),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to store essay in generative cache: {e}")
+
+
+def _gen_cache_template_id(prompt: ChatPromptTemplate, state: AgentState) -> str:
+    """Get the generative cache key of the prompt, only essays of the same length match."""
+    return f"{get_template_id(prompt)}:{state.task.essay_length}"
+
+
+def _gen_cache_slot_values(state: AgentState) -> Dict[str, str]:
+    """
+    Get the prompt variables that differ between structurally similar research tasks.
+    Their embedding text is the research task query, so its embedding is reused.
+    """
+    return {"topic": state.task.topic, "requirements": state.task.requirements}
+
+
+def _select_research_documents(
+    documents: List[DocumentSource],
+) -> List[DocumentSource]:
+    """Drop documents without content and put the most relevant ones first."""
+    documents = [doc for doc in documents if doc.content and doc.content.strip()]
+    # stable sort keeps the original order of documents that were not assessed
+    return sorted(documents, key=lambda doc: -(doc.relevance_score or 0.0))
+
+
+def _prepare_research_data(
+    documents: List[DocumentSource], encoding: tiktoken.Encoding, max_tokens: int
+) -> str:
+    """Prepare research data for the essay writing prompt within the token budget."""
+    documents = _select_research_documents(documents)[:15]  # Limit to top 15 sources
+    if not documents:
+        return ""
+
+    # The top 5 sources share the budget left after the tail sources, which are
+    # cut down to 150 characters (at most 150 tokens) each.
+    top_count = min(5, len(documents))
+    tail_tokens = 150 * (len(documents) - top_count)
+    budget_per_doc = max(max_tokens - tail_tokens, 0) // top_count
+    separator = "-" * 50 + "\n"
+    research_data = io.StringIO()
+
+    for i, doc in enumerate(documents, 1):
+        if i > 1:
+            research_data.write("\n")
+
+        # Truncate content for prompt. Each token spans at least one character, so
+        # the content no longer than the budget in characters fits without encoding.
+        content_preview = doc.content
+        if i > top_count:
+            if len(doc.content) > 150:
+                content_preview = doc.content[:150] + "..."
+        elif len(doc.content) > budget_per_doc:
+            tokens = encoding.encode(doc.content)
+            if len(tokens) > budget_per_doc:
+                content_preview = encoding.decode(tokens[:budget_per_doc]) + "..."
+        url_info = f"URL: {doc.url}\n" if doc.url else ""
+
+        research_data.write(
+            f"Source {i}: {doc.title}\n"
+            f"Type: {doc.source_type.value}\n"
+            f"{url_info}"
+            f"Content: {content_preview}\n"
+            f"{separator}"
+        )
+
+    return research_data.getvalue()
+
+
+def _limit_llm_call(messages: List[BaseMessage]):
+    """Limit the concurrency and the input tokens per minute of the LLM call."""
+    return limit_llm_call(
+        messages, config.MAX_CONCURRENT_LLM_CALLS, config.LLM_TOKENS_PER_MINUTE
+    )
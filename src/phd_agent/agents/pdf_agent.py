@@ -1,5 +1,8 @@
 import logging
 import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional
 
@@ -12,22 +15,20 @@ from ..vector_store import (
     store_documents,
     search_local_documents,
     get_documents_by_file_path,
+    get_task_query,
+    embed_task_query,
 )
 
 logger = logging.getLogger(__name__)
 
+# The plain text extraction flags, the ligatures are expanded into their letters so
+# that the words of the chunks match the search queries
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES
+
 
 class PDFAgent:
     """Agent responsible for processing PDF documents and storing them in the vector database."""
 
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.MAX_TOKENS_PER_CHUNK,
-            chunk_overlap=config.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""],
-        )
-
     def process_pdf_file(self, file_path: str) -> List[DocumentSource]:
         """Process a single PDF file and extract documents."""
         if not os.path.exists(file_path):
@@ -41,67 +42,65 @@ class PDFAgent:
             )
             return documents
 
-        try:
-            # Open PDF
-            doc = fitz.open(file_path)
-
-            # Extract text from each page
-            full_text = ""
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text = page.get_text()  # type: ignore
-                full_text += f"\n--- Page {page_num + 1} ---\n{text}"
-
-            # Extract metadata
-            metadata = doc.metadata or {}
-            title = metadata.get("title", None)
-            if title is None:
-                title = Path(file_path).stem
-
-            # Split text into chunks
-            chunks = self.text_splitter.split_text(full_text)
-
-            # Create document sources for each chunk
-            for i, chunk in enumerate(chunks):
-                if chunk.strip():  # Skip empty chunks
-                    doc_source = DocumentSource(
-                        title=f"{title} - Chunk {i + 1}",
-                        content=chunk.strip(),
-                        source_type=DocumentType.PDF,
-                        file_path=file_path,
-                        metadata={
-                            "page_range": f"Chunk {i + 1}",
-                            "total_chunks": len(chunks),
-                            "original_title": title,
-                            "file_size": os.path.getsize(file_path),
-                            "pdf_metadata": metadata,
-                        },
-                    )
-                    documents.append(doc_source)
+        return _parse_pdf_file(file_path)
 
-            doc.close()
-            logger.info(f"Processed PDF: {file_path} -> {len(documents)} chunks")
+    def process_pdf_files(
+        self, file_paths: List[str], errors: Optional[List[str]] = None
+    ) -> List[DocumentSource]:
+        """Process PDF files, parsing the new ones in parallel processes.
 
-        except Exception as e:
-            logger.error(f"Error processing PDF {file_path}: {e}", exc_info=True)
-            raise
+        The files that fail to process are logged and skipped, their errors are
+        appended to the errors list if it is given.
+        """
 
-        return documents
-
-    def process_pdf_directory(self, directory_path: str) -> List[DocumentSource]:
-        """Process all PDF files in a directory."""
-        pdf_files = list(Path(directory_path).glob("**/*.pdf"))
-        all_documents = []
+        def report_error(file_path: str, e: Exception):
+            logger.error(f"Error processing {file_path}: {e}")
+            if errors is not None:
+                errors.append(f"PDF processing error: {file_path}: {e}")
 
-        for pdf_file in pdf_files:
+        documents = []
+        new_file_paths = []
+        for file_path in file_paths:
             try:
-                documents = self.process_pdf_file(str(pdf_file))
-                all_documents.extend(documents)
+                # check if we already have this file in the vector store
+                saved_documents = get_documents_by_file_path(file_path)
             except Exception as e:
-                logger.error(f"Error processing {pdf_file}: {e}")
+                report_error(file_path, e)
                 continue
 
-        return all_documents
+            if saved_documents:
+                logger.info(
+                    f"PDF [{file_path}] already processed -> {len(saved_documents)} chunks. Using saved data."
+                )
+                documents.extend(saved_documents)
+            else:
+                new_file_paths.append(file_path)
+
+        if len(new_file_paths) > 1 and config.MAX_PDF_PROCESSES > 1:
+            # parsing is CPU-bound, so the files are parsed in separate processes
+            max_workers = min(config.MAX_PDF_PROCESSES, len(new_file_paths))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(_parse_pdf_file, file_path)
+                    for file_path in new_file_paths
+                ]
+                for file_path, future in zip(new_file_paths, futures):
+                    try:
+                        documents.extend(future.result())
+                    except Exception as e:
+                        report_error(file_path, e)
+        else:
+            for file_path in new_file_paths:
+                try:
+                    documents.extend(_parse_pdf_file(file_path))
+                except Exception as e:
+                    report_error(file_path, e)
+
+        return documents
+
+    def process_pdf_directory(self, directory_path: str) -> List[DocumentSource]:
+        """Process all PDF files in a directory."""
+        return self.process_pdf_files(_collect_pdf_files([directory_path]))
 
     def run(
         self, state: AgentState, pdf_paths: Optional[List[str]] = None
@@ -111,15 +110,10 @@ class PDFAgent:
             state.current_step = ResearchStep.PDF_PROCESSING
 
             if pdf_paths:
-                # Process new PDF files
-                documents = []
-                for pdf_path in pdf_paths:
-                    if os.path.isfile(pdf_path):
-                        docs = self.process_pdf_file(pdf_path)
-                        documents.extend(docs)
-                    elif os.path.isdir(pdf_path):
-                        docs = self.process_pdf_directory(pdf_path)
-                        documents.extend(docs)
+                # Collect the PDF files to process them in one batch
+                documents = self.process_pdf_files(
+                    _collect_pdf_files(pdf_paths), errors=state.errors
+                )
 
                 if len(documents) > 0:
                     # Store only new documents
@@ -135,8 +129,9 @@ class PDFAgent:
 
             # Search for relevant documents based on the task
             relevant_docs = search_local_documents(
-                state.task.topic + " " + state.task.requirements,
+                get_task_query(state),
                 top_k=config.MAX_LOCAL_SEARCH_RESULTS,
+                query_embedding=embed_task_query(state),
             )
 
             # Add relevant documents to state
@@ -154,3 +149,95 @@ class PDFAgent:
             logger.error(error_msg, exc_info=True)
 
         return state
+
+
+def _collect_pdf_files(pdf_paths: List[str]) -> List[str]:
+    """Collect the PDF files of the paths, expanding the directories recursively."""
+    pdf_files = []
+    for pdf_path in pdf_paths:
+        try:
+            is_directory = stat.S_ISDIR(os.stat(pdf_path).st_mode)
+        except OSError:
+            logger.warning(f"PDF path not found: {pdf_path}")
+            continue
+
+        if is_directory:
+            pdf_files.extend(_scan_pdf_directory(pdf_path))
+        else:
+            pdf_files.append(pdf_path)
+    return pdf_files
+
+
+def _scan_pdf_directory(directory_path: str) -> List[str]:
+    """Scan the directory tree for the PDF files, the entries carry their file types."""
+    pdf_files = []
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                pdf_files.extend(_scan_pdf_directory(entry.path))
+            elif entry.name.endswith(".pdf") and entry.is_file():
+                pdf_files.append(entry.path)
+    return pdf_files
+
+
+@lru_cache(maxsize=1)
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Get the text splitter of the PDF content, created once per process."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=config.MAX_TOKENS_PER_CHUNK,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""],
+    )
+
+
+def _parse_pdf_file(file_path: str) -> List[DocumentSource]:
+    """Parse the PDF file into the documents of its text chunks."""
+    documents = []
+    try:
+        # Open PDF
+        doc = fitz.open(file_path)
+
+        # Extract plain text from each page
+        page_texts = []
+        for page_num, page in enumerate(doc, 1):
+            text = page.get_text("text", flags=_TEXT_FLAGS)  # type: ignore
+            page_texts.append(f"\n--- Page {page_num} ---\n{text}")
+        full_text = "".join(page_texts)
+
+        # Extract metadata
+        metadata = doc.metadata or {}
+        title = metadata.get("title", None)
+        if title is None:
+            title = Path(file_path).stem
+
+        # Split text into chunks
+        chunks = _get_text_splitter().split_text(full_text)
+
+        # Create document sources for each chunk
+        file_size = os.path.getsize(file_path)
+        for i, chunk in enumerate(chunks):
+            if chunk.strip():  # Skip empty chunks
+                doc_source = DocumentSource(
+                    title=f"{title} - Chunk {i + 1}",
+                    content=chunk.strip(),
+                    source_type=DocumentType.PDF,
+                    file_path=file_path,
+                    metadata={
+                        "page_range": f"Chunk {i + 1}",
+                        "total_chunks": len(chunks),
+                        "original_title": title,
+                        "file_size": file_size,
+                        "pdf_metadata": metadata,
+                    },
+                )
+                documents.append(doc_source)
+
+        doc.close()
+        logger.info(f"Processed PDF: {file_path} -> {len(documents)} chunks")
+
+    except Exception as e:
+        logger.error(f"Error processing PDF {file_path}: {e}", exc_info=True)
+        raise
+
+    return documents
@@ -1,19 +1,17 @@
+import asyncio
 import uuid
-import json
 import logging
 
+import orjson
 from typing import List, Dict, Any, Optional
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from pydantic import SecretStr
-
-from ..llm_utils import parse_llm_response
+from ..llm_utils import parse_llm_response, create_prompt_template
 from ..models import ResearchTask, AgentState, ResearchStep
 from .pdf_agent import PDFAgent
 from .web_search_agent import WebSearchAgent
 from .analyst_agent import AnalystAgent
 from .essay_writer_agent import EssayWriterAgent
 from ..config import config
+from ..llm_factory import get_chat
 from ..vector_store import get_vector_store
 
 logger = logging.getLogger(__name__)
@@ -98,11 +96,7 @@ class SupervisorAgent:
     """Supervisor agent that orchestrates the entire research workflow."""
 
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=config.OPENAI_MODEL,
-            temperature=config.TEMPERATURE,
-            api_key=SecretStr(config.OPENAI_API_KEY),
-        )
+        self.llm = get_chat(config.OPENAI_MODEL, config.TEMPERATURE)
 
         # Initialize all agents
         self.pdf_agent = PDFAgent()
@@ -110,23 +104,11 @@ class SupervisorAgent:
         self.analyst_agent = AnalystAgent()
         self.essay_writer_agent = EssayWriterAgent()
 
-        self.workflow_prompt = ChatPromptTemplate.from_template(
-            """
-        You are a research supervisor managing a multi-agent research system. Analyze the current state and determine the next steps.
-        
-        ***Current Research Task:***
-        Topic: {topic}
-        Requirements: {requirements}
-        Maximal relevant Sources: {max_sources}
-        Essay Length: {essay_length}
-        
-        ***System Configuration:***
-        Web Search Enabled: {web_search_enabled}
-        
-        ***Current State:***
-        Step: {current_step}
-        Documents Collected: {doc_count}
-        Errors: {errors}
+        # The static instructions and the research task lead the prompt, so that the
+        # prefix shared by the calls of the workflow loop is cached by the provider
+        self.workflow_prompt = create_prompt_template(
+            system_prompt="""
+        You are a research supervisor managing a multi-agent research system. Analyze the current state provided by the user and determine the next steps.
         
         ***Available Steps:***
         1. pdf_processing - Process PDF documents
@@ -143,15 +125,33 @@ class SupervisorAgent:
         - If web search is disabled, skip web_searching step
         
         ***Respond with JSON:***
-        {{
+        {
             "next_step": "step_name",
             "reasoning": "Explanation of why this step is next",
             "should_continue": true/false,
             "recommendations": ["List any recommendations"]
-        }}
+        }
         
         You should only return the JSON response and nothing else. Do not include any additional text or formatting.
-        """
+        """,
+            context_prompt="""
+        ***Current Research Task:***
+        Topic: {topic}
+        Requirements: {requirements}
+        Maximal relevant Sources: {max_sources}
+        Essay Length: {essay_length}
+        
+        ***System Configuration:***
+        Web Search Enabled: {web_search_enabled}
+        """,
+            user_prompt="""
+        ***Current State:***
+        Step: {current_step}
+        Documents Collected: {doc_count}
+        Errors: {errors}
+        """,
+            model=config.OPENAI_MODEL,
+            prompt_cache=config.ENABLE_PROMPT_CACHE,
         )
 
     def determine_next_step(self, state: AgentState) -> Dict[str, Any]:
@@ -186,7 +186,7 @@ class SupervisorAgent:
             # Parse JSON response
             try:
                 decision = parse_llm_response(content)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error(f"Error parsing JSON response: '{content}'", exc_info=True)
                 # Fallback decision logic
                 decision = _fallback_decision_logic(state)
@@ -241,6 +241,32 @@ class SupervisorAgent:
 
         return state
 
+    async def aexecute_step(
+        self,
+        state: AgentState,
+        step: ResearchStep,
+        pdf_paths: Optional[List[str]] = None,
+    ) -> AgentState:
+        """Asynchronously execute a specific step in the workflow."""
+        if step not in (ResearchStep.ANALYZING_DATA, ResearchStep.WRITING_ESSAY):
+            # Run the synchronous agents without blocking the event loop
+            return await asyncio.to_thread(self.execute_step, state, step, pdf_paths)
+
+        try:
+            if step == ResearchStep.ANALYZING_DATA:
+                logger.info("Supervisor: Executing data analysis step...")
+                state = await self.analyst_agent.arun(state)
+            else:
+                logger.info("Supervisor: Executing essay writing step...")
+                state = await self.essay_writer_agent.arun(state)
+
+        except Exception as e:
+            error_msg = f"Error executing step '{step}': {str(e)}"
+            state.errors.append(error_msg)
+            logger.error(error_msg)
+
+        return state
+
     def run_research_workflow(
         self,
         topic: str,
@@ -250,10 +276,25 @@ class SupervisorAgent:
         pdf_paths: Optional[List[str]] = None,
     ) -> AgentState:
         """Run the complete research workflow."""
+        return asyncio.run(
+            self.arun_research_workflow(
+                topic, requirements, max_relevant_sources, essay_length, pdf_paths
+            )
+        )
+
+    async def arun_research_workflow(
+        self,
+        topic: str,
+        requirements: str,
+        max_relevant_sources: int = 10,
+        essay_length: str = "medium",
+        pdf_paths: Optional[List[str]] = None,
+    ) -> AgentState:
+        """Asynchronously run the complete research workflow."""
         logger.info(f"Supervisor: Starting research workflow for topic: {topic}")
 
         # Check that vector sore is configured properly - we do this early to fail fast
-        get_vector_store()
+        await asyncio.to_thread(get_vector_store)
 
         # Create task and initialize state
         task = create_research_task(
@@ -275,7 +316,7 @@ class SupervisorAgent:
             logger.info(f"Documents collected: {len(state.documents)}")
 
             # Determine the next step
-            decision = self.determine_next_step(state)
+            decision = await asyncio.to_thread(self.determine_next_step, state)
             next_step = decision.get("next_step", ResearchStep.COMPLETED)
             should_continue = decision.get("should_continue", False)
 
@@ -290,7 +331,7 @@ class SupervisorAgent:
             logger.info("-" * 50)
 
             # Execute the step
-            state = self.execute_step(state, ResearchStep(next_step), pdf_paths)
+            state = await self.aexecute_step(state, ResearchStep(next_step), pdf_paths)
 
             # Clear pdf_paths after first use
             pdf_paths = None
@@ -324,9 +365,24 @@ class SupervisorAgent:
         pdf_paths: Optional[List[str]] = None,
     ) -> AgentState:
         """Main execution method for the supervisor agent."""
+        return asyncio.run(
+            self.arun(
+                topic, requirements, max_relevant_sources, essay_length, pdf_paths
+            )
+        )
+
+    async def arun(
+        self,
+        topic: str,
+        requirements: str,
+        max_relevant_sources: int,
+        essay_length: str = "medium",
+        pdf_paths: Optional[List[str]] = None,
+    ) -> AgentState:
+        """Asynchronous execution method for the supervisor agent."""
         try:
             # Run the complete workflow
-            state = self.run_research_workflow(
+            state = await self.arun_research_workflow(
                 topic, requirements, max_relevant_sources, essay_length, pdf_paths
             )
 
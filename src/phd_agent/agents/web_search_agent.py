@@ -1,5 +1,7 @@
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from urllib.parse import urlparse
 
@@ -7,10 +9,9 @@ import requests
 from bs4 import BeautifulSoup
 from ddgs import DDGS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import ChatOpenAI
-from pydantic import SecretStr
 
 from ..config import config
+from ..llm_factory import get_chat
 from ..models import (
     DocumentSource,
     DocumentType,
@@ -28,11 +29,7 @@ class WebSearchAgent:
     """Agent responsible for performing web searches and extracting content from web pages."""
 
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=config.OPENAI_MODEL,
-            temperature=config.TEMPERATURE,
-            api_key=SecretStr(config.OPENAI_API_KEY),
-        )
+        self.llm = get_chat(config.OPENAI_MODEL, config.TEMPERATURE)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=config.MAX_TOKENS_PER_CHUNK,
             chunk_overlap=config.CHUNK_OVERLAP,
@@ -45,6 +42,14 @@ class WebSearchAgent:
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
         )
+        # The queries and the pages of their results are processed in nested thread
+        # pools, the semaphore bounds the web requests of all of them together
+        self._web_requests = threading.BoundedSemaphore(
+            config.MAX_CONCURRENT_WEB_REQUESTS
+        )
+        # The web search calls are spaced out to avoid the search rate limits
+        self._search_lock = threading.Lock()
+        self._last_search_time = float("-inf")
 
     def extract_web_content(self, url: str) -> Optional[str]:
         """Extract content from a web page."""
@@ -84,17 +89,27 @@ class WebSearchAgent:
         self, search_results: List[SearchResult], extract_content: bool = True
     ) -> List[DocumentSource]:
         """Process search results and optionally extract full content."""
+        # Extract full content of all the results concurrently if requested
+        contents = [result.snippet for result in search_results]
+        if extract_content:
+            with ThreadPoolExecutor(
+                max_workers=config.MAX_CONCURRENT_WEB_REQUESTS
+            ) as executor:
+                full_contents = executor.map(
+                    lambda result: self._fetch_web_content(result.url)
+                    if result.url
+                    else None,
+                    search_results,
+                )
+                contents = [
+                    full_content or content
+                    for full_content, content in zip(full_contents, contents)
+                ]
+
         documents = []
 
-        for result in search_results:
+        for result, content in zip(search_results, contents):
             try:
-                # Extract full content if requested
-                content = result.snippet
-                if extract_content and result.url:
-                    full_content = self.extract_web_content(result.url)
-                    if full_content:
-                        content = full_content
-
                 # Split content into chunks if it's too long
                 if len(content) > config.MAX_TOKENS_PER_CHUNK:
                     chunks = self.text_splitter.split_text(content)
@@ -129,6 +144,19 @@ class WebSearchAgent:
 
         return documents
 
+    def _fetch_web_content(self, url: str) -> Optional[str]:
+        """Extract the content of the web page within the web requests limit."""
+        with self._web_requests:
+            return self.extract_web_content(url)
+
+    def _wait_for_search_slot(self):
+        """Wait until the configured delay has passed since the previous web search call."""
+        with self._search_lock:
+            delay = self._last_search_time + config.WEB_SEARCH_DELAY - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_search_time = time.monotonic()
+
     def search_relevant_web_content(
         self, topic: str, requirements: str, max_results: Optional[int] = None
     ) -> List[DocumentSource]:
@@ -141,40 +169,51 @@ class WebSearchAgent:
             f"{topic} analysis",
         ]
 
-        all_documents: List[DocumentSource] = []
+        # Run the searches concurrently, the results are kept in the order of queries
+        with ThreadPoolExecutor(
+            max_workers=config.MAX_CONCURRENT_WEB_REQUESTS
+        ) as executor:
+            query_documents = executor.map(
+                lambda query: self._search_query(query, max_results), search_queries
+            )
+            all_documents = [
+                document for documents in query_documents for document in documents
+            ]
 
-        for query in search_queries:
-            try:
-                # Perform web search
-                search_results = _search_web(query, max_results=max_results)
+        # Store documents
+        if all_documents:
+            stored_ids = store_documents(all_documents)
+            assert len(stored_ids) == len(
+                all_documents
+            ), f"Failed to store all documents {len(stored_ids)} != {len(all_documents)}"
 
-                # Process and extract content
-                documents = self.process_search_results(
-                    search_results, extract_content=True
-                )
+            logger.info(f"Stored {len(stored_ids)} web documents in vector database")
 
-                # Store documents
-                if documents:
-                    stored_ids = store_documents(documents)
-                    assert len(stored_ids) == len(
-                        documents
-                    ), f"Failed to store all documents {len(stored_ids)} != {len(documents)}"
-                    all_documents.extend(documents)
+        return all_documents
 
-                    logger.info(
-                        f"Stored {len(stored_ids)} web documents in vector database for query: '{query}'"
-                    )
+    def _search_query(
+        self, query: str, max_results: Optional[int] = None
+    ) -> List[DocumentSource]:
+        """Search the web for the query and extract the content of the found pages."""
+        try:
+            # Perform web search
+            self._wait_for_search_slot()
+            with self._web_requests:
+                search_results = _search_web(query, max_results=max_results)
 
-                # Add delay between searches
-                time.sleep(2)
+            # Process and extract content
+            documents = self.process_search_results(
+                search_results, extract_content=True
+            )
+            logger.info(f"Found {len(documents)} web documents for query: '{query}'")
 
-            except Exception as e:
-                logger.error(
-                    f"Error searching for query: '{query}', reason: {e}", exc_info=True
-                )
-                continue
+            return documents
 
-        return all_documents
+        except Exception as e:
+            logger.error(
+                f"Error searching for query: '{query}', reason: {e}", exc_info=True
+            )
+            return []
 
     def run(self, state: AgentState) -> AgentState:
         """Main execution method for the web search agent."""
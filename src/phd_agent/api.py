@@ -177,7 +177,7 @@ async def run_research_workflow(task_id: str):
         state = research_tasks[task_id]
 
         # Run the workflow
-        updated_state = supervisor.run_research_workflow(
+        updated_state = await supervisor.arun_research_workflow(
             topic=state.task.topic,
             requirements=state.task.requirements,
             max_relevant_sources=state.task.max_relevant_sources,
@@ -244,18 +244,27 @@ async def download_essay(task_id: str):
 
     try:
         # Write essay content
-        temp_file.write(f"Title: {state.final_essay.title}\n")
-        temp_file.write(f"Word Count: {state.final_essay.word_count}\n")
-        temp_file.write(f"Sources: {len(state.final_essay.sources)}\n")
-        temp_file.write("=" * 50 + "\n\n")
-        temp_file.write(state.final_essay.content)
-        temp_file.write("\n\n" + "=" * 50 + "\n")
-        temp_file.write("SOURCES:\n")
-        for i, source in enumerate(state.final_essay.sources, 1):
-            temp_file.write(f"{i}. {source.title} ({source.source_type.value})\n")
-            if source.url:
-                temp_file.write(f"   URL: {source.url}\n")
-            temp_file.write("\n")
+        essay = state.final_essay
+        sources_block = "".join(
+            f"{i}. {source.title} ({source.source_type.value})\n"
+            + (f"   URL: {source.url}\n" if source.url else "")
+            + "\n"
+            for i, source in enumerate(essay.sources, 1)
+        )
+        temp_file.write(
+            "".join(
+                [
+                    f"Title: {essay.title}\n",
+                    f"Word Count: {essay.word_count}\n",
+                    f"Sources: {len(essay.sources)}\n",
+                    "=" * 50 + "\n\n",
+                    essay.content,
+                    "\n\n" + "=" * 50 + "\n",
+                    "SOURCES:\n",
+                    sources_block,
+                ]
+            )
+        )
 
         temp_file.close()
 
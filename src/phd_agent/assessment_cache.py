@@ -0,0 +1,185 @@
+"""
+Semantic cache for document assessments.
+
+This module stores the relevance and quality assessments of the documents in a local
+SQLite database keyed by the embedding of the research task and the document title
+and content, so that near-identical documents (e.g. the same article scraped from
+different URLs or re-collected by a later run) are assessed without an LLM call.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from .config import config
+from .llm_factory import get_embeddings
+from .models import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+
+assessment_cache = None
+
+
+def get_assessment_cache():
+    global assessment_cache
+    if assessment_cache is None:
+        assessment_cache = SemanticAssessmentCache(
+            embedding_model=get_embeddings("text-embedding-3-small", dimensions=512),
+            cache_path=config.LLM_CACHE_PATH,
+            model=config.OPENAI_MODEL,
+            threshold=config.SEMANTIC_ASSESSMENT_CACHE_THRESHOLD,
+            ttl_secs=config.LLM_CACHE_TTL_SECS,
+        )
+    return assessment_cache
+
+
+class SemanticAssessmentCache:
+    """Semantic cache of the document assessments backed by SQLite."""
+
+    def __init__(
+        self,
+        embedding_model: Any,
+        cache_path: str,
+        model: str,
+        threshold: float = 0.92,
+        ttl_secs: int = 0,
+    ):
+        """
+        Args:
+            embedding_model: The model to embed the documents (e.g. OpenAIEmbeddings).
+            cache_path: Path to the SQLite database file.
+            model: The LLM that assessed the documents, the assessments of other models are not reused.
+            threshold: The minimal cosine similarity of the documents to reuse the assessment.
+            ttl_secs: Time to live of the cached entries in seconds; 0 disables expiration.
+        """
+        self.embedding_model = embedding_model
+        self.model = model
+        self.threshold = threshold
+        self.ttl_secs = ttl_secs
+        self._lock = threading.Lock()
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS assessment_cache "
+                "(id INTEGER PRIMARY KEY, model TEXT, embedding BLOB, "
+                "assessment BLOB, created_at INTEGER)"
+            )
+            self._connection.commit()
+        self._ids, self._embeddings, self._created_at = self._load_embeddings()
+
+    def embed(
+        self, documents: Sequence[DocumentSource], topic: str, requirements: str
+    ) -> np.ndarray:
+        """Embed the documents for the research task with a single embedding request."""
+        embeddings = self.embedding_model.embed_documents(
+            [_cache_key(document, topic, requirements) for document in documents]
+        )
+        return _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+    def lookup(self, embeddings: np.ndarray) -> List[Optional[Dict]]:
+        """Find the cached assessment data of the most similar document for each embedding."""
+        with self._lock:
+            if not self._ids or not len(embeddings):
+                return [None] * len(embeddings)
+
+            # the embeddings are normalized, so the inner product is the cosine similarity
+            similarities = embeddings @ self._embeddings.T
+            if self.ttl_secs > 0:
+                expired = time.time() - np.asarray(self._created_at) > self.ttl_secs
+                similarities[:, expired] = -1.0
+            best = np.argmax(similarities, axis=1)
+
+            assessments: List[Optional[Dict]] = []
+            for row, column in enumerate(best):
+                similarity = float(similarities[row, column])
+                if similarity < self.threshold:
+                    assessments.append(None)
+                    continue
+
+                result = self._connection.execute(
+                    "SELECT assessment FROM assessment_cache WHERE id = ?",
+                    (self._ids[column],),
+                ).fetchone()
+                if result is None:
+                    assessments.append(None)
+                    continue
+
+                logger.debug("Assessment cache hit with similarity: %.3f", similarity)
+                assessments.append(orjson.loads(result[0]))
+
+        return assessments
+
+    def store(self, embeddings: np.ndarray, assessments: Sequence[Dict]):
+        """Store the assessment data of the documents with their embeddings."""
+        if not len(assessments):
+            return
+
+        created_at = int(time.time())
+        try:
+            with self._lock:
+                for embedding, assessment in zip(embeddings, assessments):
+                    cursor = self._connection.execute(
+                        "INSERT INTO assessment_cache "
+                        "(model, embedding, assessment, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (
+                            self.model,
+                            embedding.tobytes(),
+                            orjson.dumps(assessment),
+                            created_at,
+                        ),
+                    )
+                    self._ids.append(cursor.lastrowid)
+                    self._created_at.append(created_at)
+                self._connection.commit()
+
+                if self._embeddings.size:
+                    self._embeddings = np.vstack([self._embeddings, embeddings])
+                else:
+                    self._embeddings = np.array(embeddings, dtype=np.float32)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store assessments in cache: {e}")
+
+    def _load_embeddings(self) -> Tuple[List[int], np.ndarray, List[int]]:
+        """Load the embeddings of the documents assessed by the model."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, embedding, created_at FROM assessment_cache WHERE model = ?",
+                (self.model,),
+            ).fetchall()
+
+        ids = [row[0] for row in rows]
+        created_at = [row[2] for row in rows]
+        if rows:
+            embeddings = np.vstack(
+                [np.frombuffer(row[1], dtype=np.float32) for row in rows]
+            )
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        return ids, embeddings, created_at
+
+
+def _cache_key(document: DocumentSource, topic: str, requirements: str) -> str:
+    """Build the text to embed for the document and the research task."""
+    return (
+        f"Research Topic: {topic}\n"
+        f"Research Requirements: {requirements}\n"
+        f"Document Title: {document.title}\n"
+        f"Document Content: {document.content[:2000]}"
+    )
+
+
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Convert the rows of the embeddings matrix into unit length vectors."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
@@ -1,13 +1,15 @@
 import logging
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import field_validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Get the project root directory (2 levels up from this file)
 project_root = Path(__file__).parent.parent.parent
 logs_dir = project_root / "logs"
 logs_dir.mkdir(exist_ok=True)
+cache_dir = project_root / "cache"
 
 # Configure logging
 logging.basicConfig(
@@ -22,9 +24,12 @@ logger = logging.getLogger(__name__)
 class Config(BaseSettings):
     """Configuration settings for the PhD Agent system."""
 
+    model_config = SettingsConfigDict(env_file=".env")
+
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4.1-mini"
+    ANALYST_QUALITY_MODEL: str = ""  # empty uses OPENAI_MODEL
     TEMPERATURE: float = 0.7
 
     # Milvus Configuration
@@ -35,18 +40,46 @@ class Config(BaseSettings):
     # Text Processing Configuration
     MAX_TOKENS_PER_CHUNK: int = 1000
     CHUNK_OVERLAP: int = 200
+    EMBEDDING_BATCH_SIZE: int = 512
     MAX_LOCAL_SEARCH_RESULTS: int = 1000
 
     # Analysis Configuration
     RELEVANCE_THRESHOLD: float = 0.6
+    RELEVANCE_BATCH_SIZE: int = 20  # documents per LLM call, 1 disables batching
+    ENABLE_EMBEDDING_PREFILTER: bool = False
+    EMBEDDING_PREFILTER_THRESHOLD: float = 0.2
 
     # Web Search Configuration
     ENABLE_WEB_SEARCH: bool = True
     MAX_WEB_SEARCH_RESULTS: int = 10
     SEARCH_TIMEOUT: int = 30
+    WEB_SEARCH_DELAY: float = 2.0  # seconds between the web search calls
+
+    # Concurrency Configuration
+    MAX_CONCURRENT_LLM_CALLS: int = 8
+    LLM_TOKENS_PER_MINUTE: int = 0  # 0 disables the limit
+    LLM_MAX_RETRIES: int = 4  # retries with exponential backoff and jitter
+    MAX_CONCURRENT_WEB_REQUESTS: int = 4
+    MAX_PDF_PROCESSES: int = 4
+
+    # Essay Writing Configuration
+    FUSED_GENERATION: bool = True
+    MAX_RESEARCH_TOKENS: int = 8000
+    MAX_ASSESSMENT_TOKENS: int = 500
 
-    class Config:
-        env_file = ".env"
+    # LLM Cache Configuration
+    ENABLE_PROMPT_CACHE: bool = True
+    ENABLE_LLM_CACHE: bool = True
+    LLM_CACHE_PATH: str = str(cache_dir / "cache.sqlite")
+    LLM_CACHE_TTL_SECS: int = 7 * 24 * 60 * 60
+    ENABLE_SEMANTIC_OUTLINE_CACHE: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    ENABLE_SEMANTIC_LLM_CACHE: bool = False
+    SEMANTIC_LLM_CACHE_THRESHOLD: float = 0.97
+    ENABLE_SEMANTIC_ASSESSMENT_CACHE: bool = False
+    SEMANTIC_ASSESSMENT_CACHE_THRESHOLD: float = 0.92
+    ENABLE_GEN_CACHE: bool = False
+    GEN_CACHE_THRESHOLD: float = 0.9
 
     @field_validator("OPENAI_API_KEY")
     @classmethod
@@ -57,5 +90,11 @@ class Config(BaseSettings):
         return value
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Config:
+    """Get the configuration settings, loaded and validated only once per process."""
+    return Config()
+
+
 # Global config instance
-config = Config()
+config = get_settings()
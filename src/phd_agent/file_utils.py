@@ -5,7 +5,9 @@ This module provides functions to save essays in TXT, PDF, and DOCX formats.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
 
 from .models import Essay
 
@@ -15,20 +17,24 @@ logger = logging.getLogger(__name__)
 def write_essay_txt(essay: Essay, output_path: str) -> bool:
     """Write an essay to a text file."""
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(f"Title: {essay.title}\n")
-            f.write(f"Word Count: {essay.word_count}\n")
-            f.write(f"Sources: {len(essay.sources)}\n")
-            f.write(f"Created: {essay.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(essay.content)
-            f.write("\n\n" + "=" * 50 + "\n")
-            f.write("SOURCES:\n")
-            for i, source in enumerate(essay.sources, 1):
-                f.write(f"{i}. {source.title} ({source.source_type.value})\n")
-                if source.url:
-                    f.write(f"   URL: {source.url}\n")
-                f.write("\n")
+        parts = [
+            f"Title: {essay.title}\n",
+            f"Word Count: {essay.word_count}\n",
+            f"Sources: {len(essay.sources)}\n",
+            f"Created: {essay.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n",
+            "=" * 50 + "\n\n",
+            essay.content,
+            "\n\n" + "=" * 50 + "\n",
+            "SOURCES:\n",
+        ]
+        for i, source in enumerate(essay.sources, 1):
+            parts.append(f"{i}. {source.title} ({source.source_type.value})\n")
+            if source.url:
+                parts.append(f"   URL: {source.url}\n")
+            parts.append("\n")
+
+        with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.writelines(parts)
 
         logger.info(f"Essay saved as TXT: {output_path}")
         return True
@@ -230,6 +236,30 @@ def write_essay(essay: Essay, output_path: str, output_format: str = "auto") ->
         return False
 
 
+def write_essay_files(essay: Essay, output_paths: List[str]) -> List[bool]:
+    """
+    Write an essay to multiple files concurrently, the format of each file is
+    detected from its extension.
+
+    Args:
+        essay: The essay to write
+        output_paths: Output file paths
+
+    Returns:
+        List[bool]: The result of writing each file, in the order of the output paths
+    """
+    if len(output_paths) <= 1:
+        return [write_essay(essay, output_path) for output_path in output_paths]
+
+    # the formats are written independently, so the slowest one bounds the total time
+    with ThreadPoolExecutor(max_workers=len(output_paths)) as executor:
+        return list(
+            executor.map(
+                lambda output_path: write_essay(essay, output_path), output_paths
+            )
+        )
+
+
 def get_supported_formats() -> list[str]:
     """Get a list of supported output formats."""
     formats = ["txt"]
@@ -0,0 +1,186 @@
+"""
+Generative cache for essays.
+
+Research tasks often differ only by the values of the prompt variables (slots), such
+as the topic, while the prompt structure stays the same. This module stores generated
+essays with the slot values replaced by placeholders, keyed by the prompt template.
+An essay for a structurally similar task is synthesized from the cached one: the
+sections that do not mention the changed slots are reused verbatim and only the
+remaining sections need to be rewritten by the LLM.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from .config import config
+from .llm_factory import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+gen_cache = None
+
+
+def get_gen_cache():
+    global gen_cache
+    if gen_cache is None:
+        gen_cache = GenerativeEssayCache()
+    return gen_cache
+
+
+class GenCacheHit(NamedTuple):
+    """The essay synthesized from the cached essay of a similar research task."""
+
+    sections: List[str]  # the sections of the essay with the new slot values
+    rewrite_indices: List[int]  # the indices of the sections mentioning changed slots
+    similarity: float
+
+    def content(self, rewritten_sections: Optional[List[str]] = None) -> str:
+        """Build the essay content, replacing the sections to rewrite if provided."""
+        sections = list(self.sections)
+        if rewritten_sections is not None:
+            if len(rewritten_sections) != len(self.rewrite_indices):
+                raise ValueError(
+                    f"Expected {len(self.rewrite_indices)} rewritten sections, "
+                    f"got {len(rewritten_sections)}"
+                )
+            for index, section in zip(self.rewrite_indices, rewritten_sections):
+                sections[index] = section
+        return "\n\n".join(sections)
+
+
+class _GenCacheEntry(NamedTuple):
+    slot_values: Dict[str, str]
+    content_template: str
+
+
+class GenerativeEssayCache:
+    """In-memory generative cache of essays keyed by the prompt template."""
+
+    def __init__(self, max_entries: int = 128):
+        """
+        Args:
+            max_entries: The maximal number of essays kept per prompt template.
+        """
+        # the same embedding model as used by the documents store
+        self.embedding_model = get_embeddings("text-embedding-3-large", dimensions=256)
+        self.threshold = config.GEN_CACHE_THRESHOLD
+        self.max_entries = max_entries
+        self._entries: Dict[str, List[_GenCacheEntry]] = {}
+        # the normalized embeddings of the slot values of the entries, one row per entry
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        template_id: str,
+        slot_values: Dict[str, str],
+        embedding: Optional[List[float]] = None,
+    ) -> Optional[GenCacheHit]:
+        """Synthesize the essay from the cached essay with the most similar slot values, the slot values are embedded unless their embedding is given."""
+        with self._lock:
+            entries = self._entries.get(template_id)
+            if not entries:
+                return None
+            embeddings = self._embeddings[template_id]
+
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(_embedding_text(slot_values))
+        # the embeddings are normalized, so the inner product is the cosine similarity
+        similarities = embeddings @ _normalize(embedding)
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        entry = entries[best]
+        if similarity < self.threshold:
+            return None
+
+        logger.info(f"Essay generative cache hit with similarity: {similarity:.3f}")
+        changed_slots = [
+            name
+            for name, value in slot_values.items()
+            if entry.slot_values.get(name) != value
+        ]
+        sections = []
+        rewrite_indices = []
+        for i, section in enumerate(entry.content_template.split("\n\n")):
+            if any(_placeholder(name) in section for name in changed_slots):
+                rewrite_indices.append(i)
+            sections.append(_fill_slots(section, slot_values))
+
+        return GenCacheHit(sections, rewrite_indices, similarity)
+
+    def store(
+        self,
+        template_id: str,
+        slot_values: Dict[str, str],
+        content: str,
+        embedding: Optional[List[float]] = None,
+    ):
+        """Store the essay generated for the slot values of the prompt template, the slot values are embedded unless their embedding is given."""
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(_embedding_text(slot_values))
+        entry = _GenCacheEntry(
+            slot_values=dict(slot_values),
+            content_template=_extract_slots(content, slot_values),
+        )
+        row = _normalize(embedding)[np.newaxis, :]
+        with self._lock:
+            # the entries and the embeddings are replaced, not modified, so that the
+            # running lookups keep a consistent snapshot
+            entries = self._entries.get(template_id, []) + [entry]
+            embeddings = self._embeddings.get(template_id)
+            embeddings = row if embeddings is None else np.vstack([embeddings, row])
+            # drop the oldest essays
+            self._entries[template_id] = entries[-self.max_entries :]
+            self._embeddings[template_id] = embeddings[-self.max_entries :]
+
+
+def get_template_id(prompt: ChatPromptTemplate) -> str:
+    """Get the identifier of the prompt structure, the hash of its template texts."""
+    template_texts = []
+    for message in prompt.messages:
+        if isinstance(message, BaseMessage):
+            template_texts.append(str(message.content))
+        else:
+            template = getattr(getattr(message, "prompt", None), "template", None)
+            template_texts.append(str(template or message))
+    return hashlib.sha256("\n".join(template_texts).encode("utf-8")).hexdigest()
+
+
+def _embedding_text(slot_values: Dict[str, str]) -> str:
+    """Build the text to embed for the slot values."""
+    return " ".join(slot_values.values())
+
+
+def _placeholder(name: str) -> str:
+    """Get the placeholder of the slot in the cached essay."""
+    return f"[[{name}]]"
+
+
+def _extract_slots(content: str, slot_values: Dict[str, str]) -> str:
+    """Replace the slot values mentioned in the essay with the placeholders."""
+    # replace the longest values first, so that values containing others stay whole
+    for name, value in sorted(slot_values.items(), key=lambda item: -len(item[1])):
+        if value.strip():
+            content = content.replace(value, _placeholder(name))
+    return content
+
+
+def _fill_slots(content: str, slot_values: Dict[str, str]) -> str:
+    """Replace the placeholders in the essay with the slot values."""
+    for name, value in slot_values.items():
+        content = content.replace(_placeholder(name), value)
+    return content
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    """Convert the embedding into a unit length vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
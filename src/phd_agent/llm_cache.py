@@ -0,0 +1,205 @@
+"""
+Exact-match cache for LLM calls.
+
+This module provides a wrapper around a chat model that stores responses in a
+local SQLite database keyed by the hash of the rendered prompt, so that repeated
+prompts are answered without an API round-trip.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence, Type
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    BaseMessageChunk,
+)
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class CachedLLM:
+    """Chat model wrapper that serves repeated prompts from a SQLite cache."""
+
+    def __init__(self, llm: Any, cache_path: str, ttl_secs: int = 0):
+        """
+        Args:
+            llm: The chat model to wrap (e.g. ChatOpenAI).
+            cache_path: Path to the SQLite database file.
+            ttl_secs: Time to live of the cached entries in seconds; 0 disables expiration.
+        """
+        self.llm = llm
+        self.ttl_secs = ttl_secs
+        self._lock = threading.Lock()
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, content BLOB, created_at INTEGER)"
+            )
+            self._connection.commit()
+
+    def invoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseMessage:
+        """Invoke the wrapped model, returning the cached response if available."""
+        key = self._cache_key(messages)
+        content = self._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            return AIMessage(content=content)
+
+        response = self.llm.invoke(messages, **kwargs)
+        if isinstance(response.content, str):
+            self._put(key, response.content)
+        return response
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseMessage:
+        """Asynchronously invoke the wrapped model, returning the cached response if available."""
+        key = self._cache_key(messages)
+        content = self._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            return AIMessage(content=content)
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+        if isinstance(response.content, str):
+            self._put(key, response.content)
+        return response
+
+    def stream(
+        self, messages: Sequence[BaseMessage], **kwargs
+    ) -> Iterator[BaseMessageChunk]:
+        """Stream the response of the wrapped model, or the cached response as a single chunk.
+
+        The response is cached only when the stream is consumed to the end.
+        """
+        key = self._cache_key(messages)
+        content = self._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            yield AIMessageChunk(content=content)
+            return
+
+        parts = []
+        for chunk in self.llm.stream(messages, **kwargs):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            yield chunk
+        self._put(key, "".join(parts))
+
+    async def astream(
+        self, messages: Sequence[BaseMessage], **kwargs
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """Asynchronously stream the response of the wrapped model, or the cached response as a single chunk.
+
+        The response is cached only when the stream is consumed to the end.
+        """
+        key = self._cache_key(messages)
+        content = self._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            yield AIMessageChunk(content=content)
+            return
+
+        parts = []
+        async for chunk in self.llm.astream(messages, **kwargs):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            yield chunk
+        self._put(key, "".join(parts))
+
+    def with_structured_output(
+        self, schema: Type[BaseModel], **kwargs
+    ) -> "CachedStructuredLLM":
+        """Wrap the structured output model of the wrapped model with this cache."""
+        return CachedStructuredLLM(
+            self, schema, self.llm.with_structured_output(schema, **kwargs)
+        )
+
+    def _cache_key(
+        self, messages: Sequence[BaseMessage], output_schema: Optional[str] = None
+    ) -> str:
+        """Build the cache key from the model parameters and the rendered prompt."""
+        model = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "")
+        temperature = getattr(self.llm, "temperature", None)
+        prompt_text = "\n".join(str(message.content) for message in messages)
+        key_text = f"{model}|{temperature}|{prompt_text}"
+        if output_schema:
+            # keep structured outputs apart from the plain responses to the same prompt
+            key_text = f"{output_schema}|{key_text}"
+        return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Optional[str]:
+        """Get the cached content for the key if present and not expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        content, created_at = row
+        if self.ttl_secs > 0 and time.time() - created_at > self.ttl_secs:
+            return None
+
+        return content.decode("utf-8") if isinstance(content, bytes) else content
+
+    def _put(self, key: str, content: str):
+        """Store the content under the key."""
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, content, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, content.encode("utf-8"), int(time.time())),
+                )
+                self._connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store LLM response in cache: {e}")
+
+
+class CachedStructuredLLM:
+    """Structured output model wrapper that shares the cache of CachedLLM."""
+
+    def __init__(self, cache: CachedLLM, schema: Type[BaseModel], llm: Any):
+        """
+        Args:
+            cache: The cache of the chat model the structured output model is built from.
+            schema: The pydantic model of the structured output.
+            llm: The structured output model to wrap.
+        """
+        self.cache = cache
+        self.schema = schema
+        self.llm = llm
+
+    def invoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseModel:
+        """Invoke the wrapped model, returning the cached output if available."""
+        key = self.cache._cache_key(messages, output_schema=self.schema.__name__)
+        content = self.cache._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            return self.schema.model_validate_json(content)
+
+        output = self.llm.invoke(messages, **kwargs)
+        self.cache._put(key, output.model_dump_json())
+        return output
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseModel:
+        """Asynchronously invoke the wrapped model, returning the cached output if available."""
+        key = self.cache._cache_key(messages, output_schema=self.schema.__name__)
+        content = self.cache._get(key)
+        if content is not None:
+            logger.debug("LLM cache hit: %s", key)
+            return self.schema.model_validate_json(content)
+
+        output = await self.llm.ainvoke(messages, **kwargs)
+        self.cache._put(key, output.model_dump_json())
+        return output
@@ -0,0 +1,84 @@
+"""
+Shared OpenAI clients.
+
+This module provides the chat and embedding models used by the agents. The models
+are created once per set of parameters and share pooled HTTP clients, so that the
+agents reuse the open connections instead of each setting up its own.
+"""
+
+import asyncio
+import weakref
+from functools import lru_cache
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from pydantic import SecretStr
+
+from .config import config
+
+# The connection pool limits of the HTTP clients shared by all the models
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+
+@lru_cache(maxsize=None)
+def get_chat(model: str, temperature: float) -> ChatOpenAI:
+    """Get the chat model shared by all the agents for the model and temperature."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=SecretStr(config.OPENAI_API_KEY),
+        # the client retries the rate limited and failed requests with exponential
+        # backoff and jitter, honoring the Retry-After header of the provider
+        max_retries=config.LLM_MAX_RETRIES,
+        http_client=_get_http_client(),
+        http_async_client=_get_http_async_client(),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(model: str, dimensions: int) -> OpenAIEmbeddings:
+    """Get the embedding model shared by all the components for the model and dimensions."""
+    return OpenAIEmbeddings(
+        model=model,
+        dimensions=dimensions,
+        http_client=_get_http_client(),
+        http_async_client=_get_http_async_client(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_http_client() -> httpx.Client:
+    """Get the pooled HTTP client for the synchronous requests."""
+    return httpx.Client(limits=_HTTP_LIMITS)
+
+
+@lru_cache(maxsize=1)
+def _get_http_async_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client for the asynchronous requests."""
+    return httpx.AsyncClient(transport=_EventLoopTransport())
+
+
+class _EventLoopTransport(httpx.AsyncBaseTransport):
+    """
+    Transport keeping a connection pool per event loop.
+
+    The pooled connections are bound to the event loop they were opened in, while the
+    sync wrappers of the agents run every workflow in a new event loop. The models and
+    their HTTP client are shared by all the event loops, so each loop gets its own pool.
+    """
+
+    def __init__(self):
+        self._transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=_HTTP_LIMITS)
+            self._transports[loop] = transport
+        return await transport.handle_async_request(request)
+
+    async def aclose(self):
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
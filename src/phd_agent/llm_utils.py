@@ -1,5 +1,26 @@
-import json
-from typing import Any, Dict
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+import orjson
+import tiktoken
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+from langchain_core.messages import BaseMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+# The semaphores limiting concurrent LLM calls, one per event loop
+_llm_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# The rate limiters of the LLM input tokens, one per event loop
+_llm_rate_limiters: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# The average number of characters per token used to estimate the prompt size
+_CHARS_PER_TOKEN = 4
+# The characters per token encoded to truncate the text, long enough to hold the budget
+_MAX_CHARS_PER_TOKEN = 16
 
 
 def parse_llm_response(llm_response: str) -> Dict[str, Any]:
@@ -18,11 +39,19 @@ def parse_llm_response(llm_response: str) -> Dict[str, Any]:
         depends on the input format received. If the input cannot be parsed
         as JSON, an alternative parsing mechanism is utilized.
     Raise:
-        json.JSONDecodeError if the input cannot be parsed as JSON.
+        orjson.JSONDecodeError (a subclass of json.JSONDecodeError) if the input cannot be
+        parsed as JSON.
     """
+    # Strip the Markdown code fences the LLM often wraps the JSON with
+    content = (
+        llm_response.strip()
+        .removeprefix("```json")
+        .removeprefix("```")
+        .removesuffix("```")
+    )
     try:
-        return json.loads(llm_response)
-    except json.JSONDecodeError:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
         return _parse_alleged_llm_response(llm_response)
 
 
@@ -52,4 +81,212 @@ def _parse_alleged_llm_response(llm_response: str) -> Dict[str, Any]:
     open_parenthesis = llm_response.find("{")
     close_parenthesis = llm_response.rfind("}")
     json_string = llm_response[open_parenthesis : close_parenthesis + 1]
-    return json.loads(json_string)
+    return orjson.loads(json_string)
+
+
+def create_prompt_template(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    context_prompt: Optional[str] = None,
+    prompt_cache: bool = True,
+) -> ChatPromptTemplate:
+    """
+    Creates a chat prompt template with the static instructions placed in a leading
+    system message and the per-request variables placed in a trailing user message.
+
+    Keeping the system message byte-identical across calls allows the provider to
+    reuse its cached prompt prefix. The system prompt is used verbatim and is not
+    formatted, so it may contain literal curly braces (e.g., JSON examples).
+
+    Args:
+        system_prompt: str
+            The static instructions shared by all requests.
+        user_prompt: str
+            The template of the per-request part of the prompt.
+        model: str
+            The name of the model the prompt is sent to. Anthropic models get an
+            explicit prompt cache breakpoint on the system and context messages.
+        context_prompt: Optional[str]
+            The template of the user message placed between the system message and
+            the user prompt. Prompts sharing the system prompt and the context (e.g.,
+            research data) send the same prompt prefix, which is cached by the provider.
+        prompt_cache: bool
+            Whether to set the explicit prompt cache breakpoints (Anthropic models).
+
+    Returns:
+        The chat prompt template.
+    """
+    additional_kwargs = {}
+    if prompt_cache and model.startswith("claude-"):
+        additional_kwargs["cache_control"] = {"type": "ephemeral"}
+
+    messages = [
+        SystemMessage(content=system_prompt, additional_kwargs=additional_kwargs)
+    ]
+    if context_prompt is not None:
+        messages.append(
+            HumanMessagePromptTemplate.from_template(
+                context_prompt, additional_kwargs=additional_kwargs
+            )
+        )
+    messages.append(HumanMessagePromptTemplate.from_template(user_prompt))
+    return ChatPromptTemplate.from_messages(messages)
+
+
+def get_llm_semaphore(max_concurrency: int) -> asyncio.Semaphore:
+    """
+    Returns the semaphore limiting the number of concurrent LLM calls made from the
+    running event loop. The semaphore is shared by all the agents so that parallel
+    requests stay within the provider rate limits.
+
+    Args:
+        max_concurrency: int
+            The maximal number of concurrent LLM calls. Only used when the semaphore
+            is created for the first time in the running event loop.
+
+    Returns:
+        The semaphore bound to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
+
+def get_llm_rate_limiter(tokens_per_minute: int) -> "TokenRateLimiter":
+    """
+    Returns the rate limiter of the input tokens sent to the LLM from the running event
+    loop. The rate limiter is shared by all the agents so that parallel requests stay
+    within the provider tokens per minute limit instead of hitting the rate limit
+    errors and backing off.
+
+    Args:
+        tokens_per_minute: int
+            The maximal number of input tokens per minute. Only used when the rate
+            limiter is created for the first time in the running event loop.
+
+    Returns:
+        The rate limiter bound to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    rate_limiter = _llm_rate_limiters.get(loop)
+    if rate_limiter is None:
+        rate_limiter = TokenRateLimiter(tokens_per_minute)
+        _llm_rate_limiters[loop] = rate_limiter
+    return rate_limiter
+
+
+@asynccontextmanager
+async def limit_llm_call(
+    messages: Sequence[BaseMessage], max_concurrency: int, tokens_per_minute: int
+) -> AsyncIterator[None]:
+    """
+    Waits for a free LLM call slot and for the tokens of the messages to fit into the
+    tokens per minute budget.
+
+    Args:
+        messages: Sequence[BaseMessage]
+            The messages of the LLM call.
+        max_concurrency: int
+            The maximal number of concurrent LLM calls.
+        tokens_per_minute: int
+            The maximal number of input tokens per minute, 0 disables the limit.
+    """
+    async with get_llm_semaphore(max_concurrency):
+        if tokens_per_minute > 0:
+            await get_llm_rate_limiter(tokens_per_minute).acquire(
+                estimate_tokens(messages)
+            )
+        yield
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Estimates the number of tokens of the messages from their length."""
+    return sum(len(str(message.content)) for message in messages) // _CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Returns the tokenizer encoding of the model, or o200k_base if the model is not
+    known to tiktoken.
+
+    Args:
+        model: str
+            The name of the model.
+
+    Returns:
+        The tokenizer encoding.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        logger.warning(f"No tokenizer found for model '{model}', using o200k_base")
+        return tiktoken.get_encoding("o200k_base")
+
+
+@lru_cache(maxsize=4096)
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Truncates the text to the number of tokens of the model tokenizer. The results
+    are cached, so that the text sent in several prompts is encoded once.
+
+    Args:
+        text: str
+            The text to truncate.
+        max_tokens: int
+            The maximal number of tokens to keep.
+        model: str
+            The name of the model the text is sent to.
+
+    Returns:
+        The text truncated to the number of tokens.
+    """
+    # Each token spans at least one character, so the shorter text fits without
+    # encoding, and only the prefix that holds the budget even at a few characters
+    # per token is encoded.
+    if len(text) <= max_tokens:
+        return text
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text[: max_tokens * _MAX_CHARS_PER_TOKEN])
+    if len(tokens) <= max_tokens and len(text) <= max_tokens * _MAX_CHARS_PER_TOKEN:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+class TokenRateLimiter:
+    """Token bucket limiting the number of tokens per minute."""
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Args:
+            tokens_per_minute: The maximal number of tokens per minute.
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0  # tokens per second
+        self._tokens = self.capacity
+        self._updated_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        """Waits until the tokens are available and takes them from the bucket."""
+        # a request larger than the bucket would never fit, so it waits for the full bucket
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated_at is not None:
+                    elapsed = now - self._updated_at
+                    self._tokens = min(
+                        self.capacity, self._tokens + elapsed * self.rate
+                    )
+                self._updated_at = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
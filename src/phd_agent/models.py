@@ -36,6 +36,7 @@ class DocumentSource(BaseModel):
     file_path: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.now)
+    relevance_score: Optional[float] = None  # 0.0 to 1.0, set by the analyst
 
 
 class SearchResult(BaseModel):
@@ -48,6 +49,10 @@ class SearchResult(BaseModel):
     relevance_score: Optional[float] = None
 
 
+# Maximal number of words to generate for each essay length
+ESSAY_LENGTH_UPPER_BOUNDS = {"short": 1200, "medium": 2500, "long": 4500}
+
+
 class ResearchTask(BaseModel):
     """Represents a research task with requirements."""
 
@@ -59,6 +64,13 @@ class ResearchTask(BaseModel):
     focus_areas: List[str] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
 
+    @property
+    def essay_length_upper_bound(self) -> int:
+        """The maximal number of words to generate for the essay length."""
+        return ESSAY_LENGTH_UPPER_BOUNDS.get(
+            self.essay_length, ESSAY_LENGTH_UPPER_BOUNDS["medium"]
+        )
+
 
 class EssayOutline(BaseModel):
     """Represents an essay outline structure."""
@@ -126,6 +138,42 @@ class DocumentQualityAssessment(BaseModel):
     recommendation: str  # include, exclude
 
 
+class DocumentRelevanceOutput(BaseModel):
+    """Relevance of a document as assessed by the LLM."""
+
+    relevance_score: float  # 0.0 to 1.0
+    reasoning: str
+    key_points: List[str]
+    confidence: float  # 0.0 to 1.0
+
+
+class DocumentQualityOutput(BaseModel):
+    """Quality and reliability of a document as assessed by the LLM."""
+
+    credibility_score: float  # 0.0 to 1.0
+    information_quality: float  # 0.0 to 1.0
+    currency_score: float  # 0.0 to 1.0
+    overall_quality: str  # low, medium, high
+    biases_limitations: List[str]
+    recommendation: str  # include, exclude
+
+
+class DocumentAssessmentOutput(DocumentRelevanceOutput, DocumentQualityOutput):
+    """Relevance, quality and reliability of a document as assessed by the LLM."""
+
+
+class NumberedDocumentAssessmentOutput(DocumentAssessmentOutput):
+    """Assessment of a numbered document of the batch as assessed by the LLM."""
+
+    document_number: int
+
+
+class DocumentAssessmentBatchOutput(BaseModel):
+    """Assessments of the numbered documents of the batch as assessed by the LLM."""
+
+    assessments: List[NumberedDocumentAssessmentOutput]
+
+
 class CollectedDataSummary(BaseModel):
     """Summary of collected research data."""
 
@@ -162,6 +210,8 @@ class AgentState(BaseModel):
     analysis_results: AnalysisResults = Field(default_factory=AnalysisResults)
     current_step: ResearchStep = ResearchStep.INITIALIZED
     errors: List[str] = Field(default_factory=list)
+    # The embedding of the research task query, computed once and shared by the agents
+    task_query_embedding: Optional[List[float]] = Field(default=None, exclude=True)
 
 
 class AgentMessage(BaseModel):
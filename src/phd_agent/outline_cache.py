@@ -0,0 +1,147 @@
+"""
+Semantic cache for essay outlines.
+
+This module stores generated essay outlines in a dedicated Milvus collection keyed
+by the embedding of the research topic and requirements and by the essay length,
+so that outlines for near-duplicate research tasks can be reused without calling
+the LLM.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pymilvus import Collection, CollectionSchema, FieldSchema, DataType, utility
+
+from .config import config
+from .models import EssayOutline
+from .vector_store import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+outline_cache = None
+
+
+def get_outline_cache():
+    global outline_cache
+    if outline_cache is None:
+        outline_cache = SemanticOutlineCache()
+    return outline_cache
+
+
+class SemanticOutlineCache:
+    """Semantic cache of essay outlines backed by Milvus."""
+
+    def __init__(self):
+        # reuse the connection and the embedding model of the documents store
+        vector_store = get_vector_store()
+        self.embedding_model = vector_store.embedding_model
+        self.dimension = vector_store.dimension
+        self.collection_name = f"{config.MILVUS_COLLECTION_NAME}_outline_cache"
+        self.threshold = config.SEMANTIC_CACHE_THRESHOLD
+        self.collection = None
+        self._setup_collection()
+
+    def _setup_collection(self):
+        """Setup the collection schema and create if it doesn't exist."""
+        if utility.has_collection(self.collection_name):
+            collection = Collection(self.collection_name)
+            if any(field.name == "essay_length" for field in collection.schema.fields):
+                self.collection = collection
+                logger.info(f"Using existing outline cache: {self.collection_name}")
+                return
+
+            # the outlines cached without the essay length can't be told apart
+            utility.drop_collection(self.collection_name)
+            logger.info(f"Dropped outdated outline cache: {self.collection_name}")
+
+        fields = [
+            FieldSchema(
+                name="id", dtype=DataType.VARCHAR, max_length=36, is_primary=True
+            ),
+            FieldSchema(
+                name="embedding", dtype=DataType.FLOAT_VECTOR, dim=self.dimension
+            ),
+            FieldSchema(name="essay_length", dtype=DataType.VARCHAR, max_length=32),
+            FieldSchema(name="outline", dtype=DataType.VARCHAR, max_length=65535),
+            FieldSchema(name="created_at", dtype=DataType.VARCHAR, max_length=30),
+        ]
+        schema = CollectionSchema(fields, description="Essay outlines cache")
+        self.collection = Collection(self.collection_name, schema)
+
+        index_params = {
+            "metric_type": "COSINE",
+            "index_type": "IVF_FLAT",
+            "params": {"nlist": 128},
+        }
+        self.collection.create_index("embedding", index_params)
+        logger.info(f"Created new outline cache: {self.collection_name}")
+
+    def lookup(
+        self,
+        topic: str,
+        requirements: str,
+        essay_length: str,
+        embedding: Optional[List[float]] = None,
+    ) -> Optional[EssayOutline]:
+        """Find the cached outline of the most similar research task with the same essay length, the task is embedded unless its embedding is given."""
+        if self.collection is None:
+            raise Exception("Milvus collection not available")
+
+        self.collection.load()
+
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(
+                _cache_key(topic, requirements)
+            )
+        results = self.collection.search(
+            data=[embedding],
+            anns_field="embedding",
+            param={"metric_type": "COSINE", "params": {"nprobe": 10}},
+            limit=1,
+            expr=f'essay_length == "{essay_length}"',
+            output_fields=["outline"],
+        )
+
+        for hits in results:  # type: ignore
+            for hit in hits:
+                if hit.distance >= self.threshold:
+                    logger.info(
+                        f"Outline cache hit with similarity: {hit.distance:.3f}"
+                    )
+                    return EssayOutline.model_validate_json(hit.entity.get("outline"))
+
+        return None
+
+    def store(
+        self,
+        topic: str,
+        requirements: str,
+        essay_length: str,
+        outline: EssayOutline,
+        embedding: Optional[List[float]] = None,
+    ):
+        """Store the outline generated for the research task, the task is embedded unless its embedding is given."""
+        if self.collection is None:
+            raise Exception("Milvus collection not available")
+
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(
+                _cache_key(topic, requirements)
+            )
+        data = [
+            [str(uuid.uuid4())],
+            [embedding],
+            [essay_length],
+            [outline.model_dump_json()],
+            [datetime.now().isoformat()],
+        ]
+        self.collection.insert(data)
+        self.collection.flush()
+
+
+def _cache_key(topic: str, requirements: str) -> str:
+    """Build the text to embed for the research task, the same as its search query."""
+    return f"{topic} {requirements}"
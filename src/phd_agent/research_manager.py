@@ -1,43 +1,51 @@
 import logging
 import sys
 
-from phd_agent.agents import SupervisorAgent
-from phd_agent.agents.agent_utils import create_workflow_status
 from phd_agent.config import config
 from phd_agent.models import ResearchParameters
 
 logger = logging.getLogger(__name__)
 
 
+def log_system_status():
+    """Log the configuration of the research system without starting the agents."""
+    # a single record keeps the status block together in the log
+    logger.info(
+        "System Status:\n- OpenAI API Key: %s\n- Milvus Host: %s:%s\n- Model: %s\n- Web Search: %s",
+        "Configured" if config.OPENAI_API_KEY else "Missing",
+        config.MILVUS_HOST,
+        config.MILVUS_PORT,
+        config.OPENAI_MODEL,
+        "Enabled" if config.ENABLE_WEB_SEARCH else "Disabled",
+    )
+
+
 def run_research(parameters: ResearchParameters, status_only: bool = False):
     try:
-        # Initialize supervisor agent
-        logger.info("Initializing Multi-Agent Research System...")
-        supervisor = SupervisorAgent()
-
         if status_only:
             # Just show system status
-            logger.info("System Status:")
-            logger.info(
-                f"- OpenAI API Key: {'Configured' if config.OPENAI_API_KEY else 'Missing'}"
-            )
-            logger.info(f"- Milvus Host: {config.MILVUS_HOST}:{config.MILVUS_PORT}")
-            logger.info(f"- Model: {config.OPENAI_MODEL}")
-            logger.info(
-                f"- Web Search: {'Enabled' if config.ENABLE_WEB_SEARCH else 'Disabled'}"
-            )
+            log_system_status()
             return
 
+        # import the agents only to run the research, they load the heavy dependencies
+        from phd_agent.agents import SupervisorAgent
+        from phd_agent.agents.agent_utils import create_workflow_status
+
+        # Initialize supervisor agent
+        logger.info("Initializing Multi-Agent Research System...")
+        supervisor = SupervisorAgent()
+
         # Run the research workflow
-        logger.info(f"Starting research on: {parameters.topic}")
-        logger.info(f"Requirements: {parameters.requirements}")
-        logger.info(f"Max relevant sources to use: {parameters.max_relevant_sources}")
-        logger.info(f"Essay length: {parameters.essay_length}")
         logger.info(
-            f"Web search: {'Enabled' if config.ENABLE_WEB_SEARCH else 'Disabled'}"
+            "Starting research on: %s\nRequirements: %s\nMax relevant sources to use: %s\nEssay length: %s\nWeb search: %s",
+            parameters.topic,
+            parameters.requirements,
+            parameters.max_relevant_sources,
+            parameters.essay_length,
+            "Enabled" if config.ENABLE_WEB_SEARCH else "Disabled",
         )
         if parameters.pdf_paths:
-            logger.info(f"PDF paths: {parameters.pdf_paths}")
+            logger.info("PDF paths: %s", parameters.pdf_paths)
         logger.info("-" * 50)
 
         state = supervisor.run(
@@ -55,34 +63,41 @@ def run_research(parameters: ResearchParameters, status_only: bool = False):
 
         # Show workflow status
         status = create_workflow_status(state)
-        logger.info(f"Task: {status.task.topic}")
-        logger.info(f"Current Step: {status.current_step}")
-        logger.info(f"Documents Collected: {status.documents_collected}")
-        logger.info(f"Search Results: {status.search_results}")
-        logger.info(f"Has Essay: {status.has_essay}")
+        logger.info(
+            "Task: %s\nCurrent Step: %s\nDocuments Collected: %s\nSearch Results: %s\nHas Essay: %s",
+            status.task.topic,
+            status.current_step,
+            status.documents_collected,
+            status.search_results,
+            status.has_essay,
+        )
 
         if status.errors:
-            logger.error(f"Errors encountered: {len(status.errors)}")
+            logger.error("Errors encountered: %d", len(status.errors))
             for error in status.errors:
-                logger.error(f"  - {error}")
+                logger.error("  - %s", error)
 
         # Show an essay if available
         if state.final_essay:
-            logger.info(f"Essay Title: {state.final_essay.title}")
-            logger.info(f"Word Count: {state.final_essay.word_count}")
-            logger.info(f"Sources Used: {len(state.final_essay.sources)}")
+            logger.info(
+                "Essay Title: %s\nWord Count: %s\nSources Used: %d",
+                state.final_essay.title,
+                state.final_essay.word_count,
+                len(state.final_essay.sources),
+            )
 
             # Save essay to file using file_utils
-            from phd_agent.file_utils import write_essay, get_supported_formats
+            from phd_agent.file_utils import write_essay_files, get_supported_formats
 
             logger.info("Writing essay to file(s)...")
-            logger.info(f"Supported formats: {', '.join(get_supported_formats())}")
+            logger.info("Supported formats: %s", ", ".join(get_supported_formats()))
 
-            for output_file in parameters.output_files:
-                if write_essay(state.final_essay, output_file):
-                    logger.info(f"Essay saved to: {output_file}")
+            results = write_essay_files(state.final_essay, parameters.output_files)
+            for output_file, result in zip(parameters.output_files, results):
+                if result:
+                    logger.info("Essay saved to: %s", output_file)
                 else:
-                    logger.error(f"Failed to save essay to: {output_file}")
+                    logger.error("Failed to save essay to: %s", output_file)
 
             # Show essay content if verbose
             if parameters.verbose:
@@ -93,11 +108,13 @@ def run_research(parameters: ResearchParameters, status_only: bool = False):
 
         # Show analysis results if available
         if state.analysis_results and state.analysis_results.data_summary:
-            logger.info("Analysis Results:")
             summary = state.analysis_results.data_summary
-            logger.info(f"  - Total documents: {summary.total_documents}")
-            logger.info(f"  - Source distribution: {summary.source_distribution}")
-            logger.info(f"  - Data coverage: {summary.data_coverage}")
+            logger.info(
+                "Analysis Results:\n  - Total documents: %s\n  - Source distribution: %s\n  - Data coverage: %s",
+                summary.total_documents,
+                summary.source_distribution,
+                summary.data_coverage,
+            )
         else:
             logger.info("No analysis results available - research incomplete")
 
@@ -112,5 +129,5 @@ def run_research(parameters: ResearchParameters, status_only: bool = False):
         logger.info("Research interrupted by user.")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Error: {e}", exc_info=True)
+        logger.error("Error: %s", e, exc_info=True)
         sys.exit(1)
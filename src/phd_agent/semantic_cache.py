@@ -0,0 +1,257 @@
+"""
+Semantic cache for LLM calls.
+
+This module provides a wrapper around a chat model that answers near-duplicate
+prompts from a local SQLite database. The prompts are normalized and embedded, and
+the cached response of the most similar prompt is returned when the cosine
+similarity reaches the threshold, so that re-running the research on the same
+documents skips the LLM calls.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# The timestamps removed from the prompts before embedding, e.g. 2025-01-31T12:00:00
+_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class SemanticCachedLLM:
+    """Chat model wrapper that serves near-duplicate prompts from a semantic cache."""
+
+    def __init__(
+        self,
+        llm: Any,
+        embedding_model: Any,
+        cache_path: str,
+        threshold: float = 0.97,
+        ttl_secs: int = 0,
+    ):
+        """
+        Args:
+            llm: The chat model to wrap (e.g. ChatOpenAI).
+            embedding_model: The model to embed the prompts (e.g. OpenAIEmbeddings).
+            cache_path: Path to the SQLite database file.
+            threshold: The minimal cosine similarity of the prompts to reuse the response.
+            ttl_secs: Time to live of the cached entries in seconds; 0 disables expiration.
+        """
+        self.llm = llm
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.ttl_secs = ttl_secs
+        self.model_key = _model_key(llm)
+        self._lock = threading.Lock()
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_cache "
+                "(id INTEGER PRIMARY KEY, model TEXT, prompt TEXT, embedding BLOB, "
+                "content BLOB, created_at INTEGER)"
+            )
+            self._connection.commit()
+        self._ids, self._embeddings, self._created_at = self._load_embeddings()
+
+    @property
+    def model_name(self) -> str:
+        """The model name of the wrapped model, so that wrapping caches key by it."""
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "")
+
+    @property
+    def temperature(self) -> Optional[float]:
+        """The temperature of the wrapped model."""
+        return getattr(self.llm, "temperature", None)
+
+    def invoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseMessage:
+        """Invoke the wrapped model, returning the response of a similar prompt if available."""
+        prompt = normalize_prompt(messages)
+        embedding = _normalize(self.embedding_model.embed_query(prompt))
+        content = self._get(embedding)
+        if content is not None:
+            return AIMessage(content=content)
+
+        response = self.llm.invoke(messages, **kwargs)
+        if isinstance(response.content, str):
+            self._put(prompt, embedding, response.content)
+        return response
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseMessage:
+        """Asynchronously invoke the wrapped model, returning the response of a similar prompt if available."""
+        prompt = normalize_prompt(messages)
+        embedding = _normalize(await self.embedding_model.aembed_query(prompt))
+        content = self._get(embedding)
+        if content is not None:
+            return AIMessage(content=content)
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+        if isinstance(response.content, str):
+            self._put(prompt, embedding, response.content)
+        return response
+
+    def with_structured_output(
+        self, schema: Type[BaseModel], **kwargs
+    ) -> "SemanticCachedStructuredLLM":
+        """Wrap the structured output model of the wrapped model with this cache."""
+        return SemanticCachedStructuredLLM(
+            self, schema, self.llm.with_structured_output(schema, **kwargs)
+        )
+
+    def _load_embeddings(self) -> Tuple[List[int], np.ndarray, List[int]]:
+        """Load the embeddings of the cached prompts of the wrapped model."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, embedding, created_at FROM semantic_cache WHERE model = ?",
+                (self.model_key,),
+            ).fetchall()
+
+        ids = [row[0] for row in rows]
+        created_at = [row[2] for row in rows]
+        if rows:
+            embeddings = np.vstack(
+                [np.frombuffer(row[1], dtype=np.float32) for row in rows]
+            )
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        return ids, embeddings, created_at
+
+    def _get(self, embedding: np.ndarray) -> Optional[str]:
+        """Get the cached content of the most similar prompt if similar enough and not expired."""
+        with self._lock:
+            if not self._ids:
+                return None
+            # the embeddings are normalized, so the inner product is the cosine similarity
+            similarities = self._embeddings @ embedding
+            if self.ttl_secs > 0:
+                expired = time.time() - np.asarray(self._created_at) > self.ttl_secs
+                similarities[expired] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+
+            row = self._connection.execute(
+                "SELECT content FROM semantic_cache WHERE id = ?", (self._ids[best],)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        logger.debug("Semantic LLM cache hit with similarity: %.3f", similarity)
+        content = row[0]
+        return content.decode("utf-8") if isinstance(content, bytes) else content
+
+    def _put(self, prompt: str, embedding: np.ndarray, content: str):
+        """Store the content with the embedding of its prompt."""
+        created_at = int(time.time())
+        try:
+            with self._lock:
+                cursor = self._connection.execute(
+                    "INSERT INTO semantic_cache "
+                    "(model, prompt, embedding, content, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        self.model_key,
+                        prompt,
+                        embedding.tobytes(),
+                        content.encode("utf-8"),
+                        created_at,
+                    ),
+                )
+                self._connection.commit()
+
+                self._ids.append(cursor.lastrowid)
+                self._created_at.append(created_at)
+                if self._embeddings.size:
+                    self._embeddings = np.vstack([self._embeddings, embedding])
+                else:
+                    self._embeddings = embedding.reshape(1, -1)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store LLM response in semantic cache: {e}")
+
+
+class SemanticCachedStructuredLLM:
+    """Structured output model wrapper that shares the cache of SemanticCachedLLM."""
+
+    def __init__(self, cache: SemanticCachedLLM, schema: Type[BaseModel], llm: Any):
+        """
+        Args:
+            cache: The cache of the chat model the structured output model is built from.
+            schema: The pydantic model of the structured output.
+            llm: The structured output model to wrap.
+        """
+        self.cache = cache
+        self.schema = schema
+        self.llm = llm
+
+    def invoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseModel:
+        """Invoke the wrapped model, returning the output of a similar prompt if available."""
+        prompt = self._normalize_prompt(messages)
+        embedding = _normalize(self.cache.embedding_model.embed_query(prompt))
+        output = self._get(embedding)
+        if output is not None:
+            return output
+
+        output = self.llm.invoke(messages, **kwargs)
+        self.cache._put(prompt, embedding, output.model_dump_json())
+        return output
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs) -> BaseModel:
+        """Asynchronously invoke the wrapped model, returning the output of a similar prompt if available."""
+        prompt = self._normalize_prompt(messages)
+        embedding = _normalize(await self.cache.embedding_model.aembed_query(prompt))
+        output = self._get(embedding)
+        if output is not None:
+            return output
+
+        output = await self.llm.ainvoke(messages, **kwargs)
+        self.cache._put(prompt, embedding, output.model_dump_json())
+        return output
+
+    def _normalize_prompt(self, messages: Sequence[BaseMessage]) -> str:
+        """Render the prompt with the schema name, keeping the structured outputs apart."""
+        return f"{self.schema.__name__}: {normalize_prompt(messages)}"
+
+    def _get(self, embedding: np.ndarray) -> Optional[BaseModel]:
+        """Get the cached output of the most similar prompt if it matches the schema."""
+        content = self.cache._get(embedding)
+        if content is None:
+            return None
+        try:
+            return self.schema.model_validate_json(content)
+        except ValidationError:
+            return None
+
+
+def normalize_prompt(messages: Sequence[BaseMessage]) -> str:
+    """Render the prompt without timestamps and with collapsed whitespace."""
+    prompt_text = "\n".join(str(message.content) for message in messages)
+    prompt_text = _TIMESTAMP_RE.sub("", prompt_text)
+    return _WHITESPACE_RE.sub(" ", prompt_text).strip()
+
+
+def _model_key(llm: Any) -> str:
+    """Build the key of the model parameters, the responses are only shared between equal models."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+    temperature = getattr(llm, "temperature", None)
+    return f"{model}|{temperature}"
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    """Convert the embedding into a unit length vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
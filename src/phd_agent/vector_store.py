@@ -1,3 +1,4 @@
+import sys
 import uuid
 import logging
 from typing import List, Optional, Dict, Any
@@ -11,10 +12,9 @@ from pymilvus import (
 )
 from datetime import datetime
 
-from langchain_openai import OpenAIEmbeddings
-
 from .config import config
-from .models import DocumentSource, DocumentType
+from .llm_factory import get_embeddings
+from .models import AgentState, DocumentSource, DocumentType
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +39,8 @@ class MilvusVectorStore:
     def __init__(self):
         self.collection_name = config.MILVUS_COLLECTION_NAME
         self.dimension = 256
-        self.embedding_model = OpenAIEmbeddings(
-            model="text-embedding-3-large", dimensions=self.dimension
+        self.embedding_model = get_embeddings(
+            "text-embedding-3-large", dimensions=self.dimension
         )
         logger.info(
             f"Using Milvus collection: {self.collection_name} with dimension: {self.dimension}"
@@ -93,61 +93,54 @@ class MilvusVectorStore:
 
     def add_document(self, document: DocumentSource) -> str:
         """Add a document to the vector store."""
-        if not document.id:
-            document.id = str(uuid.uuid4())
+        return self.add_documents([document])[0]
 
+    def add_documents(self, documents: List[DocumentSource]) -> List[str]:
+        """Add a batch of documents to the vector store with a single embedding request and insert."""
         # Check if a collection is available
         if self.collection is None:
             raise Exception("Milvus collection not available")
 
-        # Generate embedding
-        embedding = self._get_embedding(document.content)
+        if not documents:
+            return []
 
-        # Truncate fields to fit Milvus schema limits
-        truncated_title = _truncate_field(document.title, 500)
-        truncated_content = _truncate_field(document.content, 65535)
-        truncated_url = _truncate_field(document.url or "", 1000)
-        truncated_file_path = _truncate_field(document.file_path or "", 500)
-        truncated_metadata = _truncate_field(str(document.metadata), 2000)
+        for document in documents:
+            if not document.id:
+                document.id = str(uuid.uuid4())
 
-        # Log if truncation occurred
-        if len(document.title) > 500:
-            logger.warning(
-                f"Title truncated from {len(document.title)} to {len(truncated_title)} characters: {document.title[:100]}..."
-            )
-        if len(document.content) > 65535:
-            logger.warning(
-                f"Content truncated from {len(document.content)} to {len(truncated_content)} characters"
-            )
-        if document.url and len(document.url) > 1000:
-            logger.warning(
-                f"URL truncated from {len(document.url)} to {len(truncated_url)} characters"
-            )
+        # Generate embeddings
+        embeddings = self.embedding_model.embed_documents(
+            [document.content for document in documents]
+        )
 
         # Prepare data
-        data = [
-            [document.id],
-            [truncated_title],
-            [truncated_content],
-            [document.source_type.value],
-            [truncated_url],
-            [truncated_file_path],
-            [embedding],
-            [truncated_metadata],
-            [document.created_at.isoformat()],
-        ]
+        data: List[List[Any]] = [[] for _ in range(9)]
+        for document, embedding in zip(documents, embeddings):
+            row = [
+                document.id,
+                *_truncate_document_fields(document),
+                embedding,
+                _truncate_field(str(document.metadata), 2000),
+                document.created_at.isoformat(),
+            ]
+            for column, value in zip(data, row):
+                column.append(value)
 
         # Insert data
         self.collection.insert(data)
         self.collection.flush()
 
-        logger.info(f"Added document: {truncated_title}")
-        return document.id
+        logger.info(f"Added {len(documents)} documents")
+        return [document.id for document in documents]  # type: ignore
 
     def search_similar(
-        self, query: str, top_k: int = 5, filter_dict: Optional[Dict] = None
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_dict: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[DocumentSource]:
-        """Search for similar documents."""
+        """Search for similar documents, the query is embedded unless its embedding is given."""
         # Check if a collection is available
         if self.collection is None:
             raise Exception("Milvus collection not available")
@@ -156,7 +149,8 @@ class MilvusVectorStore:
         self.collection.load()
 
         # Generate query embedding
-        query_embedding = self._get_embedding(query)
+        if query_embedding is None:
+            query_embedding = self._get_embedding(query)
 
         # Prepare search parameters
         search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
@@ -182,23 +176,10 @@ class MilvusVectorStore:
 
         # Convert results to DocumentSource objects
         documents = []
+        contents: Dict[str, str] = {}
         for hits in results:  # type: ignore
             for hit in hits:
-                doc = DocumentSource(
-                    id=hit.entity.get("id"),
-                    title=hit.entity.get("title"),
-                    content=hit.entity.get("content"),
-                    source_type=DocumentType(hit.entity.get("source_type")),
-                    url=hit.entity.get("url") if hit.entity.get("url") else None,
-                    file_path=hit.entity.get("file_path")
-                    if hit.entity.get("file_path")
-                    else None,
-                    metadata=eval(hit.entity.get("metadata"))
-                    if hit.entity.get("metadata")
-                    else {},
-                    created_at=datetime.fromisoformat(hit.entity.get("created_at")),
-                )
-                documents.append(doc)
+                documents.append(_create_document(hit.entity, contents))
 
         return documents
 
@@ -224,26 +205,8 @@ class MilvusVectorStore:
             ],
         )
 
-        documents = []
-        for result in results:
-            documents.append(
-                DocumentSource(
-                    id=result.get("id"),
-                    title=result.get("title"),
-                    content=result.get("content"),
-                    source_type=DocumentType(result.get("source_type")),
-                    url=result.get("url") if result.get("url") else None,
-                    file_path=result.get("file_path")
-                    if result.get("file_path")
-                    else None,
-                    metadata=eval(result.get("metadata"))
-                    if result.get("metadata")
-                    else {},
-                    created_at=datetime.fromisoformat(result.get("created_at")),
-                )
-            )
-
-        return documents
+        contents: Dict[str, str] = {}
+        return [_create_document(result, contents) for result in results]
 
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document by ID."""
@@ -276,7 +239,26 @@ class MilvusVectorStore:
 
 
 def store_documents(documents: List[DocumentSource]) -> List[str]:
-    """Store documents in the vector database."""
+    """Store documents in the vector database in batches."""
+    stored_ids = []
+
+    batch_size = config.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start : start + batch_size]
+        try:
+            stored_ids.extend(get_vector_store().add_documents(batch))
+        except Exception as e:
+            logger.error(
+                f"Error storing batch of {len(batch)} documents, reason: {e}. Storing one by one.",
+                exc_info=True,
+            )
+            stored_ids.extend(_store_documents_one_by_one(batch))
+
+    return stored_ids
+
+
+def _store_documents_one_by_one(documents: List[DocumentSource]) -> List[str]:
+    """Store documents one by one, skipping the documents that fail."""
     stored_ids = []
 
     for document in documents:
@@ -292,16 +274,37 @@ def store_documents(documents: List[DocumentSource]) -> List[str]:
     return stored_ids
 
 
-def search_local_documents(query: str, top_k: int = 5) -> List[DocumentSource]:
+def search_local_documents(
+    query: str, top_k: int = 5, query_embedding: Optional[List[float]] = None
+) -> List[DocumentSource]:
     """Search for relevant documents in the local vector database."""
     try:
-        documents = get_vector_store().search_similar(query, top_k=top_k)
+        documents = get_vector_store().search_similar(
+            query, top_k=top_k, query_embedding=query_embedding
+        )
         return documents
     except Exception as e:
         logger.error(f"Error searching local documents: {e}", exc_info=True)
         return []
 
 
+def get_task_query(state: AgentState) -> str:
+    """Get the query of the research task to search the vector database."""
+    return f"{state.task.topic} {state.task.requirements}"
+
+
+def embed_task_query(state: AgentState) -> Optional[List[float]]:
+    """Embed the query of the research task once, the embedding is kept in the state."""
+    if state.task_query_embedding is None:
+        try:
+            state.task_query_embedding = get_vector_store()._get_embedding(
+                get_task_query(state)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to embed research task query: {e}")
+    return state.task_query_embedding
+
+
 def query_document(expr: str) -> List[DocumentSource]:
     """Retrieve a document using a query expression from the vector database."""
     try:
@@ -333,6 +336,58 @@ def get_documents_by_file_path(file_path: str) -> List[DocumentSource]:
         raise e
 
 
+def _create_document(entity: Any, contents: Dict[str, str]) -> DocumentSource:
+    """Create a document from the Milvus entity, sharing the repeated strings.
+
+    The identical contents within the results share one string through the contents
+    pool, and the URLs and file paths repeated by the chunks of a source are interned.
+    """
+    content = entity.get("content")
+    url = entity.get("url")
+    file_path = entity.get("file_path")
+    metadata = entity.get("metadata")
+    return DocumentSource(
+        id=entity.get("id"),
+        title=entity.get("title"),
+        content=contents.setdefault(content, content),
+        source_type=DocumentType(entity.get("source_type")),
+        url=sys.intern(url) if url else None,
+        file_path=sys.intern(file_path) if file_path else None,
+        metadata=eval(metadata) if metadata else {},
+        created_at=datetime.fromisoformat(entity.get("created_at")),
+    )
+
+
+def _truncate_document_fields(document: DocumentSource) -> List[str]:
+    """Truncate the document fields to fit Milvus schema limits."""
+    truncated_title = _truncate_field(document.title, 500)
+    truncated_content = _truncate_field(document.content, 65535)
+    truncated_url = _truncate_field(document.url or "", 1000)
+    truncated_file_path = _truncate_field(document.file_path or "", 500)
+
+    # Log if truncation occurred
+    if len(document.title) > 500:
+        logger.warning(
+            f"Title truncated from {len(document.title)} to {len(truncated_title)} characters: {document.title[:100]}..."
+        )
+    if len(document.content) > 65535:
+        logger.warning(
+            f"Content truncated from {len(document.content)} to {len(truncated_content)} characters"
+        )
+    if document.url and len(document.url) > 1000:
+        logger.warning(
+            f"URL truncated from {len(document.url)} to {len(truncated_url)} characters"
+        )
+
+    return [
+        truncated_title,
+        truncated_content,
+        document.source_type.value,
+        truncated_url,
+        truncated_file_path,
+    ]
+
+
 def _truncate_field(text: str, max_length: int) -> str:
     """Truncate text to fit within the specified maximum length."""
     if len(text) <= max_length:
@@ -0,0 +1,7 @@
+import os
+
+# The configuration requires an OpenAI API key at import time, but the unit tests
+# never call the API. The persistent caches are disabled to keep tests hermetic.
+os.environ.setdefault("OPENAI_API_KEY", "test-api-key")
+os.environ.setdefault("ENABLE_LLM_CACHE", "False")
+os.environ.setdefault("ENABLE_SEMANTIC_OUTLINE_CACHE", "False")
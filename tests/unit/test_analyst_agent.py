@@ -0,0 +1,397 @@
+"""
+Unit tests for AnalystAgent.
+
+Tests the batched relevance and quality assessment with a mocked LLM.
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from phd_agent.agents.analyst_agent import AnalystAgent
+from phd_agent.models import (
+    AgentState,
+    DocumentAssessmentBatchOutput,
+    DocumentAssessmentOutput,
+    DocumentQualityAssessment,
+    DocumentSource,
+    DocumentType,
+    NumberedDocumentAssessmentOutput,
+    ResearchTask,
+)
+
+
+def _documents(count):
+    return [
+        DocumentSource(
+            id=f"doc-{i}",
+            title=f"Document {i}",
+            content=f"Content {i}",
+            source_type=DocumentType.WEB,
+        )
+        for i in range(count)
+    ]
+
+
+def _assessment_fields(score=0.8, quality=0.5):
+    return {
+        "relevance_score": score,
+        "reasoning": "Relevant",
+        "key_points": ["Point"],
+        "confidence": 0.9,
+        "credibility_score": quality,
+        "information_quality": quality,
+        "currency_score": quality,
+        "overall_quality": "medium",
+        "biases_limitations": [],
+        "recommendation": "include",
+    }
+
+
+def _batch_output(numbers, score=0.8):
+    return DocumentAssessmentBatchOutput(
+        assessments=[
+            NumberedDocumentAssessmentOutput(
+                document_number=number, **_assessment_fields(score)
+            )
+            for number in numbers
+        ]
+    )
+
+
+@pytest.fixture
+def agent():
+    """Create an analyst agent with a mocked LLM."""
+    agent = AnalystAgent()
+    agent.llm = MagicMock()
+    return agent
+
+
+@pytest.fixture
+def structured_llm(agent):
+    """The mocked structured output model of the agent LLM."""
+    return agent.llm.with_structured_output.return_value
+
+
+def test_assess_documents_relevance_single_call_per_batch(agent, structured_llm):
+    """Test that a batch of documents is assessed with one LLM call."""
+    documents = _documents(3)
+    structured_llm.invoke.return_value = _batch_output([1, 2, 3])
+
+    assessments = agent.assess_documents_relevance(documents, "Topic", "Requirements")
+
+    structured_llm.invoke.assert_called_once()
+    agent.llm.with_structured_output.assert_called_with(DocumentAssessmentBatchOutput)
+    prompt = structured_llm.invoke.call_args[0][0][-1].content
+    assert "Document 3:" in prompt and "Content 2" in prompt
+    assert [a.document_id for a in assessments] == ["doc-0", "doc-1", "doc-2"]
+    assert all(a.relevance_score == 0.8 for a in assessments)
+
+
+def test_assess_documents_relevance_splits_batches(agent, structured_llm):
+    """Test that the documents are split into batches of the configured size."""
+    # the batches are assessed concurrently, so the output is chosen by the prompt
+    structured_llm.invoke.side_effect = lambda messages: _batch_output(
+        [1, 2] if "Document 2:" in messages[-1].content else [1]
+    )
+
+    with patch("phd_agent.agents.analyst_agent.config.RELEVANCE_BATCH_SIZE", 2):
+        assessments = agent.assess_documents_relevance(
+            _documents(3), "Topic", "Requirements"
+        )
+
+    assert structured_llm.invoke.call_count == 2
+    assert len(assessments) == 3
+
+
+def test_assess_documents_assesses_batches_in_threads(agent, structured_llm):
+    """Test that the synchronous assessment sends the batches to the LLM concurrently."""
+    # every batch waits until all the batches have been sent to the LLM
+    barrier = threading.Barrier(2, timeout=5)
+
+    def invoke(messages):
+        barrier.wait()
+        return _batch_output([1, 2] if "Document 2:" in messages[-1].content else [1])
+
+    structured_llm.invoke.side_effect = invoke
+
+    with patch("phd_agent.agents.analyst_agent.config.RELEVANCE_BATCH_SIZE", 2):
+        assessments = agent.assess_documents(_documents(3), "Topic", "Requirements")
+
+    assert [relevance.document_id for relevance, _ in assessments] == [
+        "doc-0",
+        "doc-1",
+        "doc-2",
+    ]
+    assert all(relevance.confidence == 0.9 for relevance, _ in assessments)
+
+
+def test_assess_documents_relevance_missing_documents_fall_back(agent, structured_llm):
+    """Test that the documents missing from the batch response are assessed one by one."""
+    structured_llm.invoke.side_effect = [
+        _batch_output([1, 3]),
+        DocumentAssessmentOutput(**_assessment_fields(0.3)),
+    ]
+
+    assessments = agent.assess_documents_relevance(
+        _documents(3), "Topic", "Requirements"
+    )
+
+    assert structured_llm.invoke.call_count == 2
+    assert [a.relevance_score for a in assessments] == [0.8, 0.3, 0.8]
+
+
+def test_assess_document_error_falls_back_to_default(agent, structured_llm):
+    """Test that a failed LLM call returns the default assessments."""
+    structured_llm.invoke.side_effect = ValueError("Invalid output")
+
+    relevance, quality = agent.assess_document(
+        _documents(1)[0], "Topic", "Requirements"
+    )
+
+    assert relevance.relevance_score == 0.5 and relevance.confidence == 0.0
+    assert "Invalid output" in relevance.reasoning
+    assert quality.recommendation == "include"
+
+
+def test_filter_documents_by_relevance_sets_scores(agent, structured_llm):
+    """Test that the documents below the threshold are filtered out."""
+    documents = _documents(2)
+    structured_llm.invoke.return_value = DocumentAssessmentBatchOutput(
+        assessments=[
+            NumberedDocumentAssessmentOutput(
+                document_number=1, **_assessment_fields(0.9)
+            ),
+            NumberedDocumentAssessmentOutput(
+                document_number=2, **_assessment_fields(0.2)
+            ),
+        ]
+    )
+
+    relevant, assessments = agent.filter_documents_by_relevance(
+        documents, "Topic", "Requirements", threshold=0.5
+    )
+
+    assert relevant == [documents[0]]
+    assert [doc.relevance_score for doc in documents] == [0.9, 0.2]
+
+
+def test_run_assesses_relevance_and_quality_together(agent, structured_llm):
+    """Test that the analysis assesses the relevance and the quality in one LLM call."""
+    documents = _documents(3)
+    structured_llm.invoke.return_value = DocumentAssessmentBatchOutput(
+        assessments=[
+            NumberedDocumentAssessmentOutput(
+                document_number=1, **_assessment_fields(0.9, quality=0.4)
+            ),
+            NumberedDocumentAssessmentOutput(
+                document_number=2, **_assessment_fields(0.1)
+            ),
+            NumberedDocumentAssessmentOutput(
+                document_number=3, **_assessment_fields(0.8, quality=0.9)
+            ),
+        ]
+    )
+    state = AgentState(
+        task=ResearchTask(id="task", topic="Topic", requirements="Requirements"),
+        documents=documents,
+    )
+
+    with patch("phd_agent.agents.analyst_agent.config.RELEVANCE_THRESHOLD", 0.5):
+        state = agent.run(state)
+
+    structured_llm.invoke.assert_called_once()
+    assert state.documents == [documents[2], documents[0]]
+    assert len(state.analysis_results.relevance_assessments) == 3
+
+
+def test_aassess_documents_assesses_batches_concurrently(agent, structured_llm):
+    """Test that the batches are assessed concurrently and keep the document order."""
+    started = []
+
+    async def ainvoke(messages):
+        prompt = messages[-1].content
+        started.append(prompt)
+        # every batch waits until all the batches have been sent to the LLM
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        return _batch_output([1, 2] if "Document 2:" in prompt else [1])
+
+    structured_llm.ainvoke = AsyncMock(side_effect=ainvoke)
+
+    with patch("phd_agent.agents.analyst_agent.config.RELEVANCE_BATCH_SIZE", 2):
+        assessments = asyncio.run(
+            agent.aassess_documents(_documents(3), "Topic", "Requirements")
+        )
+
+    assert structured_llm.ainvoke.call_count == 2
+    assert [relevance.document_id for relevance, _ in assessments] == [
+        "doc-0",
+        "doc-1",
+        "doc-2",
+    ]
+
+
+def test_assess_documents_reuses_cached_assessments(agent, structured_llm):
+    """Test that only the documents missing from the assessment cache are sent to the LLM."""
+    cache = MagicMock()
+    cache.lookup.return_value = [None, {"relevance_score": 0.4}, None]
+    structured_llm.invoke.return_value = _batch_output([1, 2])
+
+    with patch(
+        "phd_agent.agents.analyst_agent.config.ENABLE_SEMANTIC_ASSESSMENT_CACHE", True
+    ), patch("phd_agent.agents.analyst_agent.get_assessment_cache", return_value=cache):
+        assessments = agent.assess_documents(_documents(3), "Topic", "Requirements")
+
+    prompt = structured_llm.invoke.call_args[0][0][-1].content
+    assert "Content 1" not in prompt and "Content 2" in prompt
+    assert [relevance.relevance_score for relevance, _ in assessments] == [
+        0.8,
+        0.4,
+        0.8,
+    ]
+    stored = cache.store.call_args[0][1]
+    assert [data["relevance_score"] for data in stored] == [0.8, 0.8]
+
+
+def test_assessments_served_from_exact_cache(tmpdir):
+    """Test that a repeated assessment prompt is answered by the exact-match cache."""
+    llm = MagicMock()
+    llm.model_name = "test-model"
+    llm.temperature = 0.7
+    structured_llm = llm.with_structured_output.return_value
+    structured_llm.invoke.return_value = _batch_output([1, 2])
+
+    with patch("phd_agent.agents.analyst_agent.get_chat", return_value=llm), patch(
+        "phd_agent.agents.analyst_agent.config.ENABLE_LLM_CACHE", True
+    ), patch(
+        "phd_agent.agents.analyst_agent.config.LLM_CACHE_PATH",
+        str(tmpdir / "cache.sqlite"),
+    ):
+        agent = AnalystAgent()
+        first = agent.assess_documents(_documents(2), "Topic", "Requirements")
+        second = agent.assess_documents(_documents(2), "Topic", "Requirements")
+
+    structured_llm.invoke.assert_called_once()
+    assert first == second
+
+
+def test_assess_documents_prefilter_rejects_dissimilar_documents(agent, structured_llm):
+    """Test that the documents dissimilar to the research task are not sent to the LLM."""
+    embedding_model = MagicMock()
+    # the research task, then the documents
+    embedding_model.embed_documents.return_value = [
+        [1.0, 0.0],
+        [0.9, 0.1],
+        [0.1, 0.9],
+    ]
+    structured_llm.invoke.return_value = _batch_output([1])
+
+    with patch(
+        "phd_agent.agents.analyst_agent.config.ENABLE_EMBEDDING_PREFILTER", True
+    ), patch(
+        "phd_agent.agents.analyst_agent.get_embeddings", return_value=embedding_model
+    ):
+        assessments = agent.assess_documents(_documents(2), "Topic", "Requirements")
+
+    prompt = structured_llm.invoke.call_args[0][0][-1].content
+    assert "Content 0" in prompt and "Content 1" not in prompt
+    assert assessments[0][0].relevance_score == 0.8
+    assert assessments[1][0].relevance_score == pytest.approx(0.11, abs=0.01)
+
+
+def test_assess_document_quality_uses_quality_model(agent):
+    """Test that the quality of a single document is assessed by the configured model."""
+    quality_llm = MagicMock()
+    quality_llm.with_structured_output.return_value.invoke.return_value = (
+        DocumentAssessmentOutput(**_assessment_fields(quality=0.9))
+    )
+
+    with patch(
+        "phd_agent.agents.analyst_agent.config.ANALYST_QUALITY_MODEL", "small-model"
+    ), patch(
+        "phd_agent.agents.analyst_agent._create_llm", return_value=quality_llm
+    ) as create_llm:
+        quality = agent.assess_document_quality(_documents(1)[0])
+
+    create_llm.assert_called_once_with("small-model")
+    agent.llm.with_structured_output.assert_not_called()
+    assert quality.credibility_score == 0.9
+
+
+def test_rank_documents_by_quality_limit_keeps_order(agent):
+    """Test that the limited ranking returns the top documents in the full ranking order."""
+    documents = _documents(5)
+    qualities = [
+        DocumentQualityAssessment(
+            document_id=document.id,
+            credibility_score=score,
+            information_quality=score,
+            currency_score=score,
+            overall_quality="medium",
+            biases_limitations=[],
+            recommendation="include",
+        )
+        for document, score in zip(documents, [0.5, 0.9, 0.5, 0.7, 0.1])
+    ]
+
+    ranked = agent.rank_documents_by_quality(documents, qualities)
+    top = agent.rank_documents_by_quality(documents, qualities, limit=3)
+
+    assert top == ranked[:3] == [documents[1], documents[3], documents[0]]
+
+
+def test_assess_documents_deduplicates_identical_content(agent, structured_llm):
+    """Test that the documents with the same content are assessed once."""
+    documents = _documents(2)
+    documents.append(
+        DocumentSource(
+            id="doc-copy",
+            title="Copy",
+            content="  content   0 ",
+            source_type=DocumentType.WEB,
+        )
+    )
+    structured_llm.invoke.return_value = _batch_output([1, 2])
+
+    assessments = agent.assess_documents(documents, "Topic", "Requirements")
+
+    prompt = structured_llm.invoke.call_args[0][0][-1].content
+    assert "Document 3:" not in prompt
+    assert [relevance.document_id for relevance, _ in assessments] == [
+        "doc-0",
+        "doc-1",
+        "doc-copy",
+    ]
+    assert assessments[2][1].document_id == "doc-copy"
+
+
+def test_batch_assessment_skips_semantic_cache(tmpdir):
+    """Test that the batch prompts are not answered by the semantic LLM cache."""
+    llm = MagicMock()
+    llm.model_name = "test-model"
+    llm.temperature = 0.7
+    structured_llm = llm.with_structured_output.return_value
+    structured_llm.invoke.return_value = _batch_output([1, 2])
+    embedding_model = MagicMock()
+
+    with patch("phd_agent.agents.analyst_agent.get_chat", return_value=llm), patch(
+        "phd_agent.agents.analyst_agent.get_embeddings", return_value=embedding_model
+    ), patch(
+        "phd_agent.agents.analyst_agent.config.ENABLE_SEMANTIC_LLM_CACHE", True
+    ), patch(
+        "phd_agent.agents.analyst_agent.config.ENABLE_LLM_CACHE", False
+    ), patch(
+        "phd_agent.agents.analyst_agent.config.LLM_CACHE_PATH",
+        str(tmpdir / "cache.sqlite"),
+    ):
+        agent = AnalystAgent()
+        assessments = agent.assess_documents(_documents(2), "Topic", "Requirements")
+
+    assert agent.batch_assessment_llm is structured_llm
+    assert agent.assessment_llm is not structured_llm
+    structured_llm.invoke.assert_called_once()
+    embedding_model.embed_query.assert_not_called()
+    assert [relevance.relevance_score for relevance, _ in assessments] == [0.8, 0.8]
@@ -0,0 +1,86 @@
+"""
+Unit tests for assessment_cache module.
+
+Tests the semantic cache of the document assessments.
+"""
+
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from phd_agent.assessment_cache import SemanticAssessmentCache
+from phd_agent.models import DocumentSource, DocumentType
+
+
+@pytest.fixture
+def embedding_model():
+    """Create a mocked embedding model."""
+    model = MagicMock()
+    model.embed_documents.return_value = [[1.0, 0.0], [0.0, 1.0]]
+    return model
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return os.path.join(tmpdir, "cache.sqlite")
+
+
+def _documents():
+    return [
+        DocumentSource(
+            title=f"Document {i}", content=f"Content {i}", source_type=DocumentType.WEB
+        )
+        for i in range(2)
+    ]
+
+
+def test_lookup_similar_document_hits(embedding_model, cache_path):
+    """Test that the assessment of a near-identical document is reused."""
+    cache = SemanticAssessmentCache(embedding_model, cache_path, "test-model")
+    embeddings = cache.embed(_documents(), "Topic", "Requirements")
+    cache.store(embeddings[:1], [{"relevance_score": 0.8}])
+
+    embedding_model.embed_documents.return_value = [[0.999, 0.01], [0.0, 1.0]]
+    embeddings = cache.embed(_documents(), "Topic", "Requirements")
+
+    assert cache.lookup(embeddings) == [{"relevance_score": 0.8}, None]
+    embedded_text = embedding_model.embed_documents.call_args[0][0][0]
+    assert "Topic" in embedded_text and "Content 0" in embedded_text
+
+
+def test_lookup_empty_cache_misses(embedding_model, cache_path):
+    """Test that the lookup in an empty cache misses for every document."""
+    cache = SemanticAssessmentCache(embedding_model, cache_path, "test-model")
+    embeddings = cache.embed(_documents(), "Topic", "Requirements")
+
+    assert cache.lookup(embeddings) == [None, None]
+
+
+def test_assessments_persist_per_model(embedding_model, cache_path):
+    """Test that the stored assessments are reloaded only for the same model."""
+    cache = SemanticAssessmentCache(embedding_model, cache_path, "test-model")
+    embeddings = cache.embed(_documents(), "Topic", "Requirements")
+    cache.store(embeddings, [{"relevance_score": 0.8}, {"relevance_score": 0.3}])
+
+    reloaded = SemanticAssessmentCache(embedding_model, cache_path, "test-model")
+    other_model = SemanticAssessmentCache(embedding_model, cache_path, "other-model")
+
+    assert reloaded.lookup(embeddings) == [
+        {"relevance_score": 0.8},
+        {"relevance_score": 0.3},
+    ]
+    assert other_model.lookup(embeddings) == [None, None]
+
+
+def test_expired_assessments_miss(embedding_model, cache_path):
+    """Test that the expired assessments are not reused."""
+    cache = SemanticAssessmentCache(
+        embedding_model, cache_path, "test-model", ttl_secs=60
+    )
+    embeddings = cache.embed(_documents(), "Topic", "Requirements")
+    cache.store(embeddings, [{"relevance_score": 0.8}, {"relevance_score": 0.3}])
+    cache._created_at = [int(time.time()) - 120] * 2
+
+    assert cache.lookup(embeddings) == [None, None]
@@ -0,0 +1,515 @@
+"""
+Unit tests for essay_writer_agent module.
+
+Tests the essay generation flow of the EssayWriterAgent with a mocked LLM.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from phd_agent.agents.essay_writer_agent import (
+    EssayWriterAgent,
+    _create_basic_outline,
+    _lookup_cached_outline,
+    _prepare_research_data,
+    _validate_essay_requirements,
+)
+from phd_agent.config import config
+from phd_agent.gen_cache import GenerativeEssayCache
+from phd_agent.models import (
+    AgentState,
+    DocumentSource,
+    DocumentType,
+    Essay,
+    EssayOutline,
+    ResearchStep,
+    ResearchTask,
+)
+
+OUTLINE_DATA = {
+    "title": "AI in Education",
+    "introduction": "Introduction text",
+    "main_points": ["Point 1", "Point 2"],
+    "conclusion": "Conclusion text",
+    "sources": ["Test Source 1"],
+}
+
+
+class CharEncoding:
+    """Tokenizer stub that treats every character as a token."""
+
+    def encode(self, text):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def essay_chunks(*contents):
+    """Create the streamed chunks of an essay response."""
+    return [AIMessageChunk(content=content) for content in contents]
+
+
+async def astream_chunks(chunks):
+    """Asynchronously stream the chunks."""
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.fixture
+def state():
+    """Create a sample agent state with collected documents."""
+    task = ResearchTask(
+        id="task-1",
+        topic="AI in Education",
+        requirements="Analyze personalized learning systems",
+        max_relevant_sources=5,
+    )
+    documents = [
+        DocumentSource(
+            id="1",
+            title="Test Source 1",
+            content="Personalized learning systems adapt to students.",
+            source_type=DocumentType.WEB,
+            url="https://example.com/1",
+        ),
+    ]
+    return AgentState(task=task, documents=documents)
+
+
+@pytest.fixture
+def agent():
+    """Create an essay writer agent with a mocked LLM."""
+    agent = EssayWriterAgent()
+    agent.llm = MagicMock()
+    agent.encoding = CharEncoding()
+    return agent
+
+
+def test_run_fused_generation_single_llm_call(agent, state):
+    """Test that the fused generation creates outline and essay with one LLM call."""
+    agent.llm.invoke.return_value = AIMessage(
+        content=json.dumps({"outline": OUTLINE_DATA, "essay": "The essay text."})
+    )
+
+    with patch.object(config, "FUSED_GENERATION", True):
+        result = agent.run(state)
+
+    assert agent.llm.invoke.call_count == 1
+    assert result.current_step == ResearchStep.ESSAY_COMPLETED
+    assert result.essay_outline.title == "AI in Education"
+    assert result.final_essay.content == "The essay text."
+    assert result.final_essay.word_count == 3
+
+
+def test_run_fused_generation_falls_back_to_two_steps(agent, state):
+    """Test that an unparsable fused response falls back to separate LLM calls."""
+    agent.llm.invoke.return_value = AIMessage(content="not a json")
+    agent.outline_llm.invoke.return_value = EssayOutline(**OUTLINE_DATA)
+    agent.llm.stream.return_value = essay_chunks("The essay ", "text.")
+
+    with patch.object(config, "FUSED_GENERATION", True):
+        result = agent.run(state)
+
+    agent.llm.invoke.assert_called_once()
+    agent.llm.stream.assert_called_once()
+    agent.outline_llm.invoke.assert_called_once()
+    assert result.essay_outline.title == "AI in Education"
+    assert result.final_essay.content == "The essay text."
+
+
+def test_run_two_step_generation(agent, state):
+    """Test the separate outline and essay generation."""
+    agent.outline_llm.invoke.return_value = EssayOutline(**OUTLINE_DATA)
+    agent.llm.stream.return_value = essay_chunks("The essay ", "text.")
+
+    with patch.object(config, "FUSED_GENERATION", False):
+        result = agent.run(state)
+
+    agent.outline_llm.invoke.assert_called_once()
+    agent.llm.stream.assert_called_once()
+    assert result.essay_outline.main_points == ["Point 1", "Point 2"]
+    assert result.final_essay.content == "The essay text."
+
+
+def test_run_two_step_generation_outline_error(agent, state):
+    """Test that a failed outline call falls back to the basic outline."""
+    agent.outline_llm.invoke.side_effect = ValueError("invalid outline")
+    agent.llm.stream.return_value = essay_chunks("The essay text.")
+
+    with patch.object(config, "FUSED_GENERATION", False):
+        result = agent.run(state)
+
+    assert result.essay_outline.title == "Research on AI in Education"
+    assert result.final_essay.content == "The essay text."
+
+
+def test_basic_outlines_are_not_shared(state):
+    """Test that every fallback outline is a separate copy of the cached one."""
+    outline = _create_basic_outline(state)
+    outline.sources.append("Changed")
+
+    assert _create_basic_outline(state).sources == ["Test Source 1"]
+
+
+def test_write_essay_stops_streaming_at_upper_bound(agent, state):
+    """Test that the essay stream is abandoned once the word limit is exceeded."""
+    state.task.essay_length = "short"
+    chunks = iter(essay_chunks(*["word " * 1000] * 3))
+    agent.llm.stream.return_value = chunks
+
+    essay = agent.write_essay(state, EssayOutline(**OUTLINE_DATA))
+
+    assert essay.word_count == 2000
+    assert next(chunks).content == "word " * 1000
+
+
+def test_write_essay_trims_truncated_stream_to_sentence(agent, state):
+    """Test that the abandoned essay stream is cut back to the last full sentence."""
+    state.task.essay_length = "short"
+    sentence = "Some " + "word " * 8 + "end. "
+    chunks = iter(
+        essay_chunks(sentence * 100, sentence * 100 + "Unfin", "ished tail " * 100)
+    )
+    agent.llm.stream.return_value = chunks
+
+    essay = agent.write_essay(state, EssayOutline(**OUTLINE_DATA))
+
+    assert essay.content.endswith("end.")
+    assert essay.word_count == 2000
+
+
+def test_essay_and_combined_messages_share_prefix(agent, state):
+    """Test that the essay and combined prompts send the same research data prefix."""
+    essay_messages = agent._create_essay_messages(state, EssayOutline(**OUTLINE_DATA))
+    combined_messages = agent._create_combined_messages(state)
+
+    assert essay_messages[:2] == combined_messages[:2]
+    assert "Test Source 1" in essay_messages[1].content
+    assert '"essay": "The complete essay text..."' in combined_messages[2].content
+
+
+def test_run_without_documents(agent, state):
+    """Test that no LLM calls are made without documents."""
+    state.documents = []
+
+    result = agent.run(state)
+
+    agent.llm.invoke.assert_not_called()
+    assert result.current_step == ResearchStep.ESSAY_COMPLETED
+    assert result.final_essay is None
+
+
+def test_arun_fused_generation(agent, state):
+    """Test the asynchronous essay generation."""
+    agent.llm.ainvoke = AsyncMock(
+        return_value=AIMessage(
+            content=json.dumps({"outline": OUTLINE_DATA, "essay": "The essay text."})
+        )
+    )
+
+    with patch.object(config, "FUSED_GENERATION", True):
+        result = asyncio.run(agent.arun(state))
+
+    agent.llm.ainvoke.assert_awaited_once()
+    agent.llm.invoke.assert_not_called()
+    assert result.current_step == ResearchStep.ESSAY_COMPLETED
+    assert result.final_essay.content == "The essay text."
+
+
+def test_arun_concurrent_states(agent, state):
+    """Test that several essays can be written concurrently."""
+    agent.outline_llm.ainvoke = AsyncMock(return_value=EssayOutline(**OUTLINE_DATA))
+    agent.llm.astream = MagicMock(
+        side_effect=lambda messages: astream_chunks(essay_chunks("The essay text."))
+    )
+    other_state = state.model_copy(deep=True)
+
+    async def run_all():
+        return await asyncio.gather(agent.arun(state), agent.arun(other_state))
+
+    with patch.object(config, "FUSED_GENERATION", False):
+        results = asyncio.run(run_all())
+
+    assert agent.outline_llm.ainvoke.await_count == 2
+    assert agent.llm.astream.call_count == 2
+    assert all(result.final_essay.content == "The essay text." for result in results)
+
+
+def test_run_batch_writes_essays_concurrently(agent, state):
+    """Test that the essays of several states are written in one event loop."""
+    agent.llm.ainvoke = AsyncMock(
+        return_value=AIMessage(
+            content=json.dumps({"outline": OUTLINE_DATA, "essay": "The essay text."})
+        )
+    )
+    states = [state, state.model_copy(deep=True)]
+
+    with patch.object(config, "FUSED_GENERATION", True):
+        results = agent.run_batch(states)
+
+    assert agent.llm.ainvoke.await_count == 2
+    agent.llm.invoke.assert_not_called()
+    assert results == states
+    assert all(result.final_essay.content == "The essay text." for result in results)
+
+
+def test_submit_batch_uploads_combined_requests(agent, state):
+    """Test that the essay generation requests are submitted as one batch."""
+    agent.batch_client = MagicMock()
+    agent.batch_client.files.create.return_value.id = "file-1"
+    agent.batch_client.batches.create.return_value.id = "batch-1"
+
+    batch_id = agent.submit_batch([state])
+
+    assert batch_id == "batch-1"
+    _, content = agent.batch_client.files.create.call_args.kwargs["file"]
+    request = json.loads(content)
+    assert request["custom_id"] == "task-1"
+    assert request["body"]["messages"][0]["role"] == "system"
+    assert "AI in Education" in request["body"]["messages"][-1]["content"]
+    agent.batch_client.batches.create.assert_called_once_with(
+        input_file_id="file-1",
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+
+def test_collect_batch_completes_states(agent, state):
+    """Test that the batch output is parsed into the essays of the states."""
+    other_state = state.model_copy(deep=True)
+    other_state.task.id = "task-2"
+    content = json.dumps({"outline": OUTLINE_DATA, "essay": "The essay text."})
+    output = json.dumps(
+        {
+            "custom_id": "task-1",
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": content}}]},
+            },
+        }
+    )
+    agent.batch_client = MagicMock()
+    agent.batch_client.batches.retrieve.return_value.status = "completed"
+    agent.batch_client.files.content.return_value.text = output
+
+    results = agent.collect_batch("batch-1", [state, other_state])
+
+    assert results[0].final_essay.content == "The essay text."
+    assert results[0].current_step == ResearchStep.ESSAY_COMPLETED
+    assert results[1].final_essay is None and len(results[1].errors) == 1
+
+
+def test_collect_batch_running(agent, state):
+    """Test that nothing is collected while the batch is running."""
+    agent.batch_client = MagicMock()
+    agent.batch_client.batches.retrieve.return_value.status = "in_progress"
+
+    assert agent.collect_batch("batch-1", [state]) is None
+    agent.batch_client.files.content.assert_not_called()
+
+
+def test_prepare_research_data_format():
+    """Test the layout of the research data passed to the essay prompt."""
+    documents = [
+        DocumentSource(
+            title="Web Source",
+            content="Short content",
+            source_type=DocumentType.WEB,
+            url="https://example.com/1",
+        ),
+        DocumentSource(
+            title="PDF Source",
+            content="x" * 900,
+            source_type=DocumentType.PDF,
+        ),
+    ]
+
+    research_data = _prepare_research_data(documents, CharEncoding(), 1600)
+
+    separator = "-" * 50
+    assert research_data == (
+        "Source 1: Web Source\n"
+        "Type: web\n"
+        "URL: https://example.com/1\n"
+        "Content: Short content\n"
+        f"{separator}\n"
+        "\n"
+        "Source 2: PDF Source\n"
+        "Type: pdf\n"
+        f"Content: {'x' * 800}...\n"
+        f"{separator}\n"
+    )
+
+
+def test_prepare_research_data_limits_sources():
+    """Test that at most 15 sources are included in the research data."""
+    documents = [
+        DocumentSource(
+            title=f"Source {i}", content="text", source_type=DocumentType.WEB
+        )
+        for i in range(20)
+    ]
+
+    research_data = _prepare_research_data(documents, CharEncoding(), 8000)
+
+    assert research_data.count("Type: web") == 15
+
+
+def test_prepare_research_data_skips_encoding_within_budget():
+    """Test that documents already within the token budget are not encoded."""
+    documents = [
+        DocumentSource(title="Source", content="text", source_type=DocumentType.WEB)
+    ]
+    encoding = MagicMock()
+
+    research_data = _prepare_research_data(documents, encoding, 8000)
+
+    assert "Content: text\n" in research_data
+    encoding.encode.assert_not_called()
+
+
+def test_prepare_research_data_skips_empty_and_orders_by_relevance():
+    """Test that empty sources are dropped and the most relevant come first."""
+    documents = [
+        DocumentSource(
+            title="Low",
+            content="low",
+            source_type=DocumentType.WEB,
+            relevance_score=0.2,
+        ),
+        DocumentSource(title="Empty", content="  ", source_type=DocumentType.WEB),
+        DocumentSource(
+            title="High",
+            content="high",
+            source_type=DocumentType.WEB,
+            relevance_score=0.9,
+        ),
+    ]
+
+    research_data = _prepare_research_data(documents, CharEncoding(), 8000)
+
+    assert "Empty" not in research_data
+    assert research_data.index("Source 1: High") < research_data.index("Source 2: Low")
+
+
+def test_prepare_research_data_truncates_tail_sources():
+    """Test that only the top 5 sources keep their full content."""
+    documents = [
+        DocumentSource(
+            title=f"Source {i}", content="y" * 400, source_type=DocumentType.WEB
+        )
+        for i in range(7)
+    ]
+
+    research_data = _prepare_research_data(documents, CharEncoding(), 8000)
+
+    assert research_data.count(f"Content: {'y' * 400}\n") == 5
+    assert research_data.count(f"Content: {'y' * 150}...\n") == 2
+
+
+def test_validate_essay_requirements_topic_coverage():
+    """Test that the topic coverage counts the requirement words found in the essay."""
+    essay = Essay(
+        id="essay-1",
+        title="AI in Education",
+        content="Artificial intelligence changes education. Students benefit.",
+        outline=EssayOutline(**OUTLINE_DATA),
+        sources=[],
+        word_count=7,
+    )
+
+    result = _validate_essay_requirements(
+        essay, "Discuss education, students and teachers"
+    )
+
+    assert result.topic_coverage_score == pytest.approx(2 / 4)
+    assert result.covers_topic
+
+
+def test_validate_essay_requirements_matches_word_forms():
+    """Test that topic words are found inside longer words of the essay."""
+    essay = Essay(
+        id="essay-1",
+        title="Learning",
+        content="Machine learning models are evaluated on benchmarks.",
+        outline=EssayOutline(**OUTLINE_DATA),
+        sources=[],
+        word_count=7,
+    )
+
+    result = _validate_essay_requirements(essay, "Learn about model evaluation")
+
+    assert result.topic_coverage_score == pytest.approx(2 / 4)
+
+
+def test_agent_creates_llm_on_first_use():
+    """Test that the chat model is only created when first accessed."""
+    with patch("phd_agent.agents.essay_writer_agent.get_chat") as get_chat:
+        agent = EssayWriterAgent()
+        get_chat.assert_not_called()
+
+        assert agent.llm is agent.llm
+        get_chat.assert_called_once_with(config.OPENAI_MODEL, config.TEMPERATURE)
+
+
+def test_write_essay_synthesized_from_generative_cache(agent, state):
+    """Test that the essay of a similar task is reused, rewriting changed sections."""
+    embedding_model = MagicMock()
+    embedding_model.embed_query.return_value = [1.0, 0.0]
+    with patch("phd_agent.gen_cache.get_embeddings", return_value=embedding_model):
+        gen_cache = GenerativeEssayCache()
+    agent.llm.stream.return_value = essay_chunks("AI in Education\n\nBody text.")
+    agent.llm.invoke.return_value = AIMessage(
+        content=json.dumps({"sections": ["AI in Healthcare"]})
+    )
+    outline = EssayOutline(**OUTLINE_DATA)
+
+    with (
+        patch.object(config, "ENABLE_GEN_CACHE", True),
+        patch(
+            "phd_agent.agents.essay_writer_agent.get_gen_cache", return_value=gen_cache
+        ),
+        patch(
+            "phd_agent.agents.essay_writer_agent.embed_task_query",
+            return_value=[1.0, 0.0],
+        ),
+    ):
+        agent.write_essay(state, outline)
+        state.task.topic = "AI in Healthcare"
+        essay = agent.write_essay(state, outline)
+
+    # the embedding of the research task query is reused by the cache
+    embedding_model.embed_query.assert_not_called()
+    agent.llm.stream.assert_called_once()
+    agent.llm.invoke.assert_called_once()
+    assert essay.content == "AI in Healthcare\n\nBody text."
+
+
+def test_cached_outline_keeps_current_sources(state):
+    """Test that the cached outline is looked up by essay length and cites the current sources."""
+    outline_cache = MagicMock()
+    outline_cache.lookup.return_value = EssayOutline(
+        **{**OUTLINE_DATA, "sources": ["Test Source 1", "Earlier Source"]}
+    )
+    state.task.essay_length = "long"
+
+    with (
+        patch.object(config, "ENABLE_SEMANTIC_OUTLINE_CACHE", True),
+        patch(
+            "phd_agent.agents.essay_writer_agent.get_outline_cache",
+            return_value=outline_cache,
+        ),
+        patch(
+            "phd_agent.agents.essay_writer_agent.embed_task_query",
+            return_value=[1.0, 0.0],
+        ),
+    ):
+        outline = _lookup_cached_outline(state)
+
+    assert outline.sources == ["Test Source 1"]
+    assert outline_cache.lookup.call_args[0][2] == "long"
@@ -16,6 +16,7 @@ from phd_agent.file_utils import (
     write_essay_pdf,
     write_essay_docx,
     write_essay,
+    write_essay_files,
     get_supported_formats,
 )
 
@@ -254,6 +255,23 @@ def test_write_essay_creates_directory(sample_essay, tmpdir):
     assert os.path.exists(nested_dir)
 
 
+def test_write_essay_files_multiple_formats(sample_essay, tmpdir):
+    """Test writing an essay to multiple files, keeping the order of the results."""
+    output_paths = [
+        os.path.join(tmpdir, "essay.txt"),
+        os.path.join(tmpdir, "essay.xyz"),
+        os.path.join(tmpdir, "nested", "essay.txt"),
+    ]
+
+    with patch("phd_agent.file_utils.write_essay_txt", return_value=True) as write_txt:
+        results = write_essay_files(sample_essay, output_paths)
+
+    assert results == [True, True, True]
+    assert sorted(call.args[1] for call in write_txt.call_args_list) == sorted(
+        [output_paths[0], output_paths[1] + ".txt", output_paths[2]]
+    )
+
+
 def test_get_supported_formats_all_available():
     """Test get_supported_formats when all dependencies are available."""
     formats = get_supported_formats()
@@ -0,0 +1,105 @@
+"""
+Unit tests for gen_cache module.
+
+Tests the synthesis of essays from the cached essays of similar research tasks.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from phd_agent.gen_cache import GenerativeEssayCache, get_template_id
+from phd_agent.llm_utils import create_prompt_template
+
+ESSAY = (
+    "AI in Education\n\n"
+    "Artificial intelligence is changing how students learn.\n\n"
+    "This essay reviews AI in Education and its impact."
+)
+
+
+@pytest.fixture
+def cache():
+    """Create a generative cache with mocked embeddings."""
+    embedding_model = MagicMock()
+    embedding_model.embed_query.return_value = [1.0, 0.0]
+    with patch("phd_agent.gen_cache.get_embeddings", return_value=embedding_model):
+        return GenerativeEssayCache()
+
+
+def test_lookup_empty_cache(cache):
+    """Test that nothing is found in the empty cache."""
+    assert cache.lookup("template", {"topic": "AI in Education"}) is None
+
+
+def test_lookup_same_slots_reuses_essay(cache):
+    """Test that the essay with the same slot values is reused as is."""
+    cache.store("template", {"topic": "AI in Education"}, ESSAY)
+
+    hit = cache.lookup("template", {"topic": "AI in Education"})
+
+    assert hit.rewrite_indices == []
+    assert hit.content() == ESSAY
+
+
+def test_lookup_changed_slots_marks_sections_to_rewrite(cache):
+    """Test that only the sections mentioning the changed slots are rewritten."""
+    cache.store("template", {"topic": "AI in Education"}, ESSAY)
+
+    hit = cache.lookup("template", {"topic": "AI in Healthcare"})
+
+    assert hit.rewrite_indices == [0, 2]
+    assert hit.sections[1] == "Artificial intelligence is changing how students learn."
+    assert hit.content(["Title", "Summary"]) == (
+        "Title\n\nArtificial intelligence is changing how students learn.\n\nSummary"
+    )
+
+
+def test_lookup_below_threshold(cache):
+    """Test that essays of dissimilar research tasks are not reused."""
+    cache.store("template", {"topic": "AI in Education"}, ESSAY)
+    cache.embedding_model.embed_query.return_value = [0.0, 1.0]
+
+    assert cache.lookup("template", {"topic": "Ocean currents"}) is None
+
+
+def test_lookup_other_template(cache):
+    """Test that essays generated with other prompts are not reused."""
+    cache.store("template", {"topic": "AI in Education"}, ESSAY)
+
+    assert cache.lookup("other-template", {"topic": "AI in Education"}) is None
+
+
+def test_get_template_id_ignores_variables():
+    """Test that the template identifier depends on the prompt structure only."""
+    prompt = create_prompt_template("System", "Topic: {topic}", model="gpt-4.1-mini")
+    other_prompt = create_prompt_template("System", "Title: {topic}", "gpt-4.1-mini")
+
+    assert get_template_id(prompt) == get_template_id(prompt.partial(topic="AI"))
+    assert get_template_id(prompt) != get_template_id(other_prompt)
+
+
+def test_lookup_most_similar_entry(cache):
+    """Test that the essay with the most similar slot values is synthesized."""
+    cache.store("template", {"topic": "Ocean currents"}, "Ocean currents", [0.0, 1.0])
+    cache.store("template", {"topic": "AI in Education"}, ESSAY, [1.0, 0.0])
+
+    hit = cache.lookup("template", {"topic": "AI in Education"}, [0.9, 0.1])
+
+    assert hit.content() == ESSAY
+    assert hit.similarity == pytest.approx(0.994, abs=0.001)
+    cache.embedding_model.embed_query.assert_not_called()
+
+
+def test_store_keeps_latest_entries():
+    """Test that the oldest essays are dropped when the template is full."""
+    with patch("phd_agent.gen_cache.get_embeddings", return_value=MagicMock()):
+        cache = GenerativeEssayCache(max_entries=2)
+    for i in range(3):
+        cache.store("template", {"topic": f"Topic {i}"}, f"Essay {i}", [1.0, float(i)])
+
+    assert len(cache._entries["template"]) == cache._embeddings["template"].shape[0]
+    assert [entry.content_template for entry in cache._entries["template"]] == [
+        "Essay 1",
+        "Essay 2",
+    ]
@@ -0,0 +1,167 @@
+"""
+Unit tests for llm_cache module.
+
+Tests the exact-match cache wrapper around chat model invocations.
+"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    SystemMessage,
+)
+from pydantic import BaseModel
+
+from phd_agent.llm_cache import CachedLLM
+
+
+@pytest.fixture
+def inner_llm():
+    """Create a mocked chat model."""
+    llm = MagicMock()
+    llm.model_name = "test-model"
+    llm.temperature = 0.7
+    llm.invoke.return_value = AIMessage(content="LLM response")
+    return llm
+
+
+@pytest.fixture
+def messages():
+    """Create a sample prompt."""
+    return [SystemMessage(content="System prompt"), HumanMessage(content="Question")]
+
+
+def test_invoke_miss_calls_llm(inner_llm, messages, tmpdir):
+    """Test that a cache miss invokes the wrapped model."""
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    response = cached_llm.invoke(messages)
+
+    assert response.content == "LLM response"
+    inner_llm.invoke.assert_called_once_with(messages)
+
+
+def test_invoke_hit_skips_llm(inner_llm, messages, tmpdir):
+    """Test that a repeated prompt is served from the cache."""
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    cached_llm.invoke(messages)
+    response = cached_llm.invoke(messages)
+
+    assert isinstance(response, AIMessage)
+    assert response.content == "LLM response"
+    assert inner_llm.invoke.call_count == 1
+
+
+def test_cache_persists_between_instances(inner_llm, messages, tmpdir):
+    """Test that cached responses survive re-opening the database."""
+    cache_path = os.path.join(tmpdir, "cache.sqlite")
+    CachedLLM(inner_llm, cache_path=cache_path).invoke(messages)
+
+    response = CachedLLM(inner_llm, cache_path=cache_path).invoke(messages)
+
+    assert response.content == "LLM response"
+    assert inner_llm.invoke.call_count == 1
+
+
+def test_different_prompts_are_not_shared(inner_llm, messages, tmpdir):
+    """Test that different prompts produce different cache keys."""
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    cached_llm.invoke(messages)
+    cached_llm.invoke([HumanMessage(content="Another question")])
+
+    assert inner_llm.invoke.call_count == 2
+
+
+def test_different_temperature_is_not_shared(inner_llm, messages, tmpdir):
+    """Test that the model parameters are part of the cache key."""
+    cache_path = os.path.join(tmpdir, "cache.sqlite")
+    CachedLLM(inner_llm, cache_path=cache_path).invoke(messages)
+
+    inner_llm.temperature = 0.0
+    CachedLLM(inner_llm, cache_path=cache_path).invoke(messages)
+
+    assert inner_llm.invoke.call_count == 2
+
+
+def test_expired_entry_calls_llm(inner_llm, messages, tmpdir):
+    """Test that expired entries are ignored."""
+    cached_llm = CachedLLM(
+        inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"), ttl_secs=60
+    )
+    cached_llm.invoke(messages)
+
+    with patch("phd_agent.llm_cache.time.time", return_value=time.time() + 120):
+        cached_llm.invoke(messages)
+
+    assert inner_llm.invoke.call_count == 2
+
+
+class Answer(BaseModel):
+    """Structured output used in the tests."""
+
+    text: str
+
+
+def test_structured_output_hit_skips_llm(inner_llm, messages, tmpdir):
+    """Test that a repeated prompt is served from the cache as the structured output."""
+    structured_llm = inner_llm.with_structured_output.return_value
+    structured_llm.invoke.return_value = Answer(text="Structured response")
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+    cached_structured_llm = cached_llm.with_structured_output(Answer)
+
+    cached_structured_llm.invoke(messages)
+    output = cached_structured_llm.invoke(messages)
+
+    assert output == Answer(text="Structured response")
+    assert structured_llm.invoke.call_count == 1
+    inner_llm.with_structured_output.assert_called_once_with(Answer)
+
+
+def test_structured_output_is_not_shared_with_plain_response(
+    inner_llm, messages, tmpdir
+):
+    """Test that structured outputs and plain responses are cached separately."""
+    structured_llm = inner_llm.with_structured_output.return_value
+    structured_llm.invoke.return_value = Answer(text="Structured response")
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    cached_llm.invoke(messages)
+    output = cached_llm.with_structured_output(Answer).invoke(messages)
+
+    assert output == Answer(text="Structured response")
+    assert structured_llm.invoke.call_count == 1
+
+
+def test_stream_caches_complete_response(inner_llm, messages, tmpdir):
+    """Test that a fully consumed stream is cached and replayed as a single chunk."""
+    inner_llm.stream.return_value = [
+        AIMessageChunk(content="LLM "),
+        AIMessageChunk(content="response"),
+    ]
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    list(cached_llm.stream(messages))
+    chunks = list(cached_llm.stream(messages))
+
+    assert [chunk.content for chunk in chunks] == ["LLM response"]
+    assert inner_llm.stream.call_count == 1
+
+
+def test_stream_does_not_cache_partial_response(inner_llm, messages, tmpdir):
+    """Test that an abandoned stream is not cached."""
+    inner_llm.stream.side_effect = lambda messages: iter(
+        [AIMessageChunk(content="LLM "), AIMessageChunk(content="response")]
+    )
+    cached_llm = CachedLLM(inner_llm, cache_path=os.path.join(tmpdir, "cache.sqlite"))
+
+    next(cached_llm.stream(messages))
+    list(cached_llm.stream(messages))
+
+    assert inner_llm.stream.call_count == 2
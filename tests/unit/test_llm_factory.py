@@ -0,0 +1,126 @@
+"""
+Unit tests for llm_factory module.
+
+Tests that the shared HTTP clients work across the event loops of the sync wrappers.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from phd_agent.agents.essay_writer_agent import EssayWriterAgent
+from phd_agent.config import config
+from phd_agent.llm_factory import _get_http_async_client, _get_http_client
+from phd_agent.models import AgentState, DocumentSource, DocumentType, ResearchTask
+
+ESSAY_CONTENT = json.dumps(
+    {
+        "outline": {
+            "title": "AI in Education",
+            "introduction": "Introduction text",
+            "main_points": ["Point 1"],
+            "conclusion": "Conclusion text",
+            "sources": ["Source 1"],
+        },
+        "essay": "The essay text.",
+    }
+)
+
+
+class CharEncoding:
+    """Tokenizer stub that treats every character as a token."""
+
+    def encode(self, text):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint keeping the connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "test-model",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": ESSAY_CONTENT},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    """Start a local chat completions server."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def _state(task_id):
+    return AgentState(
+        task=ResearchTask(id=task_id, topic="AI in Education", requirements="Analyze"),
+        documents=[
+            DocumentSource(
+                id="1",
+                title="Source 1",
+                content="Personalized learning systems adapt to students.",
+                source_type=DocumentType.WEB,
+            )
+        ],
+    )
+
+
+def test_run_batch_twice_reuses_shared_clients(base_url):
+    """Test that the shared clients serve the requests of consecutive event loops."""
+    agent = EssayWriterAgent()
+    agent.encoding = CharEncoding()
+    agent.llm = ChatOpenAI(
+        model="test-model",
+        api_key="test-key",
+        base_url=base_url,
+        max_retries=0,
+        http_client=_get_http_client(),
+        http_async_client=_get_http_async_client(),
+    )
+
+    with patch.object(config, "FUSED_GENERATION", True), patch.object(
+        config, "ENABLE_SEMANTIC_OUTLINE_CACHE", False
+    ):
+        first = agent.run_batch([_state("task-1")])
+        second = agent.run_batch([_state("task-2")])
+
+    for state in first + second:
+        assert not state.errors
+        assert state.final_essay.content == "The essay text."
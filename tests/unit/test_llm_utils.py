@@ -0,0 +1,159 @@
+"""
+Unit tests for llm_utils module.
+
+Tests LLM response parsing, prompt template construction, rate limiting and
+token truncation.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from phd_agent.llm_utils import (
+    TokenRateLimiter,
+    create_prompt_template,
+    estimate_tokens,
+    parse_llm_response,
+    truncate_tokens,
+)
+
+
+def test_parse_llm_response_plain_json():
+    """Test parsing of a plain JSON response."""
+    result = parse_llm_response('{"next_step": "completed"}')
+
+    assert result == {"next_step": "completed"}
+
+
+def test_parse_llm_response_markdown_json():
+    """Test parsing of a JSON response wrapped in a Markdown code block."""
+    result = parse_llm_response('```json\n{"next_step": "completed"}\n```')
+
+    assert result == {"next_step": "completed"}
+
+
+def test_parse_llm_response_invalid():
+    """Test parsing of a response without JSON."""
+    with pytest.raises(json.JSONDecodeError):
+        parse_llm_response("no json here")
+
+
+def test_create_prompt_template_static_system_message():
+    """Test that the system prompt is used verbatim and the user prompt is formatted."""
+    prompt = create_prompt_template(
+        system_prompt='Respond with JSON: {"title": "..."}',
+        user_prompt="Topic: {topic}",
+        model="gpt-4.1-mini",
+    )
+
+    messages = prompt.format_messages(topic="AI")
+
+    assert isinstance(messages[0], SystemMessage)
+    assert messages[0].content == 'Respond with JSON: {"title": "..."}'
+    assert "cache_control" not in messages[0].additional_kwargs
+    assert isinstance(messages[1], HumanMessage)
+    assert messages[1].content == "Topic: AI"
+
+
+def test_create_prompt_template_anthropic_cache_control():
+    """Test that Anthropic models get a cache breakpoint on the system message."""
+    prompt = create_prompt_template(
+        system_prompt="Static instructions",
+        user_prompt="Topic: {topic}",
+        model="claude-sonnet-4",
+    )
+
+    messages = prompt.format_messages(topic="AI")
+
+    assert messages[0].additional_kwargs["cache_control"] == {"type": "ephemeral"}
+
+
+def test_create_prompt_template_context_message():
+    """Test that the context message is placed between the system and user messages."""
+    prompt = create_prompt_template(
+        system_prompt="Static instructions",
+        user_prompt="Topic: {topic}",
+        model="claude-sonnet-4",
+        context_prompt="Research data: {research_data}",
+    )
+
+    messages = prompt.format_messages(topic="AI", research_data="{data}")
+
+    assert isinstance(messages[1], HumanMessage)
+    assert messages[1].content == "Research data: {data}"
+    assert messages[1].additional_kwargs["cache_control"] == {"type": "ephemeral"}
+    assert messages[2].content == "Topic: AI"
+
+
+def test_create_prompt_template_prompt_cache_disabled():
+    """Test that no cache breakpoints are set when the prompt cache is disabled."""
+    prompt = create_prompt_template(
+        system_prompt="Static instructions",
+        user_prompt="Topic: {topic}",
+        model="claude-sonnet-4",
+        prompt_cache=False,
+    )
+
+    messages = prompt.format_messages(topic="AI")
+
+    assert "cache_control" not in messages[0].additional_kwargs
+
+
+def test_estimate_tokens():
+    """Test that the tokens are estimated from the length of the messages."""
+    messages = [SystemMessage(content="a" * 40), HumanMessage(content="b" * 20)]
+
+    assert estimate_tokens(messages) == 15
+
+
+def test_token_rate_limiter_waits_for_refill():
+    """Test that the tokens over the budget wait for the bucket to refill."""
+
+    async def acquire_twice():
+        limiter = TokenRateLimiter(tokens_per_minute=6000)  # 100 tokens per second
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.acquire(6000)
+        first = loop.time() - start
+        await limiter.acquire(10)
+        return first, loop.time() - start
+
+    first, total = asyncio.run(acquire_twice())
+
+    assert first < 0.05
+    assert total >= 0.09
+
+
+class CharEncoding:
+    """Encoding with a token per character."""
+
+    def encode(self, text):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def test_truncate_tokens_short_text_skips_encoding():
+    """Test that the text shorter than the budget is returned without encoding."""
+    truncate_tokens.cache_clear()
+    with patch("phd_agent.llm_utils.get_encoding") as get_encoding:
+        assert truncate_tokens("Short text", 100, "test-model") == "Short text"
+
+    get_encoding.assert_not_called()
+
+
+def test_truncate_tokens_long_text_truncated_once():
+    """Test that the long text is truncated to the budget and encoded once."""
+    truncate_tokens.cache_clear()
+    with patch(
+        "phd_agent.llm_utils.get_encoding", return_value=CharEncoding()
+    ) as get_encoding:
+        first = truncate_tokens("x" * 1000, 10, "test-model")
+        second = truncate_tokens("x" * 1000, 10, "test-model")
+
+    assert first == second == "x" * 10
+    get_encoding.assert_called_once()
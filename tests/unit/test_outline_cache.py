@@ -0,0 +1,137 @@
+"""
+Unit tests for outline_cache module.
+
+Tests the outline lookup and storage with a mocked Milvus collection.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from phd_agent.models import EssayOutline
+from phd_agent.outline_cache import SemanticOutlineCache
+
+OUTLINE = EssayOutline(
+    title="AI in Education",
+    introduction="Introduction text",
+    main_points=["Point 1", "Point 2"],
+    conclusion="Conclusion text",
+    sources=["Source 1"],
+)
+
+
+def _vector_store():
+    vector_store = MagicMock()
+    vector_store.dimension = 2
+    vector_store.embedding_model.embed_query.return_value = [1.0, 0.0]
+    return vector_store
+
+
+def _search_results(distance):
+    hit = MagicMock()
+    hit.distance = distance
+    hit.entity.get.return_value = OUTLINE.model_dump_json()
+    return [[hit]]
+
+
+def _field(name):
+    field = MagicMock()
+    field.name = name
+    return field
+
+
+@pytest.fixture
+def cache():
+    """Create an outline cache with an existing mocked collection."""
+    with patch(
+        "phd_agent.outline_cache.get_vector_store", return_value=_vector_store()
+    ), patch(
+        "phd_agent.outline_cache.utility.has_collection", return_value=True
+    ), patch(
+        "phd_agent.outline_cache.Collection"
+    ) as collection, patch(
+        "phd_agent.outline_cache.config.SEMANTIC_CACHE_THRESHOLD", 0.9
+    ):
+        collection.return_value.schema.fields = [_field("essay_length")]
+        return SemanticOutlineCache()
+
+
+def test_lookup_similar_task_hits(cache):
+    """Test that the outline of a task above the similarity threshold is reused."""
+    cache.collection.search.return_value = _search_results(0.95)
+
+    outline = cache.lookup("AI in Education", "Analyze", "short")
+
+    assert outline == OUTLINE
+    cache.embedding_model.embed_query.assert_called_once_with("AI in Education Analyze")
+    search_kwargs = cache.collection.search.call_args.kwargs
+    assert search_kwargs["data"] == [[1.0, 0.0]]
+    assert search_kwargs["expr"] == 'essay_length == "short"'
+
+
+def test_lookup_dissimilar_task_misses(cache):
+    """Test that the outline of a task below the similarity threshold is not reused."""
+    cache.collection.search.return_value = _search_results(0.5)
+
+    assert cache.lookup("Ocean currents", "Analyze", "short") is None
+
+
+def test_precomputed_embedding_is_not_recomputed(cache):
+    """Test that the given embedding of the research task is used as is."""
+    cache.collection.search.return_value = _search_results(0.95)
+
+    cache.lookup("AI in Education", "Analyze", "long", embedding=[0.6, 0.8])
+    cache.store("AI in Education", "Analyze", "long", OUTLINE, embedding=[0.6, 0.8])
+
+    cache.embedding_model.embed_query.assert_not_called()
+    assert cache.collection.search.call_args.kwargs["data"] == [[0.6, 0.8]]
+    data = cache.collection.insert.call_args[0][0]
+    assert data[1] == [[0.6, 0.8]]
+    assert data[2] == ["long"]
+    assert EssayOutline.model_validate_json(data[3][0]) == OUTLINE
+    cache.collection.flush.assert_called_once()
+
+
+def test_setup_creates_collection_with_index():
+    """Test that a missing collection is created with the schema and the index."""
+    with patch(
+        "phd_agent.outline_cache.get_vector_store", return_value=_vector_store()
+    ), patch(
+        "phd_agent.outline_cache.utility.has_collection", return_value=False
+    ), patch(
+        "phd_agent.outline_cache.Collection"
+    ) as collection, patch(
+        "phd_agent.outline_cache.config.MILVUS_COLLECTION_NAME", "documents"
+    ):
+        cache = SemanticOutlineCache()
+
+    name, schema = collection.call_args[0]
+    assert name == "documents_outline_cache"
+    assert [field.name for field in schema.fields] == [
+        "id",
+        "embedding",
+        "essay_length",
+        "outline",
+        "created_at",
+    ]
+    assert schema.fields[1].params["dim"] == 2
+    cache.collection.create_index.assert_called_once_with(
+        "embedding",
+        {"metric_type": "COSINE", "index_type": "IVF_FLAT", "params": {"nlist": 128}},
+    )
+
+
+def test_setup_drops_collection_without_essay_length():
+    """Test that an outline cache created without the essay length is recreated."""
+    with patch(
+        "phd_agent.outline_cache.get_vector_store", return_value=_vector_store()
+    ), patch("phd_agent.outline_cache.utility") as utility, patch(
+        "phd_agent.outline_cache.Collection"
+    ) as collection:
+        utility.has_collection.return_value = True
+        collection.return_value.schema.fields = [_field("id"), _field("outline")]
+        cache = SemanticOutlineCache()
+
+    utility.drop_collection.assert_called_once_with(cache.collection_name)
+    assert len(collection.call_args[0]) == 2
+    cache.collection.create_index.assert_called_once()
@@ -0,0 +1,124 @@
+"""
+Unit tests for PDFAgent.
+
+Tests the batch parsing of PDF files with a mocked vector store.
+"""
+
+import os
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from phd_agent.agents.pdf_agent import PDFAgent, _collect_pdf_files
+from phd_agent.models import AgentState, DocumentSource, DocumentType, ResearchTask
+
+
+def _create_pdf(path, text):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def pdf_files(tmpdir):
+    """Create sample PDF files."""
+    return [
+        _create_pdf(os.path.join(tmpdir, f"paper_{i}.pdf"), f"Content of paper {i}")
+        for i in range(3)
+    ]
+
+
+def test_process_pdf_files_parses_all_files(pdf_files):
+    """Test that the new files are parsed in parallel, preserving the order."""
+    with patch(
+        "phd_agent.agents.pdf_agent.get_documents_by_file_path", return_value=[]
+    ):
+        documents = PDFAgent().process_pdf_files(pdf_files)
+
+    assert [doc.file_path for doc in documents] == pdf_files
+    assert "Content of paper 1" in documents[1].content
+    assert all(doc.source_type == DocumentType.PDF for doc in documents)
+
+
+def test_process_pdf_files_reuses_saved_documents(pdf_files):
+    """Test that the files already in the vector store are not parsed again."""
+    saved = DocumentSource(
+        id="saved",
+        title="Saved",
+        content="Saved content",
+        source_type=DocumentType.PDF,
+        file_path=pdf_files[0],
+    )
+
+    def get_saved(file_path):
+        return [saved] if file_path == pdf_files[0] else []
+
+    with patch(
+        "phd_agent.agents.pdf_agent.get_documents_by_file_path", side_effect=get_saved
+    ):
+        documents = PDFAgent().process_pdf_files(pdf_files[:2])
+
+    assert documents[0] is saved
+    assert [doc.file_path for doc in documents] == pdf_files[:2]
+
+
+def test_process_pdf_files_skips_broken_files(pdf_files, tmpdir):
+    """Test that a broken file does not fail the whole batch."""
+    broken = os.path.join(tmpdir, "broken.pdf")
+    with open(broken, "w") as f:
+        f.write("not a pdf")
+
+    with patch(
+        "phd_agent.agents.pdf_agent.get_documents_by_file_path", return_value=[]
+    ):
+        errors = []
+        documents = PDFAgent().process_pdf_files([broken, pdf_files[0]], errors)
+
+    assert [doc.file_path for doc in documents] == [pdf_files[0]]
+    assert len(errors) == 1
+    assert errors[0].startswith(f"PDF processing error: {broken}: ")
+
+
+def test_run_reports_broken_files(pdf_files, tmpdir):
+    """Test that the files failed to process are reported in the state errors."""
+    broken = os.path.join(tmpdir, "broken.pdf")
+    with open(broken, "w") as f:
+        f.write("not a pdf")
+    state = AgentState(
+        task=ResearchTask(id="task", topic="Topic", requirements="Requirements")
+    )
+
+    with patch(
+        "phd_agent.agents.pdf_agent.get_documents_by_file_path", return_value=[]
+    ), patch(
+        "phd_agent.agents.pdf_agent.store_documents",
+        side_effect=lambda documents: [1] * len(documents),
+    ), patch(
+        "phd_agent.agents.pdf_agent.search_local_documents", return_value=[]
+    ), patch(
+        "phd_agent.agents.pdf_agent.embed_task_query", return_value=[0.1]
+    ):
+        result = PDFAgent().run(state, [broken, pdf_files[0]])
+
+    assert len(result.errors) == 1
+    assert result.errors[0].startswith(f"PDF processing error: {broken}: ")
+
+
+def test_collect_pdf_files_expands_directories(pdf_files, tmpdir):
+    """Test that the directories are scanned recursively for the PDF files."""
+    nested = os.path.join(tmpdir, "nested")
+    os.makedirs(nested)
+    nested_pdf = _create_pdf(os.path.join(nested, "nested.pdf"), "Nested paper")
+    with open(os.path.join(tmpdir, "notes.txt"), "w") as f:
+        f.write("not a pdf")
+
+    collected = _collect_pdf_files(
+        [str(tmpdir), pdf_files[0], os.path.join(tmpdir, "missing.pdf")]
+    )
+
+    assert sorted(collected[:-1]) == sorted(pdf_files + [nested_pdf])
+    assert collected[-1] == pdf_files[0]
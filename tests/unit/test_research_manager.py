@@ -0,0 +1,27 @@
+"""
+Unit tests for research_manager module.
+
+Tests that the status check does not start the research system.
+"""
+
+from unittest.mock import patch
+
+from phd_agent.models import ResearchParameters
+from phd_agent.research_manager import run_research
+
+
+def test_run_research_status_only_skips_agents():
+    """Test that only the configuration is reported for the status check."""
+    parameters = ResearchParameters(
+        topic="AI in Education",
+        requirements="Analyze AI in education",
+        max_relevant_sources=10,
+        essay_length="short",
+        output_files=[],
+        verbose=False,
+    )
+
+    with patch("phd_agent.agents.SupervisorAgent") as supervisor_class:
+        run_research(parameters, status_only=True)
+
+    supervisor_class.assert_not_called()
@@ -0,0 +1,156 @@
+"""
+Unit tests for semantic_cache module.
+
+Tests the semantic cache wrapper around chat model invocations.
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from phd_agent.semantic_cache import SemanticCachedLLM, normalize_prompt
+
+
+@pytest.fixture
+def inner_llm():
+    """Create a mocked chat model."""
+    llm = MagicMock()
+    llm.model_name = "test-model"
+    llm.temperature = 0.7
+    llm.invoke.return_value = AIMessage(content="LLM response")
+    return llm
+
+
+@pytest.fixture
+def embedding_model():
+    """Create a mocked embedding model."""
+    model = MagicMock()
+    model.embed_query.return_value = [1.0, 0.0]
+    return model
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return os.path.join(tmpdir, "cache.sqlite")
+
+
+def _messages(question):
+    return [SystemMessage(content="System prompt"), HumanMessage(content=question)]
+
+
+def test_invoke_similar_prompt_hits(inner_llm, embedding_model, cache_path):
+    """Test that a near-duplicate prompt is answered from the cache."""
+    cached_llm = SemanticCachedLLM(inner_llm, embedding_model, cache_path)
+
+    cached_llm.invoke(_messages("Question"))
+    embedding_model.embed_query.return_value = [0.999, 0.01]
+    response = cached_llm.invoke(_messages("Question?"))
+
+    assert response.content == "LLM response"
+    inner_llm.invoke.assert_called_once()
+
+
+def test_invoke_dissimilar_prompt_misses(inner_llm, embedding_model, cache_path):
+    """Test that a prompt below the threshold invokes the wrapped model."""
+    cached_llm = SemanticCachedLLM(inner_llm, embedding_model, cache_path)
+
+    cached_llm.invoke(_messages("Question"))
+    embedding_model.embed_query.return_value = [0.5, 0.5]
+    cached_llm.invoke(_messages("Another question"))
+
+    assert inner_llm.invoke.call_count == 2
+
+
+def test_cache_persists_between_instances(inner_llm, embedding_model, cache_path):
+    """Test that the cached responses are loaded from the database."""
+    SemanticCachedLLM(inner_llm, embedding_model, cache_path).invoke(
+        _messages("Question")
+    )
+
+    response = SemanticCachedLLM(inner_llm, embedding_model, cache_path).invoke(
+        _messages("Question")
+    )
+
+    assert response.content == "LLM response"
+    inner_llm.invoke.assert_called_once()
+
+
+def test_cache_separates_models(inner_llm, embedding_model, cache_path):
+    """Test that the responses of other models are not reused."""
+    SemanticCachedLLM(inner_llm, embedding_model, cache_path).invoke(
+        _messages("Question")
+    )
+    other_llm = MagicMock()
+    other_llm.model_name = "other-model"
+    other_llm.temperature = 0.7
+    other_llm.invoke.return_value = AIMessage(content="Other response")
+
+    response = SemanticCachedLLM(other_llm, embedding_model, cache_path).invoke(
+        _messages("Question")
+    )
+
+    assert response.content == "Other response"
+
+
+def test_cache_expiration(inner_llm, embedding_model, cache_path, monkeypatch):
+    """Test that expired entries are not returned."""
+    cached_llm = SemanticCachedLLM(inner_llm, embedding_model, cache_path, ttl_secs=60)
+    cached_llm.invoke(_messages("Question"))
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    cached_llm.invoke(_messages("Question"))
+
+    assert inner_llm.invoke.call_count == 2
+
+
+def test_ainvoke_similar_prompt_hits(inner_llm, embedding_model, cache_path):
+    """Test that the asynchronous invocation shares the cache."""
+
+    async def aembed_query(text):
+        return [1.0, 0.0]
+
+    embedding_model.aembed_query = aembed_query
+    cached_llm = SemanticCachedLLM(inner_llm, embedding_model, cache_path)
+    cached_llm.invoke(_messages("Question"))
+
+    response = asyncio.run(cached_llm.ainvoke(_messages("Question")))
+
+    assert response.content == "LLM response"
+    inner_llm.ainvoke.assert_not_called()
+
+
+def test_normalize_prompt():
+    """Test that timestamps are removed and whitespace is collapsed."""
+    messages = [
+        HumanMessage(content="Generated at 2025-01-31T12:00:00Z\n\n  Topic:   AI")
+    ]
+
+    assert normalize_prompt(messages) == "Generated at Topic: AI"
+
+
+def test_structured_output_similar_prompt_hits(inner_llm, embedding_model, cache_path):
+    """Test that the structured output of a near-duplicate prompt is served from the cache."""
+
+    class Answer(BaseModel):
+        text: str
+
+    inner_llm.with_structured_output.return_value.invoke.return_value = Answer(
+        text="LLM answer"
+    )
+    structured_llm = SemanticCachedLLM(
+        inner_llm, embedding_model, cache_path
+    ).with_structured_output(Answer)
+
+    structured_llm.invoke(_messages("Question"))
+    embedding_model.embed_query.return_value = [0.999, 0.01]
+    output = structured_llm.invoke(_messages("Question?"))
+
+    assert output == Answer(text="LLM answer")
+    inner_llm.with_structured_output.return_value.invoke.assert_called_once()
+    assert embedding_model.embed_query.call_args[0][0].startswith("Answer: ")
@@ -0,0 +1,128 @@
+"""
+Unit tests for vector_store module.
+
+Tests the batched storage and retrieval of documents with a mocked Milvus collection.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from phd_agent.models import AgentState, DocumentSource, DocumentType, ResearchTask
+from phd_agent.vector_store import (
+    MilvusVectorStore,
+    embed_task_query,
+    search_local_documents,
+    store_documents,
+)
+
+
+def _documents(count):
+    return [
+        DocumentSource(
+            title=f"Document {i}",
+            content=f"Content {i}",
+            source_type=DocumentType.PDF,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def store():
+    """Create a vector store with mocked collection and embeddings."""
+    store = MilvusVectorStore.__new__(MilvusVectorStore)
+    store.collection = MagicMock()
+    store.embedding_model = MagicMock()
+    store.embedding_model.embed_documents.side_effect = lambda texts: [
+        [0.1, 0.2] for _ in texts
+    ]
+    return store
+
+
+def test_add_documents_single_insert(store):
+    """Test that a batch is embedded with one request and inserted at once."""
+    documents = _documents(3)
+
+    ids = store.add_documents(documents)
+
+    assert ids == [doc.id for doc in documents]
+    store.embedding_model.embed_documents.assert_called_once_with(
+        ["Content 0", "Content 1", "Content 2"]
+    )
+    store.collection.insert.assert_called_once()
+    data = store.collection.insert.call_args[0][0]
+    assert data[1] == ["Document 0", "Document 1", "Document 2"]
+    assert data[6] == [[0.1, 0.2]] * 3
+
+
+def test_store_documents_in_batches(store):
+    """Test that the documents are stored in batches of the configured size."""
+    with patch("phd_agent.vector_store.get_vector_store", return_value=store), patch(
+        "phd_agent.vector_store.config.EMBEDDING_BATCH_SIZE", 2
+    ):
+        ids = store_documents(_documents(5))
+
+    assert len(ids) == 5
+    assert store.collection.insert.call_count == 3
+
+
+def test_store_documents_falls_back_to_single_documents(store):
+    """Test that a failed batch is stored one by one, skipping the failing document."""
+    documents = _documents(3)
+
+    def insert(data):
+        if "Document 1" in data[1]:
+            raise Exception("Insert failed")
+
+    store.collection.insert.side_effect = insert
+    with patch("phd_agent.vector_store.get_vector_store", return_value=store):
+        ids = store_documents(documents)
+
+    assert ids == [documents[0].id, documents[2].id]
+
+
+def test_query_document_shares_repeated_strings(store):
+    """Test that the documents created from the results share the repeated strings."""
+    row = {
+        "id": "1",
+        "title": "Paper - Chunk 1",
+        "content": "".join(["Same ", "content"]),
+        "source_type": "pdf",
+        "url": "",
+        "file_path": "".join(["/data/", "paper.pdf"]),
+        "metadata": "{'page_range': 'Chunk 1'}",
+        "created_at": "2025-01-31T12:00:00",
+    }
+    other_row = dict(
+        row,
+        id="2",
+        content="".join(["Same ", "content"]),
+        file_path="".join(["/data/", "paper.pdf"]),
+    )
+    store.collection.query.return_value = [row, other_row]
+
+    documents = store.query_document('file_path == "/data/paper.pdf"')
+
+    assert documents[0].content is documents[1].content
+    assert documents[0].file_path is documents[1].file_path
+    assert documents[0].url is None
+    assert documents[0].metadata == {"page_range": "Chunk 1"}
+
+
+def test_task_query_embedded_once(store):
+    """Test that the research task query is embedded once and reused by the search."""
+    store.embedding_model.embed_query.return_value = [0.3, 0.4]
+    store.collection.search.return_value = []
+    state = AgentState(
+        task=ResearchTask(id="task", topic="Topic", requirements="Requirements")
+    )
+
+    with patch("phd_agent.vector_store.get_vector_store", return_value=store):
+        embedding = embed_task_query(state)
+        search_local_documents("Topic Requirements", query_embedding=embedding)
+        assert embed_task_query(state) == [0.3, 0.4]
+
+    store.embedding_model.embed_query.assert_called_once_with("Topic Requirements")
+    assert store.collection.search.call_args.kwargs["data"] == [[0.3, 0.4]]
+    assert "task_query_embedding" not in state.model_dump()
@@ -0,0 +1,142 @@
+"""
+Unit tests for web_search_agent module.
+
+Tests the concurrent web search and content extraction with mocked web access.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from phd_agent.agents.web_search_agent import WebSearchAgent
+from phd_agent.models import SearchResult
+
+
+@pytest.fixture
+def agent():
+    """Create a web search agent."""
+    return WebSearchAgent()
+
+
+def test_process_search_results_keeps_order(agent):
+    """Test that the extracted contents are matched with their search results."""
+    search_results = [
+        SearchResult(title=f"Result {i}", url=f"https://example.com/{i}", snippet="")
+        for i in range(5)
+    ]
+
+    with patch.object(
+        agent, "extract_web_content", side_effect=lambda url: f"Content of {url}"
+    ):
+        documents = agent.process_search_results(search_results)
+
+    assert [document.title for document in documents] == [
+        f"Result {i}" for i in range(5)
+    ]
+    assert documents[3].content == "Content of https://example.com/3"
+
+
+def test_process_search_results_falls_back_to_snippet(agent):
+    """Test that the snippet is used when the page content is not available."""
+    search_results = [
+        SearchResult(title="Result", url="https://example.com", snippet="Snippet")
+    ]
+
+    with patch.object(agent, "extract_web_content", return_value=None):
+        documents = agent.process_search_results(search_results)
+
+    assert documents[0].content == "Snippet"
+
+
+def test_search_relevant_web_content_stores_once(agent):
+    """Test that the documents of all queries are stored with a single call in order."""
+
+    def search_web(query, max_results=None):
+        return [SearchResult(title=query, url="", snippet=f"About {query}")]
+
+    with (
+        patch("phd_agent.agents.web_search_agent.config.WEB_SEARCH_DELAY", 0),
+        patch("phd_agent.agents.web_search_agent._search_web", side_effect=search_web),
+        patch(
+            "phd_agent.agents.web_search_agent.store_documents",
+            side_effect=lambda documents: [str(i) for i in range(len(documents))],
+        ) as store_documents,
+    ):
+        documents = agent.search_relevant_web_content("AI", "trends")
+
+    store_documents.assert_called_once()
+    assert [document.title for document in documents] == [
+        "AI",
+        "AI trends",
+        "AI research",
+        "AI analysis",
+    ]
+
+
+def test_search_relevant_web_content_bounds_web_requests():
+    """Test that the searches and the page fetches of all queries share the limit."""
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def web_request(result):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return result
+
+    def search_web(query, max_results=None):
+        return web_request(
+            [
+                SearchResult(
+                    title=f"{query} {i}", url=f"https://example.com/{i}", snippet=""
+                )
+                for i in range(4)
+            ]
+        )
+
+    with (
+        patch(
+            "phd_agent.agents.web_search_agent.config.MAX_CONCURRENT_WEB_REQUESTS", 2
+        ),
+        patch("phd_agent.agents.web_search_agent.config.WEB_SEARCH_DELAY", 0),
+        patch("phd_agent.agents.web_search_agent._search_web", side_effect=search_web),
+        patch(
+            "phd_agent.agents.web_search_agent.store_documents",
+            side_effect=lambda documents: [str(i) for i in range(len(documents))],
+        ),
+    ):
+        agent = WebSearchAgent()
+        with patch.object(agent, "extract_web_content", side_effect=web_request):
+            documents = agent.search_relevant_web_content("AI", "trends")
+
+    assert len(documents) == 16
+    assert max_active <= 2
+
+
+def test_search_relevant_web_content_spaces_out_searches(agent):
+    """Test that the web search calls are made at least the configured delay apart."""
+    search_times = []
+
+    def search_web(query, max_results=None):
+        search_times.append(time.monotonic())
+        return []
+
+    with (
+        patch("phd_agent.agents.web_search_agent.config.WEB_SEARCH_DELAY", 0.05),
+        patch("phd_agent.agents.web_search_agent._search_web", side_effect=search_web),
+    ):
+        agent.search_relevant_web_content("AI", "trends")
+
+    search_times.sort()
+    assert len(search_times) == 4
+    assert all(
+        later - earlier >= 0.045
+        for earlier, later in zip(search_times, search_times[1:])
+    )